@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+KvizMajstor bedževi - pravila nad malim brojačima po korisniku.
+
+Svako pravilo deklariše brojače koje ažurira iz događaja predaje (`counts` -
+uvećanje, `streaks` - niz uzastopnih ispunjenja) i uslov nad tim brojačima.
+Brojači su u users.badgeStats, a osvojeni bedževi u users.badges i dodeljuju se
+samo jednom. Predaja radi tri upita bez obzira na broj igrača (brojači, čitanje,
+dodela). Novo pravilo se ocenjuje od sledeće predaje; istorija se uračunava samo
+eksplicitno:
+
+    python badges.py backfill
+"""
+
+import argparse
+import asyncio
+import time
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional
+
+from pymongo import UpdateOne
+
+from bus import bus
+from database import category_scores_collection, results_collection, results_monthly_collection, users_collection
+from leaderboards import mastery
+from scoring import BASE_POINTS, MAX_SPEED_BONUS
+from stats import question_key
+from user_stats import STATS_FIELD as USER_STATS_FIELD
+
+STATS_FIELD = "badgeStats"
+FAST_POINTS_RATIO = 0.9  # Udeo najvećih mogućih poena (svi tačni, maksimalni bonus)
+BACKFILL_BATCH_SIZE = 500
+
+Event = dict
+Counter = Callable[[Event], int]
+
+
+class BadgeRule:
+    def __init__(self, id: str, name: str, icon: str, earned: Callable[[dict], bool],
+                 counts: Optional[Dict[str, Counter]] = None,
+                 streaks: Optional[Dict[str, Callable[[Event], bool]]] = None):
+        self.id = id
+        self.name = name
+        self.icon = icon
+        self.earned = earned
+        self.counts = counts or {}
+        self.streaks = streaks or {}
+
+
+def is_perfect(event: Event) -> bool:
+    return event["score"] == 100
+
+
+def is_fast(event: Event) -> bool:
+    """Merena igra sa skoro svim bonus poenima za brzinu"""
+    points, total = event.get("points"), event.get("totalQuestions", 0)
+    return points is not None and total > 0 and points >= FAST_POINTS_RATIO * total * (BASE_POINTS + MAX_SPEED_BONUS)
+
+
+def _category_mastered(stats: dict) -> bool:
+    return any(
+        mastery({"categoryId": key, "score": c.get("scoreSum", 0), "plays": c.get("plays", 0)})["mastered"]
+        for key, c in stats.get("categories", {}).items()
+    )
+
+
+ONE: Counter = lambda e: 1
+
+RULES: List[BadgeRule] = [
+    BadgeRule("1", "Prvi Kviz", "🎯", counts={"plays": ONE},
+              earned=lambda s: s.get("plays", 0) >= 1),
+    BadgeRule("2", "Savršen Rezultat", "💯", counts={"perfect": lambda e: int(is_perfect(e))},
+              earned=lambda s: s.get("perfect", 0) >= 1),
+    BadgeRule("3", "10 Kvizova", "🔟", counts={"plays": ONE},
+              earned=lambda s: s.get("plays", 0) >= 10),
+    BadgeRule("4", "Brzinski Demon", "⚡", counts={"fast": lambda e: int(is_fast(e))},
+              earned=lambda s: s.get("fast", 0) >= 1),
+    BadgeRule("5", "Majstor Kategorije", "👑",
+              counts={"categories.{category}.plays": ONE, "categories.{category}.scoreSum": lambda e: e["score"]},
+              earned=_category_mastered),
+    BadgeRule("6", "Nezaustavljiv", "🔥", streaks={"perfectStreak": is_perfect},
+              earned=lambda s: s.get("perfectStreak", 0) >= 5),
+    # Dnevni niz održava streaks.streak_update; pravilo samo čita najduži niz
+    BadgeRule("7", "Nedelja Zaredom", "📅",
+              earned=lambda s: s.get("dailyStreak", 0) >= 7),
+]
+
+# Brojač koji deli više pravila se ažurira jednom
+COUNTERS: Dict[str, Counter] = {name: fn for rule in RULES for name, fn in rule.counts.items()}
+STREAKS: Dict[str, Callable[[Event], bool]] = {name: fn for rule in RULES for name, fn in rule.streaks.items()}
+
+
+def counter_updates(events: List[Event]) -> Dict[str, dict]:
+    """userId -> Mongo update za brojače; događaji istog korisnika se spajaju po redu"""
+    by_user: Dict[str, List[Event]] = defaultdict(list)
+    for event in events:
+        if event.get("userId"):
+            by_user[event["userId"]].append(event)
+
+    updates = {}
+    for user_id, user_events in by_user.items():
+        inc: Dict[str, int] = defaultdict(int)
+        set_fields: Dict[str, int] = {}
+        for event in user_events:
+            category = question_key(str(event.get("categoryId") or "none"))
+            for name, counter in COUNTERS.items():
+                amount = counter(event)
+                if amount:
+                    inc[f"{STATS_FIELD}.{name.format(category=category)}"] += amount
+        for name, predicate in STREAKS.items():
+            field = f"{STATS_FIELD}.{name}"
+            run = 0
+            broken = False
+            for event in user_events:
+                if predicate(event):
+                    run += 1
+                else:
+                    run, broken = 0, True
+            # Prekinut niz se postavlja na dužinu poslednjeg niza, inače se nastavlja
+            if broken:
+                set_fields[field] = run
+            elif run:
+                inc[field] += run
+        update = {}
+        if inc:
+            update["$inc"] = dict(inc)
+        if set_fields:
+            update["$set"] = set_fields
+        if update:
+            updates[user_id] = update
+    return updates
+
+
+def new_badges(user: dict) -> List[str]:
+    owned = set(user.get("badges", []))
+    streak = user.get(USER_STATS_FIELD, {}).get("streak", {})
+    stats = dict(user.get(STATS_FIELD, {}), dailyStreak=streak.get("longest", 0))
+    return [rule.id for rule in RULES if rule.id not in owned and rule.earned(stats)]
+
+
+async def _award(user_ids: List[str]) -> Dict[str, List[str]]:
+    awarded = {}
+    async for user in users_collection.find(
+        {"id": {"$in": user_ids}}, {"_id": 0, "id": 1, "badges": 1, STATS_FIELD: 1, f"{USER_STATS_FIELD}.streak": 1}
+    ):
+        earned = new_badges(user)
+        if earned:
+            awarded[user["id"]] = earned
+    if awarded:
+        await users_collection.bulk_write([
+            UpdateOne({"id": user_id}, {"$addToSet": {"badges": {"$each": earned}}})
+            for user_id, earned in awarded.items()
+        ], ordered=False)
+        bus.publish("badges.awarded", {"awarded": awarded})
+    return awarded
+
+
+async def process_events(events: List[Event]) -> Dict[str, List[str]]:
+    """Ažurira brojače i dodeljuje nove bedževe; vraća userId -> nove bedževe"""
+    updates = counter_updates(events)
+    if not updates:
+        return {}
+    await users_collection.bulk_write(
+        [UpdateOne({"id": user_id}, update) for user_id, update in updates.items()], ordered=False
+    )
+    return await _award(list(updates))
+
+
+def profile_badges(user: dict) -> List[dict]:
+    owned = set(user.get("badges", []))
+    return [{"id": r.id, "name": r.name, "icon": r.icon, "earned": r.id in owned} for r in RULES]
+
+
+# ---- backfill iz istorije (eksplicitno) ----
+async def historical_stats() -> Dict[str, dict]:
+    """Brojači iz istorije: rezultati, mesečni zbirovi i zbirovi po kategoriji. Nizovi se ne računaju."""
+    stats: Dict[str, dict] = defaultdict(lambda: defaultdict(int))
+    async for user in users_collection.find({}, {"_id": 0, "id": 1, "quizzesCompleted": 1}):
+        stats[user["id"]]["plays"] = user.get("quizzesCompleted", 0)
+    fast_points = FAST_POINTS_RATIO * (BASE_POINTS + MAX_SPEED_BONUS)
+    async for doc in results_collection.aggregate([
+        {"$group": {
+            "_id": "$userId",
+            "perfect": {"$sum": {"$cond": [{"$eq": ["$score", 100]}, 1, 0]}},
+            "fast": {"$sum": {"$cond": [{"$and": [
+                {"$gt": ["$totalQuestions", 0]},
+                {"$gte": [{"$ifNull": ["$points", 0]}, {"$multiply": ["$totalQuestions", fast_points]}]},
+            ]}, 1, 0]}},
+        }},
+    ], allowDiskUse=True):
+        stats[doc["_id"]]["perfect"] += doc["perfect"]
+        stats[doc["_id"]]["fast"] += doc["fast"]
+    async for doc in results_monthly_collection.find({"scores.100": {"$gt": 0}}, {"_id": 0, "userId": 1, "scores.100": 1}):
+        stats[doc["userId"]]["perfect"] += doc["scores"]["100"]
+    async for doc in category_scores_collection.find({}, {"_id": 0}):
+        category = question_key(str(doc["categoryId"]))
+        stats[doc["userId"]][f"categories.{category}.plays"] = doc.get("plays", 0)
+        stats[doc["userId"]][f"categories.{category}.scoreSum"] = doc.get("score", 0)
+    return stats
+
+
+async def backfill() -> dict:
+    stats = await historical_stats()
+    ops = []
+    user_ids = []
+    awarded = 0
+    for user_id, counters in stats.items():
+        # $max: brojač nikad ne pada, pa paralelne predaje tokom backfill-a ne smetaju.
+        # Kategorija "none" potiče od sesija i soba pre nego što su pamtile kategoriju kviza.
+        ops.append(UpdateOne({"id": user_id}, {
+            "$max": {f"{STATS_FIELD}.{k}": v for k, v in counters.items()},
+            "$unset": {f"{STATS_FIELD}.categories.none": ""},
+        }))
+        user_ids.append(user_id)
+        if len(ops) >= BACKFILL_BATCH_SIZE:
+            await users_collection.bulk_write(ops, ordered=False)
+            awarded += len(await _award(user_ids))
+            ops, user_ids = [], []
+    if ops:
+        await users_collection.bulk_write(ops, ordered=False)
+        awarded += len(await _award(user_ids))
+    return {"users": len(stats), "awarded": awarded}
+
+
+async def main(args):
+    from database import client
+    started = time.perf_counter()
+    try:
+        result = await backfill()
+        print(f"Obrađeno {result['users']} korisnika, novi bedževi za {result['awarded']}")
+    finally:
+        client.close()
+    print(f"Trajanje: {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bedževi iz istorije rezultata")
+    parser.add_argument("command", choices=["backfill"])
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,54 @@
+from typing import Iterable, List, Optional
+import numpy as np
+
+# Bit i odgovara pitanju i u redosledu pitanja verzije kviza (little-endian unutar bajta),
+# isto kao np.packbits(..., bitorder="little").
+
+
+def encode_correctness(flags: List[bool]) -> bytes:
+    """Spakuj listu tačno/netačno u kompaktan bitset (1 bit po pitanju)"""
+    out = bytearray((len(flags) + 7) // 8)
+    for i, ok in enumerate(flags):
+        if ok:
+            out[i >> 3] |= 1 << (i & 7)
+    return bytes(out)
+
+
+def decode_correctness(bits: bytes, question_count: int) -> List[bool]:
+    """Raspakuj jedan bitset nazad u listu bool vrednosti"""
+    return [bool(bits[i >> 3] >> (i & 7) & 1) for i in range(question_count)]
+
+
+def correctness_matrix(bitsets: Iterable[bytes], question_count: int) -> np.ndarray:
+    """Pretvori niz bitsetova iste verzije kviza u bool matricu (rezultati x pitanja).
+
+    Svi bitsetovi jedne verzije imaju istu dužinu, pa se spajaju u jedan bafer
+    i raspakuju jednim np.unpackbits pozivom, bez Python petlje po dokumentu.
+    """
+    row_bytes = (question_count + 7) // 8
+    buffer = b"".join(bytes(b) for b in bitsets)
+    if row_bytes == 0 or not buffer:
+        return np.zeros((0, question_count), dtype=bool)
+    if len(buffer) % row_bytes:
+        raise ValueError("Bitsetovi nisu iste dužine - pomešane verzije kviza?")
+    packed = np.frombuffer(buffer, dtype=np.uint8).reshape(-1, row_bytes)
+    return np.unpackbits(packed, axis=1, count=question_count, bitorder="little").astype(bool)
+
+
+async def load_correctness_matrix(results_collection, quiz_id: str, quiz_version: int,
+                                  question_count: int, query: Optional[dict] = None,
+                                  batch_size: int = 10000) -> np.ndarray:
+    """Učitaj sve bitsetove jedne verzije kviza iz `results` kao NumPy matricu"""
+    flt = {"quizId": quiz_id, "quizVersion": quiz_version, "correctBits": {"$exists": True}}
+    if query:
+        flt.update(query)
+    cursor = results_collection.find(flt, {"_id": 0, "correctBits": 1}).batch_size(batch_size)
+    chunks = []
+    while True:
+        batch = await cursor.to_list(batch_size)
+        if not batch:
+            break
+        chunks.append(correctness_matrix((d["correctBits"] for d in batch), question_count))
+    if not chunks:
+        return np.zeros((0, question_count), dtype=bool)
+    return np.concatenate(chunks)
@@ -0,0 +1,334 @@
+import asyncio
+import json
+import logging
+import os
+import uuid
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional
+
+# Pub/sub magistrala između uvicorn worker-a (invalidacija keša, događaji soba).
+# publish() nikad ne čeka mrežu: lokalni pretplatnici dobijaju poruku u sledećem
+# krugu event loop-a, a udaljeni preko transporta u paketima (batch) iz pozadine.
+#
+# Transporti (BUS_TRANSPORT):
+#   inprocess - samo unutar procesa (testovi, jedan worker)
+#   mongo     - capped kolekcija + tailable cursor (bez dodatne infrastrukture)
+#   broker    - lokalni TCP broker (`python bus.py broker`), zamena za pravi broker
+#
+# Klijent broker-a se posle prekida ponovo povezuje (sa rastućom pauzom); broker
+# nema pretplate, pa nova konekcija odmah prima sve. Događaji iz vremena prekida
+# su izgubljeni - keševi ih pokrivaju svojim TTL-om.
+FLUSH_INTERVAL_SECONDS = 0.05
+MAX_BATCH_SIZE = 500
+MAX_OUTBOX_SIZE = 50000  # Preko ovoga se najstariji događaji odbacuju
+MONGO_CAPPED_SIZE_BYTES = 16 * 1024 * 1024
+RECONNECT_MIN_SECONDS = 0.5
+RECONNECT_MAX_SECONDS = 30
+BROKER_CLIENT_QUEUE_SIZE = 1000  # Paketa po klijentu; spor klijent preko toga se isključuje
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[str, Any], Any]
+
+
+# ---- transporti ----
+class InProcessHub:
+    """Deli se između više Bus instanci u istom procesu (simulacija više worker-a)"""
+
+    def __init__(self):
+        self.receivers: List[Callable[[dict], None]] = []
+
+
+_default_hub = InProcessHub()
+
+
+class InProcessTransport:
+    def __init__(self, hub: Optional[InProcessHub] = None):
+        self.hub = hub or _default_hub
+        self.receiver = None
+
+    async def start(self, receiver: Callable[[dict], None]):
+        self.receiver = receiver
+        self.hub.receivers.append(receiver)
+
+    async def send(self, envelope: dict):
+        for receiver in list(self.hub.receivers):
+            receiver(envelope)
+
+    async def stop(self):
+        if self.receiver in self.hub.receivers:
+            self.hub.receivers.remove(self.receiver)
+
+
+class MongoTransport:
+    def __init__(self, db, collection_name: str = "bus_events"):
+        self.db = db
+        self.collection_name = collection_name
+        self.collection = db[collection_name]
+        self.task: Optional[asyncio.Task] = None
+
+    async def _ensure_capped(self):
+        from pymongo.errors import CollectionInvalid
+        try:
+            await self.db.create_collection(self.collection_name, capped=True, size=MONGO_CAPPED_SIZE_BYTES)
+        except CollectionInvalid:
+            pass
+
+    async def start(self, receiver: Callable[[dict], None]):
+        await self._ensure_capped()
+        # Tailable cursor na praznoj capped kolekciji odmah umire, pa se upisuje marker
+        marker = await self.collection.insert_one({"origin": None, "events": []})
+        self.task = asyncio.create_task(self._tail(receiver, marker.inserted_id))
+
+    async def _tail(self, receiver, last_id):
+        from pymongo import CursorType
+        while True:
+            try:
+                cursor = self.collection.find(
+                    {"_id": {"$gt": last_id}}, cursor_type=CursorType.TAILABLE_AWAIT
+                )
+                while cursor.alive:
+                    async for doc in cursor:
+                        last_id = doc["_id"]
+                        if doc.get("events"):
+                            receiver(doc)
+                    await asyncio.sleep(0.05)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Bus tailable cursor prekinut: {e}")
+                await asyncio.sleep(1)
+
+    async def send(self, envelope: dict):
+        await self.collection.insert_one(dict(envelope))
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+
+class BrokerTransport:
+    """Klijent za lokalni broker: jedna JSON linija po paketu"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 7878):
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+        self.task: Optional[asyncio.Task] = None
+
+    async def _connect(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+    async def start(self, receiver: Callable[[dict], None]):
+        try:
+            await self._connect()
+        except OSError as e:
+            # Broker još nije podignut - _read se povezuje čim bude dostupan
+            logger.warning(f"Bus broker nije dostupan: {e}")
+        self.task = asyncio.create_task(self._read(receiver))
+
+    async def _read(self, receiver):
+        delay = RECONNECT_MIN_SECONDS
+        while True:
+            if self.writer is None:
+                try:
+                    await self._connect()
+                    logger.info("Bus broker ponovo povezan")
+                    delay = RECONNECT_MIN_SECONDS
+                except OSError:
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, RECONNECT_MAX_SECONDS)
+                    continue
+            try:
+                line = await self.reader.readline()
+            except (ConnectionError, ValueError) as e:
+                logger.warning(f"Bus broker konekcija prekinuta: {e}")
+                line = b""
+            if not line:
+                logger.warning("Bus broker je zatvorio konekciju, ponovno povezivanje")
+                self.writer.close()
+                self.reader = self.writer = None
+                continue
+            try:
+                receiver(json.loads(line))
+            except ValueError:
+                continue
+
+    async def send(self, envelope: dict):
+        if self.writer is None:
+            raise ConnectionError("Bus broker nije povezan")
+        self.writer.write(json.dumps(envelope, ensure_ascii=False).encode("utf-8") + b"\n")
+        await self.writer.drain()
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+        if self.writer is not None:
+            self.writer.close()
+
+
+async def start_broker(host: str = "127.0.0.1", port: int = 7878) -> asyncio.AbstractServer:
+    """Minimalni broker: svaku primljenu liniju prosleđuje svim povezanim klijentima.
+
+    Svaki klijent ima ograničen red i svoj writer sa drain(); klijent čiji se red
+    napuni se isključuje, pa spor čitalac ne može neograničeno trošiti memoriju.
+    """
+    clients: Dict[asyncio.StreamWriter, asyncio.Queue] = {}
+
+    async def forward(writer: asyncio.StreamWriter, queue: asyncio.Queue):
+        try:
+            while True:
+                writer.write(await queue.get())
+                await writer.drain()
+        except ConnectionError:
+            pass
+
+    async def handle(reader, writer):
+        queue: asyncio.Queue = asyncio.Queue(maxsize=BROKER_CLIENT_QUEUE_SIZE)
+        clients[writer] = queue
+        forwarder = asyncio.create_task(forward(writer, queue))
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (ConnectionError, ValueError):
+                    break
+                if not line:
+                    break
+                for client, client_queue in list(clients.items()):
+                    try:
+                        client_queue.put_nowait(line)
+                    except asyncio.QueueFull:
+                        logger.warning("Bus broker: klijent ne stiže da čita, konekcija se prekida")
+                        del clients[client]
+                        client.transport.abort()
+        finally:
+            clients.pop(writer, None)
+            forwarder.cancel()
+            writer.close()
+
+    return await asyncio.start_server(handle, host, port)
+
+
+async def run_broker(host: str = "127.0.0.1", port: int = 7878):
+    server = await start_broker(host, port)
+    async with server:
+        await server.serve_forever()
+
+
+# ---- magistrala ----
+class Bus:
+    def __init__(self, transport=None):
+        self.transport = transport or InProcessTransport()
+        self.worker_id = uuid.uuid4().hex
+        self.handlers: Dict[str, List[Handler]] = defaultdict(list)
+        self.outbox: List[dict] = []
+        self.wakeup: Optional[asyncio.Event] = None
+        self.flush_task: Optional[asyncio.Task] = None
+        self.dropped = 0
+
+    def subscribe(self, channel: str, handler: Handler):
+        """Kanal je tačan naziv ili prefiks sa '*' na kraju (npr. "quiz.*")"""
+        self.handlers[channel].append(handler)
+
+    def unsubscribe(self, channel: str, handler: Handler):
+        if handler in self.handlers.get(channel, []):
+            self.handlers[channel].remove(handler)
+
+    def publish(self, channel: str, data: Any = None, local: bool = True):
+        """Fire-and-forget: ne radi I/O i ne čeka pretplatnike"""
+        event = {"channel": channel, "data": data}
+        if local:
+            self._dispatch_soon([event])
+        if self.flush_task is None:
+            return
+        self.outbox.append(event)
+        if len(self.outbox) > MAX_OUTBOX_SIZE:
+            del self.outbox[0]
+            self.dropped += 1
+        self.wakeup.set()
+
+    def _dispatch_soon(self, events: List[dict]):
+        try:
+            asyncio.get_running_loop().call_soon(self._dispatch, events)
+        except RuntimeError:
+            self._dispatch(events)
+
+    def _dispatch(self, events: List[dict]):
+        for event in events:
+            channel = event["channel"]
+            for pattern, handlers in list(self.handlers.items()):
+                if pattern == channel or (pattern.endswith("*") and channel.startswith(pattern[:-1])):
+                    for handler in list(handlers):
+                        try:
+                            result = handler(channel, event["data"])
+                            if asyncio.iscoroutine(result):
+                                asyncio.ensure_future(result)
+                        except Exception as e:
+                            logger.error(f"Bus handler za {channel} nije uspeo: {e}")
+
+    def _receive(self, envelope: dict):
+        # Sopstveni događaji su već isporučeni lokalno
+        if envelope.get("origin") == self.worker_id:
+            return
+        self._dispatch(envelope.get("events", []))
+
+    async def _flush_loop(self):
+        while True:
+            await self.wakeup.wait()
+            await asyncio.sleep(FLUSH_INTERVAL_SECONDS)
+            self.wakeup.clear()
+            while self.outbox:
+                batch, self.outbox = self.outbox[:MAX_BATCH_SIZE], self.outbox[MAX_BATCH_SIZE:]
+                try:
+                    await self.transport.send({"origin": self.worker_id, "events": batch})
+                except Exception as e:
+                    self.dropped += len(batch)
+                    logger.warning(f"Bus slanje nije uspelo, odbačeno {len(batch)} događaja: {e}")
+
+    async def start(self):
+        if self.flush_task is not None:
+            return
+        await self.transport.start(self._receive)
+        self.wakeup = asyncio.Event()
+        self.flush_task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        if self.flush_task is not None:
+            self.flush_task.cancel()
+            self.flush_task = None
+            if self.outbox:
+                batch, self.outbox = self.outbox, []
+                try:
+                    await self.transport.send({"origin": self.worker_id, "events": batch})
+                except Exception:
+                    pass
+        await self.transport.stop()
+
+
+def transport_from_env(db=None):
+    kind = os.getenv("BUS_TRANSPORT", "inprocess").lower()
+    if kind == "mongo":
+        if db is None:
+            from database import db as default_db
+            db = default_db
+        return MongoTransport(db)
+    if kind == "broker":
+        host, _, port = os.getenv("BUS_BROKER_ADDR", "127.0.0.1:7878").partition(":")
+        return BrokerTransport(host, int(port or 7878))
+    return InProcessTransport()
+
+
+bus = Bus(transport_from_env())
+
+
+if __name__ == "__main__":
+    import sys
+    if len(sys.argv) > 1 and sys.argv[1] == "broker":
+        host, _, port = (sys.argv[2] if len(sys.argv) > 2 else "127.0.0.1:7878").partition(":")
+        logging.basicConfig(level=logging.INFO)
+        logger.info(f"Bus broker sluša na {host}:{port or 7878}")
+        asyncio.run(run_broker(host, int(port or 7878)))
@@ -0,0 +1,59 @@
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from bus import bus
+
+# Mali TTL/LRU keševi u memoriji worker-a. Invalidacija ide preko magistrale,
+# pa izmena na jednom worker-u briše unos na svim ostalim.
+INVALIDATE_CHANNEL = "cache.invalidate"
+
+_MISSING = object()
+_caches: Dict[str, "TTLCache"] = {}
+
+
+class TTLCache:
+    def __init__(self, name: str, ttl_seconds: float, max_size: int = 1000):
+        self.name = name
+        self.ttl = ttl_seconds
+        self.max_size = max_size
+        self.entries: "OrderedDict[str, tuple]" = OrderedDict()
+        _caches[name] = self
+
+    def get(self, key: str, default: Any = None) -> Any:
+        entry = self.entries.get(key, _MISSING)
+        if entry is _MISSING:
+            return default
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self.entries[key]
+            return default
+        self.entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any):
+        self.entries[key] = (time.monotonic() + self.ttl, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def discard(self, key: Optional[str] = None):
+        """Lokalno brisanje; None briše ceo keš"""
+        if key is None:
+            self.entries.clear()
+        else:
+            self.entries.pop(key, None)
+
+    def invalidate(self, key: Optional[str] = None):
+        """Briše unos na svim worker-ima (lokalno odmah, ostali preko magistrale)"""
+        self.discard(key)
+        bus.publish(INVALIDATE_CHANNEL, {"cache": self.name, "key": key}, local=False)
+
+
+def _on_invalidate(channel: str, data: dict):
+    cache = _caches.get(data.get("cache"))
+    if cache is not None:
+        cache.discard(data.get("key"))
+
+
+bus.subscribe(INVALIDATE_CHANNEL, _on_invalidate)
@@ -0,0 +1,209 @@
+import asyncio
+import logging
+import os
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError
+
+from bus import bus
+from database import (
+    cleanup_jobs_collection, quiz_high_scores_collection, quiz_ratings_collection, quiz_stats_collection,
+    results_archive_collection, results_collection, results_monthly_collection, unique_players_collection,
+    users_collection
+)
+
+# Pozadinsko čišćenje posle brisanja kviza. Brisanje kviza samo upiše posao u
+# kolekciju cleanup_jobs; worker u pozadini premešta rezultate u results_archive
+# (ili ih briše) u malim paketima sa pauzom, pa briše mesečne zbirove, statistiku,
+# tabelu najboljih rezultata, skice igrača i ocene.
+# Posao je u bazi: preživljava restart, a lease sprečava da ga dva worker-a rade
+# istovremeno. Napredak se čita preko GET /api/admin/cleanup/jobs.
+BATCH_SIZE = 1000
+BATCH_PAUSE_SECONDS = 0.2
+PEAK_BATCH_SIZE = 200
+PEAK_BATCH_PAUSE_SECONDS = 2.0
+POLL_INTERVAL_SECONDS = 30
+LEASE_SECONDS = 120
+ARCHIVE_RESULTS = os.environ.get("CLEANUP_ARCHIVE_RESULTS", "1") != "0"
+# Vršni sati po UTC-u, "od-do" (17-23h po našem vremenu je 15-22 UTC)
+PEAK_HOURS_UTC = os.environ.get("CLEANUP_PEAK_HOURS", "15-22")
+
+logger = logging.getLogger(__name__)
+
+_worker_id = uuid.uuid4().hex[:12]
+_task: Optional[asyncio.Task] = None
+_wake: Optional[asyncio.Event] = None
+
+
+def parse_peak_hours(value: str) -> Tuple[int, int]:
+    try:
+        start, end = (int(part) for part in value.split("-"))
+    except ValueError:
+        raise ValueError(f"Neispravni vršni sati '{value}' (očekuje se npr. 15-22)")
+    return start % 24, end % 24
+
+
+def is_peak(moment: datetime, peak_hours: str = PEAK_HOURS_UTC) -> bool:
+    start, end = parse_peak_hours(peak_hours)
+    if start <= end:
+        return start <= moment.hour < end
+    return moment.hour >= start or moment.hour < end  # Opseg preko ponoći, npr. 22-2
+
+
+def throttle(moment: datetime, peak_hours: str = PEAK_HOURS_UTC) -> Tuple[int, float]:
+    """Veličina paketa i pauza posle njega - u vršnim satima manje opterećenje Mongo-a"""
+    if is_peak(moment, peak_hours):
+        return PEAK_BATCH_SIZE, PEAK_BATCH_PAUSE_SECONDS
+    return BATCH_SIZE, BATCH_PAUSE_SECONDS
+
+
+def new_job(quiz_id: str, category_id: Optional[str], requested_by: Optional[str]) -> dict:
+    return {
+        "id": str(uuid.uuid4()),
+        "quizId": quiz_id,
+        "categoryId": category_id,
+        "requestedBy": requested_by,
+        "status": "pending",
+        "archive": ARCHIVE_RESULTS,
+        "createdAt": datetime.utcnow(),
+        "startedAt": None,
+        "finishedAt": None,
+        "leaseUntil": None,
+        "progress": {"totalResults": None, "results": 0, "batches": 0},
+        "error": None,
+    }
+
+
+async def enqueue_quiz_cleanup(quiz: dict, requested_by: Optional[str] = None) -> dict:
+    job = new_job(quiz["id"], quiz.get("categoryId"), requested_by)
+    await cleanup_jobs_collection.insert_one(dict(job))
+    wake()
+    return job
+
+
+def wake():
+    if _wake is not None:
+        _wake.set()
+
+
+async def _claim_job() -> Optional[dict]:
+    now = datetime.utcnow()
+    return await cleanup_jobs_collection.find_one_and_update(
+        # Prekinut posao (worker pao usred rada) se preuzima kad istekne lease
+        {"status": {"$in": ["pending", "running"]},
+         "$or": [{"leaseUntil": None}, {"leaseUntil": {"$lt": now}}]},
+        {"$set": {"status": "running", "worker": _worker_id, "leaseUntil": now + timedelta(seconds=LEASE_SECONDS)}},
+        sort=[("createdAt", 1)], projection={"_id": 0}, return_document=ReturnDocument.AFTER
+    )
+
+
+async def _archive(docs: list):
+    try:
+        await results_archive_collection.insert_many(docs, ordered=False)
+    except BulkWriteError as e:
+        # Ponovljen paket posle prekida - dokumenti sa istim _id su već arhivirani
+        if any(err.get("code") != 11000 for err in e.details.get("writeErrors", [])):
+            raise
+
+
+async def run_job(job: dict) -> dict:
+    quiz_id = job["quizId"]
+    progress = job["progress"]
+    started = {"startedAt": job.get("startedAt") or datetime.utcnow()}
+    if progress.get("totalResults") is None:
+        started["progress.totalResults"] = progress["results"] + await results_collection.count_documents({"quizId": quiz_id})
+    await cleanup_jobs_collection.update_one({"id": job["id"]}, {"$set": started})
+
+    while True:
+        batch_size, pause = throttle(datetime.utcnow())
+        docs = await results_collection.find({"quizId": quiz_id}).limit(batch_size).to_list(batch_size)
+        if not docs:
+            break
+        if job.get("archive", True):
+            await _archive(docs)
+        await results_collection.delete_many({"_id": {"$in": [d["_id"] for d in docs]}})
+        await cleanup_jobs_collection.update_one({"id": job["id"]}, {
+            "$inc": {"progress.results": len(docs), "progress.batches": 1},
+            "$set": {"leaseUntil": datetime.utcnow() + timedelta(seconds=LEASE_SECONDS)},
+        })
+        await asyncio.sleep(pause)
+
+    # Mesečni zbirovi se ne arhiviraju: iz njih se obnavljaju histogrami (stats.py) i
+    # statistika korisnika (user_stats.py), pa bi obrisan kviz vratili u obe
+    await results_monthly_collection.delete_many({"quizId": quiz_id})
+    # Statistika pitanja i histogram rezultata su jedan dokument; skice igrača su po danu
+    await quiz_stats_collection.delete_one({"quizId": quiz_id})
+    await quiz_high_scores_collection.delete_one({"quizId": quiz_id})
+    # Poslednje igre u profilu (users.stats.recent) ne prikazuju obrisan kviz
+    await users_collection.update_many({"stats.recent.quizId": quiz_id}, {"$pull": {"stats.recent": {"quizId": quiz_id}}})
+    await unique_players_collection.delete_many({"quizId": quiz_id})
+    await quiz_ratings_collection.delete_many({"quizId": quiz_id})
+    return await cleanup_jobs_collection.find_one_and_update(
+        {"id": job["id"]},
+        {"$set": {"status": "done", "finishedAt": datetime.utcnow(), "leaseUntil": None}},
+        projection={"_id": 0}, return_document=ReturnDocument.AFTER
+    )
+
+
+async def run_pending() -> int:
+    """Obradi sve poslove koji čekaju; vraća broj završenih"""
+    finished = 0
+    while True:
+        job = await _claim_job()
+        if job is None:
+            return finished
+        try:
+            job = await run_job(job)
+        except Exception as e:
+            logger.exception(f"Čišćenje kviza {job['quizId']} nije uspelo")
+            await cleanup_jobs_collection.update_one(
+                {"id": job["id"]},
+                {"$set": {"status": "failed", "error": str(e), "leaseUntil": None, "finishedAt": datetime.utcnow()}}
+            )
+            continue
+        finished += 1
+        bus.publish("quiz.cleaned", {"quizId": job["quizId"], "results": job["progress"]["results"]})
+
+
+async def _worker_loop():
+    while True:
+        try:
+            await run_pending()
+        except Exception as e:
+            logger.warning(f"Worker za čišćenje: {e}")
+        try:
+            await asyncio.wait_for(_wake.wait(), POLL_INTERVAL_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+        _wake.clear()
+
+
+def start_worker():
+    global _task, _wake
+    if _task is None:
+        _wake = asyncio.Event()
+        _task = asyncio.create_task(_worker_loop())
+
+
+async def stop_worker():
+    global _task
+    if _task is not None:
+        _task.cancel()
+        try:
+            await _task
+        except asyncio.CancelledError:
+            pass
+        _task = None
+
+
+async def list_jobs(status: Optional[str] = None, limit: int = 50) -> list:
+    query = {"status": status} if status else {}
+    jobs = await cleanup_jobs_collection.find(query, {"_id": 0}).sort("createdAt", -1).to_list(limit)
+    for job in jobs:
+        for field in ("createdAt", "startedAt", "finishedAt", "leaseUntil"):
+            if isinstance(job.get(field), datetime):
+                job[field] = job[field].isoformat()
+    return jobs
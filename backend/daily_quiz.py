@@ -0,0 +1,186 @@
+import asyncio
+import json
+import logging
+import math
+import os
+import random
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from typing import List, Optional, Set, Tuple
+
+from pymongo.errors import DuplicateKeyError
+
+import leaderboards
+from bus import bus
+from ratings import PRIOR_MEAN, average
+from database import daily_quizzes_collection, quizzes_collection
+from models import QuizResponse
+from streaks import DEFAULT_TIMEZONE, zone
+
+# Kviz dana: bira se jednom dnevno u DAILY_QUIZ_TIME (lokalno vreme u
+# DEFAULT_TIMEZONE) i upisuje u daily_quizzes (jedinstven dan), pa svi worker-i
+# dobijaju isti izbor - prvi upisuje, ostali čitaju. Izbor je težinski slučajan
+# po broju igranja i oceni, sa seed-om od dana, bez kvizova iz poslednjih
+# NO_REPEAT_DAYS dana. Odgovor se serijalizuje jednom i početna strana ga
+# dobija iz memorije. Brisanje današnjeg kviza dana bira novi za isti dan, a
+# ostali worker-i na "quiz.deleted" zaboravljaju svoj izbor i čitaju ga iz baze.
+DAILY_QUIZ_TIME = os.environ.get("DAILY_QUIZ_TIME", "00:00")
+NO_REPEAT_DAYS = int(os.environ.get("DAILY_QUIZ_NO_REPEAT_DAYS", "30"))
+RETRY_SECONDS = 60
+CANDIDATE_FIELDS = {"_id": 0, "id": 1, "plays": 1, "ratingScore": 1}
+
+logger = logging.getLogger(__name__)
+
+_task: Optional[asyncio.Task] = None
+# {"day", "quizId", "body": bytes} za tekući dan izazova
+_current: Optional[dict] = None
+
+
+def parse_time(value: str) -> timedelta:
+    hours, minutes = value.split(":")
+    return timedelta(hours=int(hours), minutes=int(minutes))
+
+
+def _local(moment: datetime) -> datetime:
+    return moment.replace(tzinfo=dt_timezone.utc).astimezone(zone(DEFAULT_TIMEZONE))
+
+
+def challenge_day(moment: datetime, at: str = DAILY_QUIZ_TIME) -> str:
+    """Dan izazova za UTC vreme; novi dan počinje u `at` po lokalnom vremenu"""
+    return (_local(moment).replace(tzinfo=None) - parse_time(at)).date().isoformat()
+
+
+def seconds_until_next(moment: datetime, at: str = DAILY_QUIZ_TIME) -> float:
+    local = _local(moment)
+    boundary = datetime.combine(local.date(), datetime.min.time(), tzinfo=local.tzinfo) + parse_time(at)
+    if boundary <= local:
+        boundary = datetime.combine(local.date() + timedelta(days=1), datetime.min.time(),
+                                    tzinfo=local.tzinfo) + parse_time(at)
+    # Razlika u UTC-u, zbog letnjeg računanja vremena
+    return (boundary.astimezone(dt_timezone.utc) - local.astimezone(dt_timezone.utc)).total_seconds()
+
+
+def selection_weight(quiz: dict) -> float:
+    # Neocenjen kviz dobija neutralnu ocenu, kao u ratings.PRIOR_MEAN
+    return (1 + math.log1p(quiz.get("plays", 0))) * quiz.get("ratingScore", PRIOR_MEAN)
+
+
+def pick_quiz(candidates: List[dict], recent_ids: Set[str], day: str) -> Optional[dict]:
+    """Isti dan uvek daje isti izbor; ako su svi kvizovi skoro bili, bira se iz svih"""
+    pool = [q for q in candidates if q["id"] not in recent_ids] or candidates
+    if not pool:
+        return None
+    pool = sorted(pool, key=lambda q: q["id"])
+    return random.Random(day).choices(pool, weights=[selection_weight(q) for q in pool])[0]
+
+
+def quiz_payload(day: str, quiz: dict) -> dict:
+    return {
+        "day": day,
+        "quiz": QuizResponse(
+            id=quiz["id"], title=quiz["title"], description=quiz["description"],
+            categoryId=quiz["categoryId"], questionCount=quiz["questionCount"],
+            timeLimit=quiz.get("timeLimit", 0), plays=quiz.get("plays", 0),
+            rating=average(quiz), ratingCount=quiz.get("ratingCount", 0),
+            createdBy=quiz.get("createdBy", "Anonimno")
+        ).dict(),
+    }
+
+
+async def _select(day: str) -> Optional[dict]:
+    since = (date.fromisoformat(day) - timedelta(days=NO_REPEAT_DAYS)).isoformat()
+    recent_ids = {d["quizId"] async for d in daily_quizzes_collection.find(
+        {"day": {"$gte": since, "$lt": day}}, {"_id": 0, "quizId": 1}
+    )}
+    candidates = await quizzes_collection.find({"questionCount": {"$gt": 0}}, CANDIDATE_FIELDS).to_list(None)
+    picked = pick_quiz(candidates, recent_ids, day)
+    if picked is None:
+        return None
+    return await quizzes_collection.find_one({"id": picked["id"]}, {"_id": 0, "questions": 0})
+
+
+async def pin(day: str) -> Optional[dict]:
+    """Kviz dana za `day`; bira ga samo prvi worker, ostali čitaju upisan izbor"""
+    global _current
+    doc = await daily_quizzes_collection.find_one({"day": day}, {"_id": 0})
+    if doc is None:
+        quiz = await _select(day)
+        if quiz is None:
+            return None
+        doc = {"day": day, "quizId": quiz["id"], "payload": quiz_payload(day, quiz), "pinnedAt": datetime.utcnow()}
+        try:
+            await daily_quizzes_collection.insert_one(dict(doc))
+            logger.info(f"Kviz dana {day}: {quiz['id']}")
+        except DuplicateKeyError:
+            doc = await daily_quizzes_collection.find_one({"day": day}, {"_id": 0})
+    _current = {
+        "day": day, "quizId": doc["quizId"],
+        "body": json.dumps(doc["payload"], ensure_ascii=False).encode("utf-8"),
+    }
+    return _current
+
+
+async def current(moment: Optional[datetime] = None) -> Optional[dict]:
+    """Iz memorije; baza se čita samo ako raspoređivač još nije izabrao današnji kviz"""
+    day = challenge_day(moment or datetime.utcnow())
+    if _current is not None and _current["day"] == day:
+        return _current
+    return await pin(day)
+
+
+async def record_scores(quiz_id: str, scores: List[Tuple[str, int]], moment: Optional[datetime] = None):
+    """Predaja kviza dana ide i na dnevnu listu; ostale predaje ne rade ništa"""
+    moment = moment or datetime.utcnow()
+    if _current is None or _current["quizId"] != quiz_id or _current["day"] != challenge_day(moment):
+        return
+    await leaderboards.record_daily_quiz_scores(_current["day"], scores, moment)
+
+
+async def replace_deleted(quiz_id: str, moment: Optional[datetime] = None) -> Optional[dict]:
+    """Obrisan današnji kviz dana se menja novim izborom; ostali obrisani kvizovi ne rade ništa"""
+    global _current
+    day = challenge_day(moment or datetime.utcnow())
+    result = await daily_quizzes_collection.delete_one({"day": day, "quizId": quiz_id})
+    if result.deleted_count == 0:
+        return None
+    _current = None
+    await leaderboards.clear_daily_quiz(day)
+    return await pin(day)
+
+
+def _on_quiz_deleted(channel: str, data: dict):
+    global _current
+    if _current is not None and _current["quizId"] == data.get("quizId"):
+        _current = None
+
+
+bus.subscribe("quiz.deleted", _on_quiz_deleted)
+
+
+# ---- raspoređivač ----
+async def _scheduler_loop():
+    while True:
+        try:
+            pinned = await pin(challenge_day(datetime.utcnow()))
+            # Bez ijednog kviza pokušava ponovo uskoro, inače na granici sledećeg dana
+            delay = seconds_until_next(datetime.utcnow()) + 1 if pinned else RETRY_SECONDS
+        except Exception as e:
+            logger.warning(f"Izbor kviza dana nije uspeo: {e}")
+            delay = RETRY_SECONDS
+        await asyncio.sleep(delay)
+
+
+def start_scheduler():
+    global _task
+    if _task is None:
+        _task = asyncio.create_task(_scheduler_loop())
+
+
+async def stop_scheduler():
+    global _task
+    if _task is not None:
+        _task.cancel()
+        try:
+            await _task
+        except asyncio.CancelledError:
+            pass
+        _task = None
@@ -17,6 +17,16 @@ users_collection = db.users
 categories_collection = db.categories
 quizzes_collection = db.quizzes
 results_collection = db.results
+quiz_stats_collection = db.quiz_stats
+unique_players_collection = db.unique_players
+cleanup_jobs_collection = db.cleanup_jobs
+results_archive_collection = db.results_archive
+results_monthly_collection = db.results_monthly
+leaderboard_buckets_collection = db.leaderboard_buckets
+category_scores_collection = db.category_scores
+quiz_high_scores_collection = db.quiz_high_scores
+daily_quizzes_collection = db.daily_quizzes
+quiz_ratings_collection = db.quiz_ratings
 
 async def init_categories():
     """Inicijalizuj kategorije ako ne postoje"""
@@ -35,5 +45,34 @@ async def init_categories():
         await categories_collection.insert_many(categories)
         print("✅ Kategorije inicijalizovane")
 
+async def init_indexes():
+    """Kreiraj indekse potrebne za upite (idempotentno)"""
+    await users_collection.create_index([("totalScore", -1)])
+    await users_collection.create_index([("totalScore", -1), ("id", 1)])
+    await users_collection.create_index("stats.recent.quizId")
+    await quizzes_collection.create_index("id")
+    await quizzes_collection.create_index([("trending", -1), ("id", 1)])
+    await quizzes_collection.create_index([("categoryId", 1), ("trending", -1), ("id", 1)])
+    await quizzes_collection.create_index([("ratingScore", -1), ("id", 1)])
+    await results_collection.create_index([("quizId", 1), ("quizVersion", 1)])
+    await results_collection.create_index([("userId", 1), ("completedAt", -1)])
+    await results_collection.create_index("completedAt")
+    await results_collection.create_index("rollupBatch", sparse=True)
+    await quiz_stats_collection.create_index("quizId", unique=True)
+    await unique_players_collection.create_index([("quizId", 1), ("day", 1)], unique=True)
+    await cleanup_jobs_collection.create_index([("status", 1), ("createdAt", 1)])
+    await results_archive_collection.create_index("quizId")
+    await results_monthly_collection.create_index([("userId", 1), ("quizId", 1), ("month", 1)], unique=True)
+    await results_monthly_collection.create_index([("userId", 1), ("lastCompletedAt", -1)])
+    await results_monthly_collection.create_index([("quizId", 1), ("month", 1)])
+    await leaderboard_buckets_collection.create_index([("window", 1), ("period", 1), ("userId", 1)], unique=True)
+    await leaderboard_buckets_collection.create_index([("window", 1), ("period", 1), ("score", -1), ("userId", 1)])
+    await leaderboard_buckets_collection.create_index("expiresAt", expireAfterSeconds=0)
+    await category_scores_collection.create_index([("userId", 1), ("categoryId", 1)], unique=True)
+    await category_scores_collection.create_index([("categoryId", 1), ("score", -1), ("userId", 1)])
+    await quiz_high_scores_collection.create_index("quizId", unique=True)
+    await daily_quizzes_collection.create_index("day", unique=True)
+    await quiz_ratings_collection.create_index([("quizId", 1), ("userId", 1)], unique=True)
+
 async def close_db_connection():
     client.close()
\ No newline at end of file
@@ -0,0 +1,137 @@
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from typing import AsyncIterator, Dict, Iterable, List, Optional
+
+from cache import TTLCache
+from database import quizzes_collection, results_collection
+
+# Izvoz rezultata za izveštaje. Rezultati se čitaju kursorom u paketima i odmah
+# šalju klijentu, pa memorija ne zavisi od broja redova; gzip se radi usput.
+CURSOR_BATCH_SIZE = 2000
+FORMATS = ("ndjson", "csv")
+COLUMNS = [
+    "id", "userId", "quizId", "quizTitle", "score", "correctCount", "totalQuestions",
+    "passed", "points", "quizVersion", "completedAt",
+]
+RESULT_PROJECTION = {"_id": 0, "correctBits": 0, "answers": 0}
+
+# Naslov kviza po id-ju; deli se između izvoza, briše se pri izmeni kviza
+quiz_title_cache = TTLCache("quiz_title", ttl_seconds=300, max_size=20000)
+
+
+class ExportError(ValueError):
+    pass
+
+
+def parse_date(value: Optional[str], name: str) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise ExportError(f"Neispravan datum za '{name}' (očekuje se ISO format, npr. 2025-01-31)")
+
+
+async def build_filter(quiz_id: Optional[str] = None, category_id: Optional[str] = None,
+                       user_id: Optional[str] = None, date_from: Optional[datetime] = None,
+                       date_to: Optional[datetime] = None) -> dict:
+    query: dict = {}
+    if quiz_id:
+        query["quizId"] = quiz_id
+    if category_id:
+        # Rezultat nema kategoriju - filtrira se po kvizovima te kategorije
+        quiz_ids = await quizzes_collection.distinct("id", {"categoryId": category_id})
+        query["quizId"] = {"$in": [q for q in quiz_ids if not quiz_id or q == quiz_id]}
+    if user_id:
+        query["userId"] = user_id
+    if date_from or date_to:
+        query["completedAt"] = {}
+        if date_from:
+            query["completedAt"]["$gte"] = date_from
+        if date_to:
+            query["completedAt"]["$lt"] = date_to
+    return query
+
+
+async def _quiz_titles(quiz_ids: Iterable[str]) -> Dict[str, str]:
+    titles = {}
+    missing = []
+    for quiz_id in set(quiz_ids):
+        title = quiz_title_cache.get(quiz_id)
+        if title is None:
+            missing.append(quiz_id)
+        else:
+            titles[quiz_id] = title
+    if missing:
+        async for quiz in quizzes_collection.find({"id": {"$in": missing}}, {"_id": 0, "id": 1, "title": 1}):
+            titles[quiz["id"]] = quiz.get("title", "")
+        # Obrisani kvizovi se keširaju kao prazan naslov da se ne traže u svakom paketu
+        for quiz_id in missing:
+            quiz_title_cache.set(quiz_id, titles.setdefault(quiz_id, ""))
+    return titles
+
+
+def export_row(result: dict, titles: Dict[str, str]) -> dict:
+    completed_at = result.get("completedAt")
+    return {
+        "id": result.get("id"),
+        "userId": result.get("userId"),
+        "quizId": result.get("quizId"),
+        "quizTitle": titles.get(result.get("quizId"), ""),
+        "score": result.get("score"),
+        "correctCount": result.get("correctCount"),
+        "totalQuestions": result.get("totalQuestions"),
+        "passed": result.get("passed"),
+        "points": result.get("points"),
+        "quizVersion": result.get("quizVersion", 1),
+        "completedAt": completed_at.isoformat() if isinstance(completed_at, datetime) else completed_at,
+    }
+
+
+def format_ndjson(rows: List[dict]) -> str:
+    return "".join(json.dumps(row, ensure_ascii=False) + "\n" for row in rows)
+
+
+def format_csv(rows: List[dict], header: bool = False) -> str:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=COLUMNS, extrasaction="ignore")
+    if header:
+        writer.writeheader()
+    writer.writerows(rows)
+    return buffer.getvalue()
+
+
+async def _result_batches(query: dict) -> AsyncIterator[List[dict]]:
+    cursor = results_collection.find(query, RESULT_PROJECTION).batch_size(CURSOR_BATCH_SIZE)
+    batch = []
+    async for result in cursor:
+        batch.append(result)
+        if len(batch) >= CURSOR_BATCH_SIZE:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def stream_results(query: dict, fmt: str, gzip: bool = False) -> AsyncIterator[bytes]:
+    """Delovi izvoza; u memoriji je najviše jedan paket kursora"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if gzip else None  # wbits=31 je gzip format
+
+    def encode(text: str) -> bytes:
+        data = text.encode("utf-8")
+        return compressor.compress(data) if compressor else data
+
+    if fmt == "csv":
+        # BOM da bi Excel ispravno prikazao č, ć, š...
+        yield encode("\ufeff" + format_csv([], header=True))
+    async for batch in _result_batches(query):
+        titles = await _quiz_titles(r.get("quizId") for r in batch)
+        rows = [export_row(r, titles) for r in batch]
+        chunk = encode(format_csv(rows) if fmt == "csv" else format_ndjson(rows))
+        if chunk:
+            yield chunk
+    if compressor:
+        yield compressor.flush()
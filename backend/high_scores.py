@@ -0,0 +1,114 @@
+import logging
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from pymongo.errors import DuplicateKeyError
+
+from cache import TTLCache
+from database import quiz_high_scores_collection, users_collection
+
+# Tabela najboljih rezultata po kvizu: jedan mali dokument po kvizu sa najviše
+# TOP_K unosa (najbolji rezultat svakog korisnika; pri istom rezultatu je ispred
+# onaj ko ga je ranije postigao). Predaja piše u bazu samo ako rezultat ulazi u
+# tabelu, a provera se radi nad kešom. Upis je optimistički CAS na `rev`.
+TOP_K = 10
+MAX_MERGE_RETRIES = 5
+
+logger = logging.getLogger(__name__)
+
+high_score_cache = TTLCache("quiz_high_scores", ttl_seconds=300, max_size=500)
+
+
+def sort_key(entry: dict):
+    return -entry["score"], entry["completedAt"]
+
+
+def qualifies(entries: List[dict], user_id: str, score: int, k: Optional[int] = None) -> bool:
+    k = k or TOP_K
+    for entry in entries:
+        if entry["userId"] == user_id:
+            return score > entry["score"]
+    if len(entries) < k:
+        return True
+    # Isti rezultat kao poslednji u punoj tabeli ne ulazi - raniji ima prednost
+    return score > min(entry["score"] for entry in entries)
+
+
+def merge_entries(entries: List[dict], candidates: List[dict], k: Optional[int] = None) -> List[dict]:
+    """Najbolji rezultat po korisniku, sortirano po rezultatu pa vremenu, najviše k"""
+    k = k or TOP_K
+    best = {entry["userId"]: entry for entry in entries}
+    for candidate in candidates:
+        current = best.get(candidate["userId"])
+        if current is None or sort_key(candidate) < sort_key(current):
+            best[candidate["userId"]] = candidate
+    return sorted(best.values(), key=sort_key)[:k]
+
+
+async def get_table(quiz_id: str) -> List[dict]:
+    entries = high_score_cache.get(quiz_id)
+    if entries is None:
+        doc = await quiz_high_scores_collection.find_one({"quizId": quiz_id}, {"_id": 0, "entries": 1})
+        entries = doc["entries"] if doc else []
+        high_score_cache.set(quiz_id, entries)
+    return entries
+
+
+async def _merge_into_db(quiz_id: str, candidates: List[dict]) -> List[dict]:
+    for _ in range(MAX_MERGE_RETRIES):
+        doc = await quiz_high_scores_collection.find_one({"quizId": quiz_id}, {"_id": 0, "entries": 1, "rev": 1})
+        if doc is None:
+            entries = merge_entries([], candidates)
+            try:
+                await quiz_high_scores_collection.insert_one({"quizId": quiz_id, "entries": entries, "rev": 1})
+                return entries
+            except DuplicateKeyError:
+                continue
+
+        entries = merge_entries(doc["entries"], candidates)
+        if entries == doc["entries"]:
+            return entries
+        result = await quiz_high_scores_collection.update_one(
+            {"quizId": quiz_id, "rev": doc["rev"]},
+            {"$set": {"entries": entries}, "$inc": {"rev": 1}}
+        )
+        if result.modified_count:
+            return entries
+    raise RuntimeError(f"Upis najboljih rezultata nije uspeo za {quiz_id}")
+
+
+async def record_scores(quiz_id: str, scores: List[Tuple[str, int]], moment: Optional[datetime] = None):
+    """Upisuje samo rezultate koji ulaze u tabelu; većina predaja ne radi nijedan upis"""
+    entries = await get_table(quiz_id)
+    qualifying = [(user_id, score) for user_id, score in scores if qualifies(entries, user_id, score)]
+    if not qualifying:
+        return
+    moment = moment or datetime.utcnow()
+    # Mongo čuva milisekunde; keš mora imati isto vreme kao baza zbog poretka
+    moment = moment.replace(microsecond=moment.microsecond // 1000 * 1000)
+    names = {
+        u["id"]: u["username"] async for u in users_collection.find(
+            {"id": {"$in": [user_id for user_id, _ in qualifying]}}, {"_id": 0, "id": 1, "username": 1}
+        )
+    }
+    candidates = [
+        {"userId": user_id, "username": names.get(user_id, ""), "score": score, "completedAt": moment}
+        for user_id, score in qualifying
+    ]
+    try:
+        entries = await _merge_into_db(quiz_id, candidates)
+    except RuntimeError as e:
+        logger.warning(str(e))
+        return
+    high_score_cache.invalidate(quiz_id)
+    high_score_cache.set(quiz_id, entries)
+
+
+def table_response(quiz_id: str, entries: List[dict]) -> dict:
+    return {
+        "quizId": quiz_id,
+        "entries": [{
+            "rank": rank, "userId": e["userId"], "username": e["username"], "score": e["score"],
+            "completedAt": e["completedAt"].isoformat(),
+        } for rank, e in enumerate(entries, start=1)],
+    }
@@ -0,0 +1,180 @@
+import asyncio
+import json
+import logging
+import uuid
+from collections import deque
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+# Tabela uživo preko Server-Sent Events. Jedan hub po worker-u drži poslednji
+# top-N i šalje samo promene (delta). Posle predaje rezultata hub najviše jednom
+# u UPDATE_INTERVAL_SECONDS čita top-N iz baze, bez obzira na broj pretplatnika;
+# neaktivni pretplatnici samo čekaju na asyncio.Event i ne troše CPU.
+TOP_N = 50
+UPDATE_INTERVAL_SECONDS = 1.0
+HEARTBEAT_SECONDS = 15.0
+DELTA_HISTORY_SIZE = 256  # Koliko delti se pamti za nastavak preko Last-Event-ID
+RETRY_MILLISECONDS = 3000
+
+logger = logging.getLogger(__name__)
+
+FetchTop = Callable[[int], Awaitable[List[dict]]]
+
+
+def rank_entries(users: List[dict]) -> Dict[str, dict]:
+    """id -> stavka sa rangom (1 = prvi)"""
+    return {u["id"]: dict(u, rank=rank) for rank, u in enumerate(users, start=1)}
+
+
+def diff_rankings(old: Dict[str, dict], new: Dict[str, dict]) -> dict:
+    """Stavke kojima se promenio rang ili poeni, i id-jevi koji su ispali iz top-N"""
+    changed = [entry for user_id, entry in new.items() if old.get(user_id) != entry]
+    removed = [user_id for user_id in old if user_id not in new]
+    return {"changed": changed, "removed": removed}
+
+
+def merge_deltas(deltas: List[dict]) -> dict:
+    """Više uzastopnih delti u jednu (za spore pretplatnike i nastavak posle prekida)"""
+    changed: Dict[str, dict] = {}
+    removed = set()
+    for delta in deltas:
+        for entry in delta["changed"]:
+            changed[entry["id"]] = entry
+            removed.discard(entry["id"])
+        for user_id in delta["removed"]:
+            changed.pop(user_id, None)
+            removed.add(user_id)
+    return {"changed": sorted(changed.values(), key=lambda e: e["rank"]), "removed": sorted(removed)}
+
+
+def format_event(event_id: Optional[str], event: str, data: dict) -> str:
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, ensure_ascii=False, separators=(',', ':'))}")
+    return "\n".join(lines) + "\n\n"
+
+
+class LeaderboardHub:
+    def __init__(self, fetch_top: FetchTop, top_n: int = TOP_N, interval: float = UPDATE_INTERVAL_SECONDS):
+        self.fetch_top = fetch_top
+        self.top_n = top_n
+        self.interval = interval
+        # Id događaja je "<epoha>-<broj>"; posle restarta ili na drugom worker-u epoha se
+        # razlikuje, pa klijent dobija ceo snimak umesto delte
+        self.epoch = uuid.uuid4().hex[:8]
+        self.seq = 0
+        self.entries: Optional[Dict[str, dict]] = None
+        self.history: "deque[Tuple[int, dict]]" = deque(maxlen=DELTA_HISTORY_SIZE)
+        self.changed = asyncio.Event()
+        self.dirty = asyncio.Event()
+        self.subscribers = 0
+        self.task: Optional[asyncio.Task] = None
+
+    @property
+    def event_id(self) -> str:
+        return f"{self.epoch}-{self.seq}"
+
+    def mark_dirty(self):
+        self.dirty.set()
+
+    def on_results(self, channel: str, data: dict):
+        # Gosti ne menjaju tabelu korisnika
+        if any(r.get("userId") for r in data.get("results", [])):
+            self.mark_dirty()
+
+    def _notify(self):
+        # Novi Event za sledeću rundu; čekaoci na starom se bude jednom
+        previous, self.changed = self.changed, asyncio.Event()
+        previous.set()
+
+    async def refresh(self):
+        new = rank_entries(await self.fetch_top(self.top_n))
+        if self.entries is None:
+            self.entries = new
+            return
+        delta = diff_rankings(self.entries, new)
+        self.entries = new
+        if delta["changed"] or delta["removed"]:
+            self.seq += 1
+            self.history.append((self.seq, delta))
+            self._notify()
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self.dirty.wait(), timeout=HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                # Heartbeat drži proxy konekcije otvorenim
+                self._notify()
+                continue
+            self.dirty.clear()
+            if not self.subscribers:
+                # Niko ne sluša - snimak se odbacuje i učitava pri sledećoj pretplati
+                self.entries = None
+                self.epoch = uuid.uuid4().hex[:8]
+                self.history.clear()
+                continue
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.warning(f"Osvežavanje tabele uživo nije uspelo: {e}")
+            # Sve predaje u narednom intervalu se spajaju u jedno osvežavanje
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self.task is None:
+            self.task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    def deltas_since(self, last_event_id: Optional[str]) -> Optional[List[dict]]:
+        """Delte posle datog id-ja, ili None ako nastavak nije moguć (treba snimak)"""
+        if not last_event_id:
+            return None
+        epoch, _, seq = last_event_id.partition("-")
+        if epoch != self.epoch or not seq.isdigit():
+            return None
+        seq = int(seq)
+        if seq > self.seq:
+            return None
+        if seq == self.seq:
+            return []
+        if not self.history or self.history[0][0] > seq + 1:
+            return None
+        return [delta for s, delta in self.history if s > seq]
+
+    def snapshot(self) -> dict:
+        return {"entries": sorted(self.entries.values(), key=lambda e: e["rank"])}
+
+    async def stream(self, last_event_id: Optional[str] = None) -> AsyncIterator[str]:
+        self.start()
+        if self.entries is None:
+            await self.refresh()
+        self.subscribers += 1
+        try:
+            deltas = self.deltas_since(last_event_id)
+            sent = self.seq
+            yield f"retry: {RETRY_MILLISECONDS}\n\n"
+            if deltas is None:
+                yield format_event(self.event_id, "snapshot", self.snapshot())
+            elif deltas:
+                yield format_event(self.event_id, "delta", merge_deltas(deltas))
+            while True:
+                if self.seq == sent:
+                    await self.changed.wait()
+                    if self.seq == sent:
+                        yield ": ping\n\n"
+                        continue
+                # Ako je pretplatnik zaostao, sve propuštene delte idu kao jedan događaj
+                deltas = self.deltas_since(f"{self.epoch}-{sent}")
+                sent = self.seq
+                if deltas is None:
+                    yield format_event(self.event_id, "snapshot", self.snapshot())
+                else:
+                    yield format_event(self.event_id, "delta", merge_deltas(deltas))
+        finally:
+            self.subscribers -= 1
@@ -0,0 +1,284 @@
+import asyncio
+from bisect import bisect_right
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from pymongo import UpdateOne
+
+from cache import TTLCache
+from database import category_scores_collection, leaderboard_buckets_collection, users_collection
+
+# Rang liste po periodu (dan, nedelja, mesec). Svaka predaja uvećava jedan
+# dokument po korisniku i periodu (leaderboard_buckets); stari periodi ističu
+# preko TTL indeksa na expiresAt. Vrh liste se čita iz indeksa
+# (window, period, score) i drži u kešu kratko, pa zahtev nikad ne agregira
+# rezultate. "all" je ukupni totalScore korisnika.
+#
+# Rang "oko mene" koristi indeks (totalScore, id): rang je broj korisnika ispred
+# u tom poretku, a susedi su dva kratka opsega indeksa. Brojanje prolazi kroz
+# onoliko ključeva indeksa koliki je rang, pa je tačno samo do RANK_EXACT_LIMIT.
+# Dublje se rang računa od prečki: (totalScore, id) korisnika na rangu
+# RANK_STEP, 2·RANK_STEP, ... Prečke se prave lenjo, do najdubljeg traženog
+# ranga, skokom od RANK_STEP ključeva po indeksu, i žive RANK_LADDER_TTL sekundi;
+# rang je rang prečke + broj korisnika između nje i korisnika. Dok prečke žive,
+# dubok rang može odstupati za promene u tom vremenu.
+#
+# Rang liste po kategoriji rade isto: jedan dokument po korisniku i kategoriji
+# (category_scores) sa zbirom i brojem igara, indeks (categoryId, score).
+#
+# Kviz dana ima svoju dnevnu listu u leaderboard_buckets (window "daily_quiz",
+# period je dan izazova): najbolji rezultat korisnika, ne zbir.
+WINDOWS = ("day", "week", "month", "all")
+DAILY_QUIZ_WINDOW = "daily_quiz"
+TOP_N = 100
+EXPIRY_GRACE = timedelta(days=1)
+# Majstor kategorije: dovoljno igara i visok prosek u toj kategoriji
+MASTERY_MIN_PLAYS = 5
+MASTERY_MIN_AVERAGE = 80
+
+RANK_EXACT_LIMIT = 1000
+RANK_STEP = 1000
+RANK_LADDER_TTL = 300
+
+# (window, period) -> vrh liste; kratak TTL umesto brisanja pri svakoj predaji
+window_cache = TTLCache("leaderboard_window", ttl_seconds=10, max_size=16)
+# "all" -> lista prečki; dopunjuje se na mestu, pa dopuna ne produžava TTL
+rank_ladder_cache = TTLCache("rank_ladder", ttl_seconds=RANK_LADDER_TTL, max_size=1)
+_ladder_lock = asyncio.Lock()
+
+
+def period_key(window: str, moment: datetime) -> str:
+    if window == "day":
+        return moment.strftime("%Y-%m-%d")
+    if window == "week":
+        year, week, _ = moment.isocalendar()
+        return f"{year}-W{week:02d}"
+    if window == "month":
+        return moment.strftime("%Y-%m")
+    raise ValueError(f"Nepoznat period '{window}'")
+
+
+def period_end(window: str, moment: datetime) -> datetime:
+    start = datetime(moment.year, moment.month, moment.day)
+    if window == "day":
+        return start + timedelta(days=1)
+    if window == "week":
+        return start + timedelta(days=7 - start.weekday())
+    if window == "month":
+        return datetime(moment.year + moment.month // 12, moment.month % 12 + 1, 1)
+    raise ValueError(f"Nepoznat period '{window}'")
+
+
+def _totals(scores: Iterable[Tuple[str, int]]) -> Dict[str, Tuple[int, int]]:
+    """userId -> (zbir, broj igara); više predaja istog korisnika (soba) se sabira"""
+    totals: Dict[str, Tuple[int, int]] = {}
+    for user_id, score in scores:
+        total, plays = totals.get(user_id, (0, 0))
+        totals[user_id] = (total + score, plays + 1)
+    return totals
+
+
+def bucket_updates(scores: Iterable[Tuple[str, int]], moment: datetime) -> List[UpdateOne]:
+    """Jedan $inc upsert po korisniku i periodu"""
+    totals = _totals(scores)
+    ops = []
+    for window in WINDOWS[:-1]:
+        period = period_key(window, moment)
+        expires_at = period_end(window, moment) + EXPIRY_GRACE
+        for user_id, (total, plays) in totals.items():
+            ops.append(UpdateOne(
+                {"window": window, "period": period, "userId": user_id},
+                {"$inc": {"score": total, "plays": plays}, "$setOnInsert": {"expiresAt": expires_at}},
+                upsert=True
+            ))
+    return ops
+
+
+async def record_scores(scores: List[Tuple[str, int]], moment: Optional[datetime] = None):
+    if scores:
+        await leaderboard_buckets_collection.bulk_write(
+            bucket_updates(scores, moment or datetime.utcnow()), ordered=False
+        )
+
+
+async def _with_users(rows: List[dict]) -> List[dict]:
+    """Redovi {userId, score, plays} u oblik LeaderboardEntry; jedan $in upit za imena"""
+    users = {
+        u["id"]: u async for u in users_collection.find(
+            {"id": {"$in": [r["userId"] for r in rows]}}, {"_id": 0, "id": 1, "username": 1, "avatar": 1}
+        )
+    }
+    return [{
+        "id": r["userId"], "username": users[r["userId"]]["username"], "score": r["score"],
+        "quizzesCompleted": r["plays"], "avatar": users[r["userId"]].get("avatar", "👤"),
+    } for r in rows if r["userId"] in users]
+
+
+async def _window_top(window: str, period: str) -> List[dict]:
+    buckets = await leaderboard_buckets_collection.find(
+        {"window": window, "period": period}, {"_id": 0, "userId": 1, "score": 1, "plays": 1}
+    ).sort([("score", -1), ("userId", 1)]).limit(TOP_N).to_list(TOP_N)
+    return await _with_users(buckets)
+
+
+async def get_top(window: str, limit: int, fetch_all_time: Callable[[int], Awaitable[List[dict]]]) -> List[dict]:
+    if window not in WINDOWS:
+        raise ValueError("Period mora biti day, week, month ili all")
+    if window == "all":
+        return await fetch_all_time(limit)
+    period = period_key(window, datetime.utcnow())
+    key = f"{window}:{period}"
+    top = window_cache.get(key)
+    if top is None:
+        top = await _window_top(window, period)
+        window_cache.set(key, top)
+    return top[:limit]
+
+
+# ---- kviz dana ----
+def daily_quiz_updates(day: str, scores: Iterable[Tuple[str, int]], expires_at: datetime) -> List[UpdateOne]:
+    best: Dict[str, int] = {}
+    plays: Dict[str, int] = {}
+    for user_id, score in scores:
+        best[user_id] = max(best.get(user_id, 0), score)
+        plays[user_id] = plays.get(user_id, 0) + 1
+    return [
+        UpdateOne(
+            {"window": DAILY_QUIZ_WINDOW, "period": day, "userId": user_id},
+            {"$max": {"score": score}, "$inc": {"plays": plays[user_id]}, "$setOnInsert": {"expiresAt": expires_at}},
+            upsert=True
+        )
+        for user_id, score in best.items()
+    ]
+
+
+async def record_daily_quiz_scores(day: str, scores: List[Tuple[str, int]], moment: Optional[datetime] = None):
+    if scores:
+        expires_at = (moment or datetime.utcnow()) + timedelta(days=1) + EXPIRY_GRACE
+        await leaderboard_buckets_collection.bulk_write(daily_quiz_updates(day, scores, expires_at), ordered=False)
+
+
+async def clear_daily_quiz(day: str):
+    """Dnevna lista iz početka - kviz dana je zamenjen drugim"""
+    await leaderboard_buckets_collection.delete_many({"window": DAILY_QUIZ_WINDOW, "period": day})
+    window_cache.invalidate(f"{DAILY_QUIZ_WINDOW}:{day}")
+
+
+async def daily_quiz_top(day: str, limit: int) -> List[dict]:
+    key = f"{DAILY_QUIZ_WINDOW}:{day}"
+    top = window_cache.get(key)
+    if top is None:
+        top = await _window_top(DAILY_QUIZ_WINDOW, day)
+        window_cache.set(key, top)
+    return top[:limit]
+
+
+# ---- oko mene ----
+USER_ENTRY_FIELDS = {"_id": 0, "id": 1, "username": 1, "totalScore": 1, "quizzesCompleted": 1, "avatar": 1}
+
+
+def _ahead_of(user: dict) -> dict:
+    """Korisnici ispred u poretku (totalScore opadajuće, id rastuće)"""
+    score = user.get("totalScore", 0)
+    return {"$or": [{"totalScore": {"$gt": score}}, {"totalScore": score, "id": {"$lt": user["id"]}}]}
+
+
+def _behind(user: dict) -> dict:
+    score = user.get("totalScore", 0)
+    return {"$or": [{"totalScore": {"$lt": score}}, {"totalScore": score, "id": {"$gt": user["id"]}}]}
+
+
+def user_entry(user: dict, rank: int) -> dict:
+    return {
+        "id": user["id"], "username": user["username"], "score": user.get("totalScore", 0),
+        "quizzesCompleted": user.get("quizzesCompleted", 0), "avatar": user.get("avatar", "👤"), "rank": rank,
+    }
+
+
+def _order_key(user: dict) -> Tuple[int, str]:
+    return -(user.get("totalScore") or 0), user["id"]
+
+
+def ladder_rank(ladder: List[dict], user: dict) -> Optional[Tuple[int, dict]]:
+    """Poslednja prečka koja nije iza korisnika i njen rang; None ako je korisnik iznad prve"""
+    index = bisect_right([_order_key(rung) for rung in ladder], _order_key(user))
+    if index == 0:
+        return None
+    return index * RANK_STEP, ladder[index - 1]
+
+
+async def _ladder_until(user: dict) -> List[dict]:
+    async with _ladder_lock:
+        ladder = rank_ladder_cache.get("all")
+        if ladder is None:
+            ladder = []
+            rank_ladder_cache.set("all", ladder)
+        key = _order_key(user)
+        while not ladder or _order_key(ladder[-1]) < key:
+            rung = await users_collection.find(
+                _behind(ladder[-1]) if ladder else {}, {"_id": 0, "id": 1, "totalScore": 1}
+            ).sort([("totalScore", -1), ("id", 1)]).skip(RANK_STEP - 1).limit(1).to_list(1)
+            if not rung:
+                break
+            ladder.append(rung[0])
+        return ladder
+
+
+async def user_rank(user: dict) -> int:
+    ahead = await users_collection.count_documents(_ahead_of(user), limit=RANK_EXACT_LIMIT)
+    if ahead < RANK_EXACT_LIMIT:
+        return ahead + 1
+    found = ladder_rank(await _ladder_until(user), user)
+    if found is None:
+        # Prečke starije od korisnikovog skoka na vrh
+        return await users_collection.count_documents(_ahead_of(user)) + 1
+    rank, rung = found
+    if _order_key(rung) == _order_key(user):
+        return rank
+    return rank + await users_collection.count_documents({"$and": [_behind(rung), _ahead_of(user)]}) + 1
+
+
+async def around_user(user: dict, n: int) -> dict:
+    rank = await user_rank(user)
+    above = await users_collection.find(_ahead_of(user), USER_ENTRY_FIELDS).sort(
+        [("totalScore", 1), ("id", -1)]).limit(n).to_list(n)
+    below = await users_collection.find(_behind(user), USER_ENTRY_FIELDS).sort(
+        [("totalScore", -1), ("id", 1)]).limit(n).to_list(n)
+    entries = [user_entry(u, rank - i) for i, u in enumerate(above, start=1)][::-1]
+    entries.append(user_entry(user, rank))
+    entries += [user_entry(u, rank + i) for i, u in enumerate(below, start=1)]
+    return {"rank": rank, "entries": entries}
+
+
+# ---- kategorije ----
+def category_updates(category_id: str, scores: Iterable[Tuple[str, int]]) -> List[UpdateOne]:
+    return [
+        UpdateOne({"userId": user_id, "categoryId": category_id},
+                  {"$inc": {"score": total, "plays": plays}}, upsert=True)
+        for user_id, (total, plays) in _totals(scores).items()
+    ]
+
+
+async def record_category_scores(category_id: Optional[str], scores: List[Tuple[str, int]]):
+    if category_id and scores:
+        await category_scores_collection.bulk_write(category_updates(category_id, scores), ordered=False)
+
+
+async def category_top(category_id: str, limit: int) -> List[dict]:
+    rows = await category_scores_collection.find(
+        {"categoryId": category_id}, {"_id": 0, "userId": 1, "score": 1, "plays": 1}
+    ).sort([("score", -1), ("userId", 1)]).limit(limit).to_list(limit)
+    return await _with_users(rows)
+
+
+def mastery(doc: dict) -> dict:
+    plays = doc.get("plays", 0)
+    average = round(doc.get("score", 0) / plays) if plays else 0
+    return {
+        "categoryId": doc["categoryId"],
+        "score": doc.get("score", 0),
+        "plays": plays,
+        "averageScore": average,
+        "mastered": plays >= MASTERY_MIN_PLAYS and average >= MASTERY_MIN_AVERAGE,
+    }
+
@@ -1,5 +1,5 @@
-from pydantic import BaseModel, Field, EmailStr
-from typing import List, Optional, Any
+from pydantic import BaseModel, Field, EmailStr, field_validator
+from typing import Dict, List, Optional, Any
 from datetime import datetime
 import uuid
 
@@ -64,6 +64,14 @@ class QuizQuestion(BaseModel):
     youtubeUrl: Optional[str] = None  # YouTube link za dodatnu lekciju
     explanation: Optional[str] = None  # Objašnjenje odgovora
 
+    @field_validator("id")
+    @classmethod
+    def validate_id(cls, value: str) -> str:
+        # ID pitanja se koristi kao deo putanje polja u statistici ("questions.<id>.attempts")
+        if not value or "." in value or value.startswith("$"):
+            raise ValueError("ID pitanja ne sme biti prazan, sadržati '.' niti počinjati sa '$'")
+        return value
+
 class QuizCreate(BaseModel):
     title: str
     description: str
@@ -82,6 +90,7 @@ class Quiz(BaseModel):
     rating: float = 0.0
     createdBy: str
     questions: List[QuizQuestion]
+    version: int = 1  # Povećava se pri svakoj izmeni pitanja
     createdAt: datetime = Field(default_factory=datetime.utcnow)
 
 class QuizResponse(BaseModel):
@@ -93,8 +102,49 @@ class QuizResponse(BaseModel):
     timeLimit: int
     plays: int
     rating: float
+    ratingCount: int = 0
     createdBy: str
 
+# Question-level Editing (optimistička konkurentnost preko verzije kviza)
+class QuestionAdd(BaseModel):
+    version: int
+    question: QuizQuestion
+    position: Optional[int] = None  # None = na kraj
+
+class QuestionUpdate(BaseModel):
+    version: int
+    type: Optional[str] = None
+    question: Optional[str] = None
+    options: Optional[List[str]] = None
+    correctAnswer: Optional[Any] = None
+    imageUrl: Optional[str] = None
+    youtubeUrl: Optional[str] = None
+    explanation: Optional[str] = None
+
+class QuestionMove(BaseModel):
+    version: int
+    position: int
+
+class QuestionEditResponse(BaseModel):
+    quizId: str
+    version: int
+    questionCount: int
+
+# Bulk Quiz Import
+class QuizImportRowError(BaseModel):
+    row: int
+    quiz: str
+    detail: str
+
+class QuizImportResponse(BaseModel):
+    imported: int
+    questions: int
+    failed: int
+    dryRun: bool
+    categories: Dict[str, int]
+    errors: List[QuizImportRowError]
+    errorCount: int
+
 # Quiz Submission
 class QuizAnswer(BaseModel):
     questionId: str
@@ -102,6 +152,7 @@ class QuizAnswer(BaseModel):
 
 class QuizSubmission(BaseModel):
     answers: List[QuizAnswer]
+    timezone: Optional[str] = None  # IANA zona igrača (npr. "Europe/Belgrade"), za dnevni niz
 
 class QuizResult(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -111,6 +162,10 @@ class QuizResult(BaseModel):
     correctCount: int
     totalQuestions: int
     passed: bool
+    points: Optional[int] = None  # Poeni sa bonusom za brzinu (samo za sesije sa merenjem vremena)
+    quizVersion: int = 1
+    correctBits: Optional[bytes] = None  # Bitset tačnih odgovora, redosled pitanja iz quizVersion
+    answers: Optional[List[Any]] = None  # Sirovi odgovori, samo ako je STORE_RAW_ANSWERS uključen
     completedAt: datetime = Field(default_factory=datetime.utcnow)
 
 class QuizResultResponse(BaseModel):
@@ -118,6 +173,66 @@ class QuizResultResponse(BaseModel):
     correctCount: int
     totalQuestions: int
     passed: bool
+    points: Optional[int] = None
+    percentile: float = 0.0  # Procenat predaja sa nižim rezultatom
+    averageScore: float = 0.0
+    medianScore: int = 0
+    newBadges: List[str] = []  # Id-jevi bedževa osvojenih ovom predajom
+
+# Timed Quiz Sessions
+class QuizSessionResponse(BaseModel):
+    sessionId: str
+    quizId: str
+    questionIds: List[str]
+    timePerQuestion: int
+
+class QuizSessionAnswer(BaseModel):
+    questionId: Optional[str] = None
+    answer: Any
+
+class QuizSessionAnswerResponse(BaseModel):
+    questionIndex: int
+    correct: bool
+    points: int
+    totalPoints: int
+    elapsedSeconds: float
+    finished: bool
+
+# Live Multiplayer Rooms
+class RoomCreate(BaseModel):
+    quizId: str
+    timePerQuestion: int = 20
+
+class RoomResponse(BaseModel):
+    code: str
+    quizId: str
+    title: str
+    questionCount: int
+    timePerQuestion: int
+
+# Question Statistics
+class QuestionStats(BaseModel):
+    questionId: str
+    question: str
+    attempts: int
+    correct: int
+    percentCorrect: float
+
+class QuizStatsResponse(BaseModel):
+    quizId: str
+    plays: int
+    questions: List[QuestionStats]
+
+class DailyUniquePlayers(BaseModel):
+    day: str
+    uniquePlayers: int
+
+class UniquePlayersResponse(BaseModel):
+    quizId: str
+    days: int
+    uniquePlayers: int  # Približno (HyperLogLog), za ceo prozor
+    allTimeUniquePlayers: int
+    daily: List[DailyUniquePlayers]
 
 # Leaderboard
 class LeaderboardEntry(BaseModel):
@@ -127,6 +242,39 @@ class LeaderboardEntry(BaseModel):
     quizzesCompleted: int
     avatar: str
 
+class RankedLeaderboardEntry(LeaderboardEntry):
+    rank: int
+
+class AroundMeResponse(BaseModel):
+    rank: int
+    entries: List[RankedLeaderboardEntry]
+
+class HighScoreEntry(BaseModel):
+    rank: int
+    userId: str
+    username: str
+    score: int
+    completedAt: str
+
+class QuizHighScoresResponse(BaseModel):
+    quizId: str
+    entries: List[HighScoreEntry]
+
+class QuizRatingCreate(BaseModel):
+    rating: int  # 1-5
+
+class QuizRatingResponse(BaseModel):
+    quizId: str
+    rating: int
+    previousRating: Optional[int] = None
+    averageRating: float
+    ratingCount: int
+    ratingScore: float  # Bayesov prosek, koristi se za sortiranje
+
+class DailyQuizResponse(BaseModel):
+    day: str  # Dan izazova, YYYY-MM-DD
+    quiz: QuizResponse
+
 # User Progress
 class Badge(BaseModel):
     id: str
@@ -139,10 +287,25 @@ class RecentActivity(BaseModel):
     score: int
     date: str
 
+class CategoryMastery(BaseModel):
+    categoryId: str
+    categoryName: str
+    score: int
+    plays: int
+    averageScore: int
+    mastered: bool
+    accuracy: float = 0.0  # Procenat tačnih odgovora
+    bestScore: int = 0
+
 class UserProgress(BaseModel):
     totalQuizzes: int
     totalScore: int
     averageScore: int
     rank: int
     badges: List[Badge]
-    recentActivity: List[RecentActivity]
\ No newline at end of file
+    recentActivity: List[RecentActivity]
+    categoryMastery: List[CategoryMastery] = []
+    bestScore: int = 0
+    accuracy: float = 0.0
+    currentStreak: int = 0  # Uzastopni dani igranja, 0 ako nije igrao ni danas ni juče
+    longestStreak: int = 0
\ No newline at end of file
@@ -0,0 +1,118 @@
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Optional
+
+# Sampling profiler za admin dijagnostiku. Nit za uzorkovanje postoji samo dok
+# traje sesija, pa kada se ne profiliše nema nikakvog dodatnog opterećenja.
+# Server uzorkuje samo nit event loop-a; uzorci u kojima loop čeka na select()
+# se broje kao idle i ne ulaze u stekove.
+MAX_PROFILE_SECONDS = 60
+DEFAULT_INTERVAL_MS = 5
+MAX_TOP_FUNCTIONS = 200
+IDLE_MODULE = "selectors.py"
+
+_session_lock = threading.Lock()
+
+
+class ProfilerBusyError(Exception):
+    pass
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})"
+
+
+def _collect_stack(frame) -> tuple:
+    stack = []
+    while frame is not None:
+        stack.append(_frame_label(frame))
+        frame = frame.f_back
+    stack.reverse()
+    return tuple(stack)
+
+
+def _is_idle(frame) -> bool:
+    """Event loop čeka na događaje (selectors.*.select)"""
+    return frame.f_code.co_filename.endswith(IDLE_MODULE)
+
+
+def _sample(seconds: float, interval: float, thread_id: Optional[int] = None) -> tuple:
+    """Uzorkuj stekove niti `thread_id` (ili svih osim sopstvene), do isteka vremena"""
+    stacks = Counter()
+    own_id = threading.get_ident()
+    samples = 0
+    idle = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        for frame_thread_id, frame in sys._current_frames().items():
+            if frame_thread_id == own_id or (thread_id is not None and frame_thread_id != thread_id):
+                continue
+            if _is_idle(frame):
+                idle += 1
+                continue
+            stacks[_collect_stack(frame)] += 1
+        samples += 1
+        time.sleep(interval)
+    return stacks, samples, idle
+
+
+def _top_functions(stacks: Counter, limit: int) -> list:
+    self_counts = Counter()
+    total_counts = Counter()
+    total = sum(stacks.values()) or 1
+    for stack, count in stacks.items():
+        if not stack:
+            continue
+        self_counts[stack[-1]] += count
+        # Rekurzivne funkcije se broje jednom po steku
+        for label in set(stack):
+            total_counts[label] += count
+
+    return [
+        {
+            "function": label,
+            "selfSamples": self_counts[label],
+            "totalSamples": total_counts[label],
+            "selfPercent": round(self_counts[label] * 100 / total, 2),
+            "totalPercent": round(total_counts[label] * 100 / total, 2),
+        }
+        for label, _ in self_counts.most_common(limit)
+    ]
+
+
+def run_profile(seconds: float, interval_ms: int = DEFAULT_INTERVAL_MS, top: int = 30,
+                thread_id: Optional[int] = None) -> dict:
+    """Blokirajući poziv - pokreće se u zasebnoj niti, van event loop-a.
+
+    Vraća collapsed-stack format (kompatibilan sa flamegraph.pl / speedscope)
+    i listu funkcija sa najviše uzoraka. Procenti se računaju od uzoraka u radu.
+    """
+    if not _session_lock.acquire(blocking=False):
+        raise ProfilerBusyError()
+    try:
+        started = time.perf_counter()
+        stacks, samples, idle = _sample(seconds, interval_ms / 1000.0, thread_id)
+        elapsed = time.perf_counter() - started
+    finally:
+        _session_lock.release()
+
+    collapsed = "\n".join(
+        f"{';'.join(stack)} {count}"
+        for stack, count in stacks.most_common()
+        if stack
+    )
+    return {
+        "durationSeconds": round(elapsed, 3),
+        "intervalMs": interval_ms,
+        "samples": samples,
+        "idleSamples": idle,
+        "collapsed": collapsed,
+        "topFunctions": _top_functions(stacks, top),
+    }
+
+
+def is_running() -> bool:
+    return _session_lock.locked()
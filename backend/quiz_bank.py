@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+KvizMajstor banka kvizova - izvoz i vraćanje kategorija i kvizova.
+
+Arhiva je direktorijum sa gzip NDJSON delovima (bez Mongo `_id`) i manifest.json
+sa brojem dokumenata i SHA-256 svakog dela. Manifest se upisuje posle svakog dela,
+pa prekinut izvoz nastavlja od poslednjeg id-ja; vraćanje pamti završene delove
+u restore-checkpoint.json. Vraćanje koristi upsert po `id`, pa je ponavljanje bezbedno.
+
+    python quiz_bank.py export backup/
+    python quiz_bank.py verify backup/
+    python quiz_bank.py restore backup/ --workers 4
+"""
+
+import argparse
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import List
+
+from bson import json_util
+from pymongo import ReplaceOne
+
+ARCHIVE_FORMAT = 1
+CHUNK_SIZE = 5000
+COMPRESS_LEVEL = 6
+MANIFEST = "manifest.json"
+RESTORE_CHECKPOINT = "restore-checkpoint.json"
+COLLECTIONS = ("categories", "quizzes")  # Kategorije prve, da kvizovi imaju gde da se vrate
+
+
+class ArchiveError(Exception):
+    pass
+
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _write_json(path: Path, data: dict):
+    # Upis preko privremenog fajla - prekid nikad ne ostavlja polovičan manifest
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(data, indent=2, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def write_chunk(path: Path, docs: List[dict]) -> dict:
+    lines = "".join(json_util.dumps(doc, json_options=json_util.RELAXED_JSON_OPTIONS) + "\n" for doc in docs)
+    with gzip.open(path, "wb", compresslevel=COMPRESS_LEVEL) as f:
+        f.write(lines.encode("utf-8"))
+    return {"file": path.name, "count": len(docs), "sha256": _sha256(path), "lastId": docs[-1]["id"]}
+
+
+def read_chunk(path: Path) -> List[dict]:
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return [json_util.loads(line) for line in f if line.strip()]
+
+
+def load_manifest(archive: Path) -> dict:
+    path = archive / MANIFEST
+    if not path.exists():
+        raise ArchiveError(f"{path} ne postoji")
+    manifest = json.loads(path.read_text(encoding="utf-8"))
+    if manifest.get("format") != ARCHIVE_FORMAT:
+        raise ArchiveError(f"Nepodržan format arhive: {manifest.get('format')}")
+    return manifest
+
+
+def verify_archive(archive: Path) -> List[str]:
+    """Lista problema (prazna ako je arhiva ispravna)"""
+    manifest = load_manifest(archive)
+    problems = []
+    if not manifest.get("complete"):
+        problems.append("Izvoz nije završen (pokrenite export ponovo da nastavi)")
+    for name in COLLECTIONS:
+        for chunk in manifest["collections"].get(name, {}).get("chunks", []):
+            path = archive / chunk["file"]
+            if not path.exists():
+                problems.append(f"{chunk['file']}: fajl ne postoji")
+            elif _sha256(path) != chunk["sha256"]:
+                problems.append(f"{chunk['file']}: SHA-256 se ne poklapa")
+    return problems
+
+
+async def export_bank(db, archive: Path, chunk_size: int = CHUNK_SIZE) -> dict:
+    archive.mkdir(parents=True, exist_ok=True)
+    if (archive / MANIFEST).exists():
+        # Nastavak prekinutog izvoza
+        manifest = load_manifest(archive)
+        if manifest.get("complete"):
+            raise ArchiveError(f"{archive} već sadrži završen izvoz")
+    else:
+        manifest = {"format": ARCHIVE_FORMAT, "createdAt": datetime.utcnow().isoformat(), "complete": False,
+                    "collections": {name: {"count": 0, "chunks": []} for name in COLLECTIONS}}
+
+    for name in COLLECTIONS:
+        section = manifest["collections"][name]
+        last_id = section["chunks"][-1]["lastId"] if section["chunks"] else None
+        query = {"id": {"$gt": last_id}} if last_id is not None else {}
+        cursor = db[name].find(query, {"_id": 0}).sort("id", 1).batch_size(chunk_size)
+        pending = None
+        docs: List[dict] = []
+
+        async def finish(task):
+            chunk = await task
+            section["chunks"].append(chunk)
+            section["count"] += chunk["count"]
+            _write_json(archive / MANIFEST, manifest)
+
+        async for doc in cursor:
+            docs.append(doc)
+            if len(docs) >= chunk_size:
+                # Kompresija ide u niti dok kursor čita sledeći deo
+                if pending is not None:
+                    await finish(pending)
+                path = archive / f"{name}-{len(section['chunks']) + 1:05d}.ndjson.gz"
+                pending = asyncio.ensure_future(asyncio.to_thread(write_chunk, path, docs))
+                docs = []
+        if pending is not None:
+            await finish(pending)
+        if docs:
+            path = archive / f"{name}-{len(section['chunks']) + 1:05d}.ndjson.gz"
+            await finish(asyncio.ensure_future(asyncio.to_thread(write_chunk, path, docs)))
+
+    manifest["complete"] = True
+    _write_json(archive / MANIFEST, manifest)
+    return manifest
+
+
+async def restore_bank(db, archive: Path, workers: int = 4, batch_size: int = 1000) -> dict:
+    problems = verify_archive(archive)
+    if problems:
+        raise ArchiveError("Arhiva nije ispravna:\n" + "\n".join(problems))
+    manifest = load_manifest(archive)
+    checkpoint_path = archive / RESTORE_CHECKPOINT
+    done = set(json.loads(checkpoint_path.read_text())["done"]) if checkpoint_path.exists() else set()
+    semaphore = asyncio.Semaphore(workers)
+    restored = {name: 0 for name in COLLECTIONS}
+
+    async def restore_chunk(name: str, chunk: dict):
+        async with semaphore:
+            docs = await asyncio.to_thread(read_chunk, archive / chunk["file"])
+            for start in range(0, len(docs), batch_size):
+                await db[name].bulk_write([
+                    ReplaceOne({"id": doc["id"]}, doc, upsert=True) for doc in docs[start:start + batch_size]
+                ], ordered=False)
+            restored[name] += len(docs)
+            done.add(chunk["file"])
+            _write_json(checkpoint_path, {"done": sorted(done)})
+
+    for name in COLLECTIONS:
+        await db[name].create_index("id")
+        chunks = [c for c in manifest["collections"][name]["chunks"] if c["file"] not in done]
+        await asyncio.gather(*(restore_chunk(name, chunk) for chunk in chunks))
+
+    checkpoint_path.unlink(missing_ok=True)
+    return restored
+
+
+async def main(args):
+    from database import client, db
+    started = time.perf_counter()
+    try:
+        if args.command == "export":
+            manifest = await export_bank(db, Path(args.archive), args.chunk_size)
+            counts = {name: manifest["collections"][name]["count"] for name in COLLECTIONS}
+            print(f"Izvezeno {counts} u {args.archive}")
+        elif args.command == "restore":
+            restored = await restore_bank(db, Path(args.archive), args.workers)
+            print(f"Vraćeno {restored} iz {args.archive}")
+        else:
+            problems = verify_archive(Path(args.archive))
+            if problems:
+                print("\n".join(problems))
+                raise SystemExit(1)
+            print("Arhiva je ispravna")
+    except ArchiveError as e:
+        print(f"Greška: {e}")
+        raise SystemExit(1)
+    finally:
+        client.close()
+    print(f"Trajanje: {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Izvoz i vraćanje banke kvizova")
+    parser.add_argument("command", choices=["export", "restore", "verify"])
+    parser.add_argument("archive", help="Direktorijum arhive")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="Dokumenata po delu (export)")
+    parser.add_argument("--workers", type=int, default=4, help="Delova koji se vraćaju paralelno (restore)")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,280 @@
+import asyncio
+import csv
+import io
+import json
+import zipfile
+from collections import Counter
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+from pymongo import InsertOne, UpdateOne
+
+from database import categories_collection, quizzes_collection
+from models import Quiz, QuizCreate, QuizQuestion
+
+# Masovni uvoz kvizova iz Excel (.xlsx), CSV ili NDJSON fajla.
+# Fajl se čita red po red (Excel u read-only režimu), kvizovi se upisuju u paketima
+# preko bulk_write, a brojač kvizova se ažurira jednom po kategoriji na kraju.
+# Čitanje i validacija paketa rade u thread-u (asyncio.to_thread), pa veliki fajl
+# ne blokira event loop za ostale zahteve.
+#
+# Excel/CSV: kolone kao u šablonu (Tip, Pitanje, Opcija1-4, TačanOdgovor, SlikaURL,
+# YouTubeURL, Objašnjenje) plus opcione kolone kviza: Kviz, Opis, Kategorija, Vreme.
+# Red sa praznom kolonom Kviz nastavlja prethodni kviz.
+# NDJSON: jedan kviz po liniji, u obliku tela za POST /api/quizzes.
+BATCH_SIZE = 500
+MAX_REPORTED_ERRORS = 1000
+FORMATS = ("xlsx", "csv", "ndjson")
+
+COLUMN_ALIASES = {
+    "tip": "type", "type": "type",
+    "pitanje": "question", "question": "question",
+    "opcija1": "option1", "option1": "option1",
+    "opcija2": "option2", "option2": "option2",
+    "opcija3": "option3", "option3": "option3",
+    "opcija4": "option4", "option4": "option4",
+    "tačanodgovor": "correct", "tacanodgovor": "correct", "correctanswer": "correct",
+    "slikaurl": "imageUrl", "imageurl": "imageUrl",
+    "youtubeurl": "youtubeUrl", "youtube": "youtubeUrl",
+    "objašnjenje": "explanation", "objasnjenje": "explanation", "explanation": "explanation",
+    "kviz": "quiz", "quiz": "quiz", "naslov": "quiz", "title": "quiz",
+    "opis": "description", "description": "description",
+    "kategorija": "category", "category": "category", "categoryid": "category",
+    "vreme": "timeLimit", "timelimit": "timeLimit",
+}
+
+
+class QuizImportError(ValueError):
+    pass
+
+
+def detect_format(filename: Optional[str], requested: Optional[str] = None) -> str:
+    if requested:
+        fmt = requested.lower()
+    else:
+        extension = (filename or "").rsplit(".", 1)[-1].lower()
+        fmt = {"jsonl": "ndjson", "json": "ndjson", "xlsm": "xlsx"}.get(extension, extension)
+    if fmt not in FORMATS:
+        raise QuizImportError("Podržani formati su .xlsx, .csv i .ndjson")
+    return fmt
+
+
+def _cell(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def _normalize_header(header: Iterable[Any]) -> List[Optional[str]]:
+    return [COLUMN_ALIASES.get(_cell(h).lower().replace(" ", "")) for h in header]
+
+
+def _rows_from_table(rows: Iterator[Tuple], first_row: int) -> Iterator[Tuple[int, Dict[str, str]]]:
+    header = next(rows, None)
+    if header is None:
+        return
+    columns = _normalize_header(header)
+    for number, values in enumerate(rows, start=first_row + 1):
+        row = {column: _cell(value) for column, value in zip(columns, values) if column}
+        if any(row.values()):
+            yield number, row
+
+
+def iter_csv_rows(binary_file) -> Iterator[Tuple[int, Dict[str, str]]]:
+    text = io.TextIOWrapper(binary_file, encoding="utf-8-sig", newline="")
+    sample = text.read(4096)
+    text.seek(0)
+    # Excel sa srpskim podešavanjima snima CSV sa ';'
+    delimiter = ";" if sample.count(";") > sample.count(",") else ","
+    yield from _rows_from_table(iter(csv.reader(text, delimiter=delimiter)), 1)
+
+
+def iter_xlsx_rows(binary_file) -> Iterator[Tuple[int, Dict[str, str]]]:
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise QuizImportError("Excel uvoz zahteva paket openpyxl na serveru")
+    workbook = load_workbook(binary_file, read_only=True, data_only=True)
+    try:
+        sheet = workbook.worksheets[0]
+        yield from _rows_from_table(sheet.iter_rows(values_only=True), 1)
+    finally:
+        workbook.close()
+
+
+def row_to_question(row: Dict[str, str]) -> dict:
+    """Red tabele u pitanje, po istim pravilima kao uvoz u CreateQuizPage"""
+    question_type = row.get("type", "").lower()
+    extras = {
+        "imageUrl": row.get("imageUrl", ""),
+        "youtubeUrl": row.get("youtubeUrl", ""),
+        "explanation": row.get("explanation", ""),
+    }
+    if question_type in ("multiple", "višestruki"):
+        options = [row.get(f"option{i}", "") for i in range(1, 5)]
+        options = [o for o in options if o]
+        try:
+            correct = int(row.get("correct") or "1") - 1
+        except ValueError:
+            raise ValueError("TačanOdgovor mora biti redni broj opcije (1-4)")
+        correct = max(0, min(correct, len(options) - 1))
+        return {"type": "multiple", "question": row.get("question", ""), "options": options,
+                "correctAnswer": correct, **extras}
+    if question_type in ("true-false", "tačno-netačno"):
+        raw = (row.get("correct") or "true").lower()
+        correct = "true" if raw in ("true", "tačno", "tacno", "1") else "false"
+        return {"type": "true-false", "question": row.get("question", ""), "options": [],
+                "correctAnswer": correct, **extras}
+    raise ValueError(f"Nepoznat tip pitanja '{row.get('type', '')}'")
+
+
+def _validation_detail(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(p) for p in e['loc'])}: {e['msg']}" if e["loc"] else e["msg"]
+        for e in error.errors()
+    )
+
+
+def quizzes_from_rows(rows: Iterator[Tuple[int, Dict[str, str]]], defaults: dict,
+                      errors: List[dict]) -> Iterator[Tuple[int, dict]]:
+    """Grupiše redove u kvizove; neispravni redovi idu u errors i preskaču se"""
+    current: Optional[dict] = None
+    first_row = 0
+    for number, row in rows:
+        title = row.get("quiz", "")
+        if current is None or (title and title != current["title"]):
+            if current is not None:
+                yield first_row, current
+            first_row = number
+            current = {
+                "title": title or defaults.get("title", ""),
+                "description": row.get("description") or defaults.get("description", ""),
+                "categoryId": row.get("category") or defaults.get("categoryId", ""),
+                "timeLimit": row.get("timeLimit") or defaults.get("timeLimit", 0),
+                "questions": [],
+            }
+        if not row.get("question"):
+            errors.append({"row": number, "quiz": current["title"], "detail": "Pitanje je prazno"})
+            continue
+        try:
+            current["questions"].append(QuizQuestion(**row_to_question(row)).dict())
+        except ValidationError as e:
+            errors.append({"row": number, "quiz": current["title"], "detail": _validation_detail(e)})
+        except ValueError as e:
+            errors.append({"row": number, "quiz": current["title"], "detail": str(e)})
+    if current is not None:
+        yield first_row, current
+
+
+def iter_ndjson_quizzes(binary_file, errors: List[dict]) -> Iterator[Tuple[int, dict]]:
+    for number, line in enumerate(io.TextIOWrapper(binary_file, encoding="utf-8-sig"), start=1):
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+        except ValueError:
+            errors.append({"row": number, "quiz": "", "detail": "Neispravan JSON"})
+            continue
+        if not isinstance(data, dict):
+            errors.append({"row": number, "quiz": "", "detail": "Linija mora biti JSON objekat"})
+            continue
+        yield number, data
+
+
+def build_quiz(data: dict, categories: Dict[str, str], created_by: str) -> dict:
+    """Validira kviz kao POST /api/quizzes i vraća dokument za upis"""
+    category = str(data.get("categoryId") or "")
+    data = dict(data, categoryId=categories.get(category) or categories.get(category.lower()) or category)
+    try:
+        quiz_data = QuizCreate(**data)
+    except ValidationError as e:
+        raise ValueError(_validation_detail(e))
+    if not quiz_data.title.strip():
+        raise ValueError("Naslov kviza je obavezan")
+    if quiz_data.categoryId not in categories:
+        raise ValueError(f"Kategorija '{category}' ne postoji")
+    if not quiz_data.questions:
+        raise ValueError("Kviz nema nijedno ispravno pitanje")
+    return Quiz(
+        title=quiz_data.title,
+        description=quiz_data.description,
+        categoryId=quiz_data.categoryId,
+        questionCount=len(quiz_data.questions),
+        timeLimit=quiz_data.timeLimit if quiz_data.timeLimit else 0,
+        createdBy=created_by,
+        questions=[q.dict() for q in quiz_data.questions]
+    ).dict()
+
+
+async def _load_categories() -> Dict[str, str]:
+    """id -> id i naziv (malim slovima) -> id"""
+    categories = {}
+    async for c in categories_collection.find({}, {"_id": 0, "id": 1, "name": 1}):
+        categories[c["id"]] = c["id"]
+        categories[c.get("name", "").lower()] = c["id"]
+    return categories
+
+
+def _next_batch(drafts: Iterator[Tuple[int, dict]], categories: Dict[str, str], created_by: str,
+                errors: List[dict]) -> Tuple[List[dict], int]:
+    """Čita i validira do BATCH_SIZE kvizova; vraća ispravne i broj neispravnih"""
+    quizzes = []
+    failed = 0
+    for row_number, draft in drafts:
+        try:
+            quizzes.append(build_quiz(draft, categories, created_by))
+        except ValueError as e:
+            failed += 1
+            errors.append({"row": row_number, "quiz": str(draft.get("title", "")), "detail": str(e)})
+        if len(quizzes) + failed >= BATCH_SIZE:
+            break
+    return quizzes, failed
+
+
+async def import_quizzes(binary_file, fmt: str, created_by: str, defaults: Optional[dict] = None,
+                         dry_run: bool = False) -> dict:
+    errors: List[dict] = []
+    if fmt == "ndjson":
+        drafts = iter_ndjson_quizzes(binary_file, errors)
+    else:
+        rows = iter_xlsx_rows(binary_file) if fmt == "xlsx" else iter_csv_rows(binary_file)
+        drafts = quizzes_from_rows(rows, defaults or {}, errors)
+
+    categories = await _load_categories()
+    category_counts: Counter = Counter()
+    imported = 0
+    question_count = 0
+    failed = 0
+    while True:
+        try:
+            quizzes, batch_failed = await asyncio.to_thread(_next_batch, drafts, categories, created_by, errors)
+        except (UnicodeDecodeError, csv.Error, zipfile.BadZipFile) as e:
+            raise QuizImportError(f"Fajl nije moguće pročitati: {e}")
+        if not quizzes and not batch_failed:
+            break
+        failed += batch_failed
+        for quiz in quizzes:
+            imported += 1
+            question_count += quiz["questionCount"]
+            category_counts[quiz["categoryId"]] += 1
+        if quizzes and not dry_run:
+            await quizzes_collection.bulk_write([InsertOne(quiz) for quiz in quizzes], ordered=False)
+
+    if category_counts and not dry_run:
+        await categories_collection.bulk_write([
+            UpdateOne({"id": category_id}, {"$inc": {"quizCount": count}})
+            for category_id, count in category_counts.items()
+        ], ordered=False)
+
+    errors.sort(key=lambda e: e["row"])
+    return {
+        "imported": imported,
+        "questions": question_count,
+        "failed": failed,
+        "dryRun": dry_run,
+        "categories": dict(category_counts),
+        "errors": errors[:MAX_REPORTED_ERRORS],
+        "errorCount": len(errors),
+    }
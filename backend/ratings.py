@@ -0,0 +1,74 @@
+import os
+from datetime import datetime
+from typing import List, Optional
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from database import quiz_ratings_collection, quizzes_collection
+
+# Ocene kvizova: jedna ocena po korisniku i kvizu (quiz_ratings, jedinstven
+# indeks), a kviz drži ratingSum i ratingCount. Promena ocene uvećava zbir za
+# razliku, nova ocena i broj. Kviz se menja jednim pipeline upisom bez čitanja,
+# koji u istom koraku računa i ratingScore - prosek zaglađen ka PRIOR_MEAN kao
+# da kviz već ima PRIOR_WEIGHT takvih ocena (po njemu se sortira). Prosek za
+# prikaz se računa iz zbira i broja, pa čitanje nikad ne agregira ocene.
+MIN_RATING = 1
+MAX_RATING = 5
+PRIOR_MEAN = float(os.environ.get("RATING_PRIOR_MEAN", "3.0"))
+PRIOR_WEIGHT = float(os.environ.get("RATING_PRIOR_WEIGHT", "5"))
+RATING_FIELDS = {"_id": 0, "ratingSum": 1, "ratingCount": 1, "ratingScore": 1}
+
+
+def average(quiz: dict) -> float:
+    count = quiz.get("ratingCount", 0)
+    return round(quiz.get("ratingSum", 0) / count, 1) if count else 0.0
+
+
+def quiz_update(sum_delta: int, count_delta: int) -> List[dict]:
+    """Pipeline update: zbir i broj se uvećavaju, ratingScore se računa iz novih vrednosti"""
+    return [
+        {"$set": {
+            "ratingSum": {"$add": [{"$ifNull": ["$ratingSum", 0]}, sum_delta]},
+            "ratingCount": {"$add": [{"$ifNull": ["$ratingCount", 0]}, count_delta]},
+        }},
+        {"$set": {"ratingScore": {"$divide": [
+            {"$add": [PRIOR_WEIGHT * PRIOR_MEAN, "$ratingSum"]},
+            {"$add": [PRIOR_WEIGHT, "$ratingCount"]},
+        ]}}},
+    ]
+
+
+async def _store_rating(quiz_id: str, user_id: str, rating: int) -> Optional[int]:
+    """Upisuje ocenu korisnika; vraća prethodnu (None ako je prva)"""
+    now = datetime.utcnow()
+    for _ in range(2):
+        try:
+            previous = await quiz_ratings_collection.find_one_and_update(
+                {"quizId": quiz_id, "userId": user_id},
+                {"$set": {"rating": rating, "updatedAt": now}, "$setOnInsert": {"createdAt": now}},
+                upsert=True, projection={"_id": 0, "rating": 1}, return_document=ReturnDocument.BEFORE
+            )
+            return previous["rating"] if previous else None
+        except DuplicateKeyError:
+            # Istovremena prva ocena istog korisnika - drugi pokušaj nalazi dokument
+            continue
+    raise RuntimeError(f"Upis ocene nije uspeo za {quiz_id}")
+
+
+async def rate(quiz_id: str, user_id: str, rating: int) -> dict:
+    previous = await _store_rating(quiz_id, user_id, rating)
+    quiz = await quizzes_collection.find_one_and_update(
+        {"id": quiz_id}, quiz_update(rating - (previous or 0), 0 if previous is not None else 1),
+        projection=RATING_FIELDS, return_document=ReturnDocument.AFTER
+    ) or {}
+    return {
+        "quizId": quiz_id, "rating": rating, "previousRating": previous,
+        "averageRating": average(quiz), "ratingCount": quiz.get("ratingCount", 0),
+        "ratingScore": round(quiz.get("ratingScore", PRIOR_MEAN), 3),
+    }
+
+
+async def user_rating(quiz_id: str, user_id: str) -> Optional[int]:
+    doc = await quiz_ratings_collection.find_one({"quizId": quiz_id, "userId": user_id}, {"_id": 0, "rating": 1})
+    return doc["rating"] if doc else None
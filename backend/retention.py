@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+KvizMajstor zadržavanje rezultata - sabiranje starih rezultata u mesečne zbirove.
+
+Rezultati stariji od RESULTS_RETENTION_DAYS sabiraju se u jedan dokument po
+korisniku, kvizu i mesecu (kolekcija results_monthly), a sirovi redovi se brišu
+u paketima. Paket se prvo obeleži (rollupBatch), pa se zbir upiše uslovno - id
+paketa se pamti u dokumentu zbira, pa ponovljen paket posle prekida ne sabira
+dvaput. Upiti za napredak, statistiku i rang liste spajaju zbirove sa sirovim
+rezultatima.
+
+    python retention.py run
+    python retention.py run --days 90
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from cleanup import throttle
+from database import results_collection, results_monthly_collection
+
+RETENTION_DAYS = int(os.environ.get("RESULTS_RETENTION_DAYS", "180"))
+RUN_INTERVAL_SECONDS = 24 * 3600
+FIRST_RUN_DELAY_SECONDS = 300
+APPLIED_BATCHES_KEPT = 20  # Dovoljno za ponavljanje prekinutih paketa
+ROLLUP_FIELDS = {"_id": 1, "userId": 1, "quizId": 1, "score": 1, "correctCount": 1,
+                 "totalQuestions": 1, "passed": 1, "points": 1, "completedAt": 1}
+
+logger = logging.getLogger(__name__)
+
+_task: Optional[asyncio.Task] = None
+last_run: dict = {}
+
+
+def month_key(moment: datetime) -> str:
+    return moment.strftime("%Y-%m")
+
+
+def rollup_increments(results: Iterable[dict]) -> Dict[Tuple[str, str, str], dict]:
+    """Zbirovi po (userId, quizId, mesec) za jedan paket sirovih rezultata"""
+    rollups: Dict[Tuple[str, str, str], dict] = {}
+    for result in results:
+        key = (result["userId"], result["quizId"], month_key(result["completedAt"]))
+        rollup = rollups.get(key)
+        if rollup is None:
+            rollup = rollups[key] = {"inc": defaultdict(int), "first": result["completedAt"],
+                                     "last": result["completedAt"], "best": result["score"]}
+        inc = rollup["inc"]
+        inc["plays"] += 1
+        inc["scoreSum"] += result["score"]
+        inc["correctCount"] += result.get("correctCount", 0)
+        inc["totalQuestions"] += result.get("totalQuestions", 0)
+        inc["points"] += result.get("points") or 0
+        inc["passedCount"] += 1 if result.get("passed") else 0
+        inc[f"scores.{result['score']}"] += 1
+        rollup["first"] = min(rollup["first"], result["completedAt"])
+        rollup["last"] = max(rollup["last"], result["completedAt"])
+        rollup["best"] = max(rollup["best"], result["score"])
+    return rollups
+
+
+def rollup_update(batch_id: str, key: Tuple[str, str, str], rollup: dict) -> UpdateOne:
+    user_id, quiz_id, month = key
+    return UpdateOne(
+        # Ako je paket već primenjen filter ne pogađa dokument, upsert pada na
+        # jedinstvenom indeksu i ta greška se ignoriše
+        {"userId": user_id, "quizId": quiz_id, "month": month, "appliedBatches": {"$ne": batch_id}},
+        {
+            "$inc": dict(rollup["inc"]),
+            "$min": {"firstCompletedAt": rollup["first"]},
+            "$max": {"lastCompletedAt": rollup["last"], "bestScore": rollup["best"]},
+            "$push": {"appliedBatches": {"$each": [batch_id], "$slice": -APPLIED_BATCHES_KEPT}},
+        },
+        upsert=True
+    )
+
+
+async def _apply_batch(batch_id: str) -> int:
+    docs = await results_collection.find({"rollupBatch": batch_id}, ROLLUP_FIELDS).to_list(None)
+    if not docs:
+        return 0
+    ops = [rollup_update(batch_id, key, rollup) for key, rollup in rollup_increments(docs).items()]
+    try:
+        await results_monthly_collection.bulk_write(ops, ordered=False)
+    except BulkWriteError as e:
+        if any(err.get("code") != 11000 for err in e.details.get("writeErrors", [])):
+            raise
+    await results_collection.delete_many({"rollupBatch": batch_id})
+    return len(docs)
+
+
+async def roll_up_results(days: int = RETENTION_DAYS) -> dict:
+    """Sabira rezultate starije od `days` dana; vraća broj sabranih redova i paketa"""
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    stats = {"cutoff": cutoff.isoformat(), "results": 0, "batches": 0}
+
+    # Paketi obeleženi u prekinutom prolazu
+    for batch_id in await results_collection.distinct("rollupBatch", {"rollupBatch": {"$exists": True}}):
+        stats["results"] += await _apply_batch(batch_id)
+        stats["batches"] += 1
+
+    while True:
+        batch_size, pause = throttle(datetime.utcnow())
+        ids = [d["_id"] for d in await results_collection.find(
+            {"completedAt": {"$lt": cutoff}, "rollupBatch": {"$exists": False}}, {"_id": 1}
+        ).limit(batch_size).to_list(batch_size)]
+        if not ids:
+            break
+        batch_id = uuid.uuid4().hex
+        await results_collection.update_many(
+            {"_id": {"$in": ids}, "rollupBatch": {"$exists": False}}, {"$set": {"rollupBatch": batch_id}}
+        )
+        stats["results"] += await _apply_batch(batch_id)
+        stats["batches"] += 1
+        await asyncio.sleep(pause)
+    return stats
+
+
+# ---- čitanje: zbirovi + sirovi rezultati ----
+async def recent_results(user_id: str, limit: int = 10) -> List[dict]:
+    """Poslednji rezultati korisnika; kad sirovih nema dovoljno dopunjuje se mesečnim
+    zbirovima (prosečan rezultat meseca, datum poslednje igre)"""
+    results = await results_collection.find(
+        {"userId": user_id}, {"_id": 0, "quizId": 1, "score": 1, "completedAt": 1}
+    ).sort("completedAt", -1).limit(limit).to_list(limit)
+    if len(results) < limit:
+        rollups = await results_monthly_collection.find(
+            {"userId": user_id}, {"_id": 0, "quizId": 1, "plays": 1, "scoreSum": 1, "lastCompletedAt": 1}
+        ).sort("lastCompletedAt", -1).limit(limit - len(results)).to_list(limit - len(results))
+        results += [
+            {"quizId": r["quizId"], "score": round(r["scoreSum"] / r["plays"]), "completedAt": r["lastCompletedAt"]}
+            for r in rollups if r.get("plays")
+        ]
+    return results
+
+
+async def score_buckets(quiz_id: Optional[str] = None) -> Dict[str, Dict[str, int]]:
+    """Histogram rezultata iz mesečnih zbirova: quizId -> {score: broj}"""
+    pipeline = []
+    if quiz_id:
+        pipeline.append({"$match": {"quizId": quiz_id}})
+    pipeline += [
+        {"$project": {"quizId": 1, "scores": {"$objectToArray": "$scores"}}},
+        {"$unwind": "$scores"},
+        {"$group": {"_id": {"quizId": "$quizId", "score": "$scores.k"}, "count": {"$sum": "$scores.v"}}},
+    ]
+    buckets: Dict[str, Dict[str, int]] = defaultdict(dict)
+    async for doc in results_monthly_collection.aggregate(pipeline, allowDiskUse=True):
+        buckets[doc["_id"]["quizId"]][doc["_id"]["score"]] = doc["count"]
+    return buckets
+
+
+# ---- pozadinsko pokretanje ----
+async def _retention_loop():
+    global last_run
+    await asyncio.sleep(FIRST_RUN_DELAY_SECONDS)
+    while True:
+        started = time.perf_counter()
+        try:
+            stats = await roll_up_results()
+            last_run = dict(stats, finishedAt=datetime.utcnow().isoformat(),
+                            seconds=round(time.perf_counter() - started, 1))
+            logger.info(f"Sabrano {stats['results']} starih rezultata u {stats['batches']} paketa")
+        except Exception as e:
+            last_run = {"error": str(e), "finishedAt": datetime.utcnow().isoformat()}
+            logger.warning(f"Sabiranje starih rezultata nije uspelo: {e}")
+        await asyncio.sleep(RUN_INTERVAL_SECONDS)
+
+
+def start_scheduler():
+    global _task
+    if _task is None:
+        _task = asyncio.create_task(_retention_loop())
+
+
+async def stop_scheduler():
+    global _task
+    if _task is not None:
+        _task.cancel()
+        try:
+            await _task
+        except asyncio.CancelledError:
+            pass
+        _task = None
+
+
+async def main(args):
+    from database import client, init_indexes
+    started = time.perf_counter()
+    try:
+        await init_indexes()
+        stats = await roll_up_results(args.days)
+        print(f"Sabrano {stats['results']} rezultata starijih od {stats['cutoff']} u {stats['batches']} paketa")
+    finally:
+        client.close()
+    print(f"Trajanje: {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sabiranje starih rezultata u mesečne zbirove")
+    parser.add_argument("command", choices=["run"])
+    parser.add_argument("--days", type=int, default=RETENTION_DAYS, help="Sabiraju se rezultati stariji od ovoliko dana")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,565 @@
+import asyncio
+import functools
+import heapq
+import json
+import logging
+import secrets
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+
+from bus import bus
+from scoring import answers_match, normalize_answer, question_points
+
+# Multiplayer sobe uživo (Kahoot stil). Domaćin kontroliše prelazak na sledeće
+# pitanje, a server šalje pitanje, odbrojavanje i tabelu svim igračima.
+# Svaki događaj sobe se serijalizuje jednom, a isti tekst ide u red svake konekcije.
+# Soba živi na worker-u koji ju je kreirao; igrači povezani na druge worker-e
+# prolaze kroz RoomProxy, a poruke idu preko magistrale (bus.py).
+MAX_PLAYERS_PER_ROOM = 5000
+SEND_QUEUE_SIZE = 32  # Ograničen red po konekciji - spori klijenti gube najstarije poruke
+MAX_DROPPED_MESSAGES = 256  # Uzastopno izgubljenih - posle toga se zaglavljena konekcija zatvara
+DEFAULT_TIME_PER_QUESTION = 20
+STANDINGS_SIZE = 10
+LOBBY_UPDATE_SECONDS = 0.5
+ROOM_IDLE_TTL_SECONDS = 60 * 60
+REMOTE_ROOM_TTL_SECONDS = 24 * 60 * 60
+CODE_ALPHABET = "ABCDEFGHJKLMNPQRSTUVWXYZ23456789"
+HOST_ID = "__host__"
+
+# Kanali magistrale
+ROOM_CREATED_CHANNEL = "rooms.created"
+ROOM_CLOSED_CHANNEL = "rooms.closed"
+ROOM_INPUT_CHANNEL = "rooms.input"    # proxy -> vlasnik sobe
+ROOM_OUTPUT_CHANNEL = "rooms.output"  # vlasnik sobe -> proxy
+
+logger = logging.getLogger(__name__)
+
+
+class RoomError(Exception):
+    pass
+
+
+class Connection:
+    __slots__ = ("websocket", "queue", "dropped", "closed")
+    remote = False
+
+    def __init__(self, websocket):
+        self.websocket = websocket
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=SEND_QUEUE_SIZE)
+        self.dropped = 0
+        self.closed = False
+
+    def send(self, text: str):
+        """Ne blokira - ako je red pun, izbacuje se najstarija poruka"""
+        if self.closed:
+            return
+        try:
+            self.queue.put_nowait(text)
+        except asyncio.QueueFull:
+            self.queue.get_nowait()
+            self.queue.put_nowait(text)
+            self.dropped += 1
+            if self.dropped > MAX_DROPPED_MESSAGES:
+                self.close()
+
+    def send_json(self, message: dict):
+        self.send(json.dumps(message, ensure_ascii=False))
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            # None budi writer i zatvara konekciju posle poruka koje su već u redu
+            if self.queue.full():
+                self.queue.get_nowait()
+            self.queue.put_nowait(None)
+
+    async def run_writer(self):
+        try:
+            while True:
+                text = await self.queue.get()
+                if text is None:
+                    break
+                await self.websocket.send_text(text)
+                # Klijent napreduje - brojimo samo uzastopno izgubljene poruke
+                self.dropped = 0
+        finally:
+            self.closed = True
+            try:
+                await self.websocket.close()
+            except Exception:
+                pass
+
+
+class RemoteConnection:
+    """Konekcija na drugom worker-u - poruke se šalju tamošnjem RoomProxy-ju"""
+    __slots__ = ("code", "conn_id", "closed")
+    remote = True
+
+    def __init__(self, code: str, conn_id: str):
+        self.code = code
+        self.conn_id = conn_id
+        self.closed = False
+
+    def send(self, text: str):
+        if not self.closed:
+            bus.publish(ROOM_OUTPUT_CHANNEL, {"code": self.code, "connId": self.conn_id, "text": text}, local=False)
+
+    def send_json(self, message: dict):
+        self.send(json.dumps(message, ensure_ascii=False))
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            bus.publish(ROOM_OUTPUT_CHANNEL, {"code": self.code, "connId": self.conn_id, "close": True}, local=False)
+
+
+class Player:
+    __slots__ = ("id", "name", "user_id", "score", "connection", "answered", "correct_flags", "answers")
+
+    def __init__(self, player_id: str, name: str, user_id: Optional[str], question_count: int):
+        self.id = player_id
+        self.name = name
+        self.user_id = user_id
+        self.score = 0
+        self.connection: Optional[Connection] = None
+        self.answered = -1  # Indeks poslednjeg odgovorenog pitanja
+        self.correct_flags = [False] * question_count
+        self.answers: List = [None] * question_count
+
+
+class Room:
+    def __init__(self, code: str, quiz: dict, host_user_id: str, time_per_question: int):
+        questions = quiz.get("questions", [])
+        self.code = code
+        self.quiz_id = quiz["id"]
+        self.quiz_version = quiz.get("version", 1)
+        self.title = quiz.get("title", "")
+        self.category_id = quiz.get("categoryId")
+        self.host_user_id = host_user_id
+        self.time_per_question = time_per_question
+        self.question_ids = [q["id"] for q in questions]
+        self.answer_key = [normalize_answer(q.get("correctAnswer")) for q in questions]
+        self.public_questions = [
+            {k: v for k, v in q.items() if k not in ("correctAnswer", "explanation", "_id")}
+            for q in questions
+        ]
+        self.correct_answers = [q.get("correctAnswer") for q in questions]
+        self.host: Optional[Connection] = None
+        self.players: Dict[str, Player] = {}
+        self.state = "lobby"
+        self.current = -1
+        self.question_started = 0.0
+        self.answers_this_round = 0
+        self.countdown_task: Optional[asyncio.Task] = None
+        self.lobby_update_pending = False
+        self.persisted = False
+        self.has_remote = False  # Bar jedna konekcija je ikad stigla preko drugog worker-a
+        self.last_activity = time.monotonic()
+
+    # ---- fan-out ----
+    def broadcast(self, message: dict, include_host: bool = True):
+        text = json.dumps(message, ensure_ascii=False)
+        for player in self.players.values():
+            if player.connection is not None and not player.connection.remote:
+                player.connection.send(text)
+        if include_host and self.host is not None and not self.host.remote:
+            self.host.send(text)
+        if self.has_remote:
+            # Jedna poruka za sve udaljene igrače; proxy je prosleđuje svojim konekcijama
+            bus.publish(ROOM_OUTPUT_CHANNEL, {"code": self.code, "text": text, "includeHost": include_host},
+                        local=False)
+
+    def standings(self) -> List[dict]:
+        top = heapq.nlargest(STANDINGS_SIZE, self.players.values(), key=lambda p: p.score)
+        return [{"rank": i + 1, "name": p.name, "score": p.score} for i, p in enumerate(top)]
+
+    # ---- players ----
+    def join(self, name: str, user_id: Optional[str], connection: Connection,
+             player_id: Optional[str] = None) -> Player:
+        if self.state == "finished":
+            raise RoomError("Igra je završena")
+        player_id = player_id or user_id or secrets.token_hex(8)
+        player = self.players.get(player_id)
+        if player is None:
+            if len(self.players) >= MAX_PLAYERS_PER_ROOM:
+                raise RoomError("Soba je puna")
+            player = Player(player_id, name[:30] or "Igrač", user_id, len(self.question_ids))
+            self.players[player_id] = player
+        elif player.connection is not None:
+            player.connection.close()
+        player.connection = connection
+        self.last_activity = time.monotonic()
+        self._schedule_lobby_update()
+        return player
+
+    def _schedule_lobby_update(self):
+        # Ulasci igrača se grupišu - domaćin dobija najviše jednu poruku na LOBBY_UPDATE_SECONDS
+        if self.lobby_update_pending:
+            return
+        self.lobby_update_pending = True
+        asyncio.get_running_loop().call_later(LOBBY_UPDATE_SECONDS, self._send_lobby_update)
+
+    def _send_lobby_update(self):
+        self.lobby_update_pending = False
+        if self.host is not None:
+            self.host.send_json({"type": "players", "playerCount": len(self.players)})
+
+    def leave(self, player: Player, connection: Connection):
+        # Rezultat ostaje u tabeli; igrač se može ponovo povezati
+        if player.connection is connection:
+            player.connection = None
+
+    def answer(self, player: Player, question_index: int, answer):
+        if self.state != "question" or question_index != self.current:
+            raise RoomError("Pitanje nije aktivno")
+        if player.answered >= self.current:
+            raise RoomError("Već ste odgovorili")
+        elapsed = time.monotonic() - self.question_started
+        correct = answers_match(answer, self.answer_key[self.current])
+        points = question_points(correct, elapsed, self.time_per_question)
+        player.answered = self.current
+        player.correct_flags[self.current] = points > 0
+        player.answers[self.current] = answer
+        player.score += points
+        self.answers_this_round += 1
+        if player.connection is not None:
+            player.connection.send_json({"type": "answer_result", "questionIndex": question_index,
+                                         "correct": points > 0, "points": points, "score": player.score})
+        if self.answers_this_round >= len(self.players):
+            self.reveal()
+
+    # ---- host control ----
+    def next_question(self):
+        if self.state == "finished":
+            raise RoomError("Igra je završena")
+        if self.state == "question":
+            raise RoomError("Pitanje je još aktivno")
+        if self.current + 1 >= len(self.question_ids):
+            self.finish()
+            return
+        self.current += 1
+        self.state = "question"
+        self.answers_this_round = 0
+        self.question_started = time.monotonic()
+        self.last_activity = self.question_started
+        self.broadcast({
+            "type": "question",
+            "questionIndex": self.current,
+            "questionCount": len(self.question_ids),
+            "timeLimit": self.time_per_question,
+            "question": self.public_questions[self.current],
+        })
+        self.countdown_task = asyncio.create_task(self._countdown(self.current))
+
+    async def _countdown(self, index: int):
+        try:
+            for remaining in range(self.time_per_question, 0, -1):
+                # Broj odgovora ide uz odbrojavanje, umesto posebne poruke po odgovoru
+                self.broadcast({"type": "countdown", "questionIndex": index, "remaining": remaining,
+                                "answered": self.answers_this_round, "playerCount": len(self.players)})
+                await asyncio.sleep(1)
+            if self.state == "question" and self.current == index:
+                self.reveal()
+        except asyncio.CancelledError:
+            pass
+
+    def reveal(self):
+        if self.state == "finished":
+            raise RoomError("Igra je završena")
+        if self.state != "question":
+            return
+        self.state = "reveal"
+        if self.countdown_task is not None and self.countdown_task is not asyncio.current_task():
+            self.countdown_task.cancel()
+        self.countdown_task = None
+        self.broadcast({
+            "type": "reveal",
+            "questionIndex": self.current,
+            "correctAnswer": self.correct_answers[self.current],
+            "answered": self.answers_this_round,
+            "playerCount": len(self.players),
+            "standings": self.standings(),
+        })
+
+    def finish(self):
+        if self.state == "finished":
+            return
+        if self.state == "question":
+            self.reveal()
+        self.state = "finished"
+        self.broadcast({"type": "finished", "standings": self.standings(), "playerCount": len(self.players)})
+        # Lično mesto šalje se samo jednom, na kraju igre
+        ranked = sorted(self.players.values(), key=lambda p: p.score, reverse=True)
+        for rank, player in enumerate(ranked, start=1):
+            if player.connection is not None:
+                player.connection.send_json({"type": "final_rank", "rank": rank, "score": player.score})
+        # Rezultati se čuvaju tačno jednom, ma koliko puta stigne "end"
+        if _result_handler is not None and not self.persisted:
+            self.persisted = True
+            task = asyncio.create_task(_result_handler(self))
+            # Petlja drži samo slabu referencu na task - bez skupa bi ga GC mogao prekinuti
+            _result_tasks.add(task)
+            task.add_done_callback(functools.partial(_result_task_done, self.code))
+
+    def set_host(self, connection: Connection):
+        if self.host is not None:
+            self.host.close()
+        self.host = connection
+
+    def close_all(self):
+        for player in self.players.values():
+            if player.connection is not None:
+                player.connection.close()
+        if self.host is not None:
+            self.host.close()
+
+
+_rooms: Dict[str, Room] = {}
+_remote_rooms: Dict[str, dict] = {}  # Sobe drugih worker-a: code -> {hostUserId, seenAt}
+_proxies: Dict[str, "RoomProxy"] = {}
+_result_handler: Optional[Callable[[Room], Awaitable[None]]] = None
+_result_tasks: Set[asyncio.Task] = set()
+
+
+def set_result_handler(handler: Callable[[Room], Awaitable[None]]):
+    """Server registruje funkciju koja čuva rezultate prijavljenih igrača po završetku igre"""
+    global _result_handler
+    _result_handler = handler
+
+
+def _result_task_done(code: str, task: asyncio.Task):
+    _result_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(f"Čuvanje rezultata sobe {code} nije uspelo", exc_info=task.exception())
+
+
+def _evict_idle():
+    now = time.monotonic()
+    for code in [c for c, r in _rooms.items() if now - r.last_activity > ROOM_IDLE_TTL_SECONDS]:
+        remove_room(code)
+    for code in [c for c, r in _remote_rooms.items() if now - r["seenAt"] > REMOTE_ROOM_TTL_SECONDS]:
+        del _remote_rooms[code]
+
+
+def create_room(quiz: dict, host_user_id: str, time_per_question: int) -> Room:
+    _evict_idle()
+    code = "".join(secrets.choice(CODE_ALPHABET) for _ in range(6))
+    while code in _rooms or code in _remote_rooms:
+        code = "".join(secrets.choice(CODE_ALPHABET) for _ in range(6))
+    room = Room(code, quiz, host_user_id, time_per_question or DEFAULT_TIME_PER_QUESTION)
+    _rooms[code] = room
+    bus.publish(ROOM_CREATED_CHANNEL, {"code": code, "hostUserId": host_user_id}, local=False)
+    return room
+
+
+def get_room(code: str) -> Optional[Room]:
+    return _rooms.get(code.upper())
+
+
+def remove_room(code: str):
+    room = _rooms.pop(code, None)
+    if room is not None:
+        room.close_all()
+        bus.publish(ROOM_CLOSED_CHANNEL, {"code": code}, local=False)
+
+
+def handle_host_message(room: Room, message: dict):
+    action = message.get("type")
+    room.last_activity = time.monotonic()
+    if action == "next":
+        room.next_question()
+    elif action == "reveal":
+        room.reveal()
+    elif action == "end":
+        room.finish()
+    else:
+        raise RoomError("Nepoznata komanda")
+
+
+def handle_player_message(room: Room, player: Player, message: dict):
+    if message.get("type") != "answer":
+        raise RoomError("Nepoznata komanda")
+    room.answer(player, message.get("questionIndex", -1), message.get("answer"))
+
+
+def room_state(room: Room) -> dict:
+    return {
+        "type": "room",
+        "code": room.code,
+        "quizId": room.quiz_id,
+        "title": room.title,
+        "state": room.state,
+        "questionIndex": room.current,
+        "questionCount": len(room.question_ids),
+        "timeLimit": room.time_per_question,
+        "playerCount": len(room.players),
+    }
+
+
+# ---- WebSocket konekcije (lokalna soba ili soba na drugom worker-u) ----
+def room_host_user_id(code: str) -> Optional[str]:
+    """Domaćin sobe, ili None ako soba ne postoji ni na jednom poznatom worker-u"""
+    code = code.upper()
+    room = _rooms.get(code)
+    if room is not None:
+        return room.host_user_id
+    remote = _remote_rooms.get(code)
+    return remote["hostUserId"] if remote is not None else None
+
+
+class LocalEndpoint:
+    def __init__(self, room: Room, role: str, name: str, user_id: Optional[str], connection: Connection):
+        self.room = room
+        self.connection = connection
+        self.player: Optional[Player] = None
+        if role == "host":
+            room.set_host(connection)
+        else:
+            self.player = room.join(name, user_id, connection)
+        connection.send_json(room_state(room))
+
+    def handle(self, message: dict):
+        if self.player is None:
+            handle_host_message(self.room, message)
+        else:
+            handle_player_message(self.room, self.player, message)
+
+    def detach(self):
+        if self.player is not None:
+            self.room.leave(self.player, self.connection)
+        elif self.room.host is self.connection:
+            self.room.host = None
+
+
+class RoomProxy:
+    """Lokalne konekcije za sobu koja živi na drugom worker-u"""
+
+    def __init__(self, code: str):
+        self.code = code
+        self.connections: Dict[str, Connection] = {}
+        self.host_conn_id: Optional[str] = None
+
+    def send(self, kind: str, conn_id: str, **fields):
+        bus.publish(ROOM_INPUT_CHANNEL, {"code": self.code, "type": kind, "connId": conn_id, **fields}, local=False)
+
+    def deliver(self, data: dict):
+        conn_id = data.get("connId")
+        if conn_id is None:
+            for cid, connection in self.connections.items():
+                if cid != self.host_conn_id or data.get("includeHost", True):
+                    connection.send(data["text"])
+            return
+        connection = self.connections.get(conn_id)
+        if connection is None:
+            return
+        if data.get("close"):
+            connection.close()
+        else:
+            connection.send(data["text"])
+
+    def release(self, conn_id: str):
+        self.connections.pop(conn_id, None)
+        if self.host_conn_id == conn_id:
+            self.host_conn_id = None
+        if not self.connections:
+            _proxies.pop(self.code, None)
+
+
+class RemoteEndpoint:
+    def __init__(self, proxy: RoomProxy, role: str, name: str, user_id: Optional[str], connection: Connection):
+        self.proxy = proxy
+        self.conn_id = secrets.token_hex(8)
+        # Id gosta bira proxy, da bi sledeće poruke stigle do istog igrača
+        self.player_id = HOST_ID if role == "host" else (user_id or secrets.token_hex(8))
+        proxy.connections[self.conn_id] = connection
+        if role == "host":
+            proxy.host_conn_id = self.conn_id
+        proxy.send("join", self.conn_id, playerId=self.player_id, name=name, userId=user_id)
+
+    def handle(self, message: dict):
+        if not isinstance(message, dict):
+            raise ValueError()
+        self.proxy.send("message", self.conn_id, playerId=self.player_id, message=message)
+
+    def detach(self):
+        self.proxy.send("leave", self.conn_id, playerId=self.player_id)
+        self.proxy.release(self.conn_id)
+
+
+def open_endpoint(code: str, role: str, name: str, user_id: Optional[str], connection: Connection):
+    code = code.upper()
+    room = _rooms.get(code)
+    if room is not None:
+        return LocalEndpoint(room, role, name, user_id, connection)
+    if code not in _remote_rooms:
+        raise RoomError("Soba nije pronađena")
+    proxy = _proxies.get(code)
+    if proxy is None:
+        proxy = _proxies[code] = RoomProxy(code)
+    return RemoteEndpoint(proxy, role, name, user_id, connection)
+
+
+def _is_connection(connection, conn_id: str) -> bool:
+    return connection is not None and connection.remote and connection.conn_id == conn_id
+
+
+def _on_remote_input(channel: str, data: dict):
+    room = _rooms.get(data.get("code"))
+    if room is None:
+        return
+    conn_id = data.get("connId")
+    player_id = data.get("playerId")
+    kind = data.get("type")
+    try:
+        if kind == "join":
+            connection = RemoteConnection(room.code, conn_id)
+            room.has_remote = True
+            if player_id == HOST_ID:
+                room.set_host(connection)
+            else:
+                room.join(data.get("name") or "", data.get("userId"), connection, player_id)
+            connection.send_json(room_state(room))
+        elif player_id == HOST_ID:
+            if not _is_connection(room.host, conn_id):
+                return
+            if kind == "message":
+                handle_host_message(room, data.get("message"))
+            elif kind == "leave":
+                room.host = None
+        else:
+            player = room.players.get(player_id)
+            if player is None or not _is_connection(player.connection, conn_id):
+                return
+            if kind == "message":
+                handle_player_message(room, player, data.get("message"))
+            elif kind == "leave":
+                room.leave(player, player.connection)
+    except (RoomError, ValueError, AttributeError) as e:
+        connection = RemoteConnection(room.code, conn_id)
+        connection.send_json({"type": "error", "detail": str(e) or "Neispravna poruka"})
+        if kind == "join":
+            connection.close()
+
+
+def _on_remote_output(channel: str, data: dict):
+    proxy = _proxies.get(data.get("code"))
+    if proxy is not None:
+        proxy.deliver(data)
+
+
+def _on_room_created(channel: str, data: dict):
+    _remote_rooms[data["code"]] = {"hostUserId": data.get("hostUserId"), "seenAt": time.monotonic()}
+
+
+def _on_room_closed(channel: str, data: dict):
+    _remote_rooms.pop(data.get("code"), None)
+    proxy = _proxies.pop(data.get("code"), None)
+    if proxy is not None:
+        for connection in proxy.connections.values():
+            connection.close()
+
+
+bus.subscribe(ROOM_CREATED_CHANNEL, _on_room_created)
+bus.subscribe(ROOM_CLOSED_CHANNEL, _on_room_closed)
+bus.subscribe(ROOM_INPUT_CHANNEL, _on_remote_input)
+bus.subscribe(ROOM_OUTPUT_CHANNEL, _on_remote_output)
@@ -0,0 +1,32 @@
+from typing import Any
+
+
+def normalize_answer(answer: Any) -> Any:
+    """Svedi odgovor na oblik pogodan za poređenje (bool -> "true"/"false", string -> mala slova)"""
+    if isinstance(answer, bool):
+        return str(answer).lower()
+    if isinstance(answer, str):
+        return answer.lower()
+    return answer
+
+
+def answers_match(user_answer: Any, correct_answer: Any) -> bool:
+    return normalize_answer(user_answer) == normalize_answer(correct_answer)
+
+
+# Bodovanje po SISTEM_BODOVANJA.md: 1000 osnovnih + do 500 bonusa za brzinu
+BASE_POINTS = 1000
+MAX_SPEED_BONUS = 500
+LATE_ANSWER_GRACE_SECONDS = 1.0  # Tolerancija za mrežno kašnjenje
+
+
+def question_points(correct: bool, elapsed: float, time_limit: int) -> int:
+    """Poeni za jedno pitanje; time_limit u sekundama (0 = bez ograničenja, bez bonusa)"""
+    if not correct:
+        return 0
+    if not time_limit:
+        return BASE_POINTS
+    if elapsed > time_limit + LATE_ANSWER_GRACE_SECONDS:
+        return 0
+    remaining = max(0.0, time_limit - elapsed)
+    return BASE_POINTS + int(MAX_SPEED_BONUS * remaining / time_limit)
@@ -1,29 +1,72 @@
 # backend/server.py
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, Request
-from fastapi.responses import JSONResponse, Response
+from fastapi import (
+    FastAPI, APIRouter, HTTPException, Depends, Request, WebSocket, WebSocketDisconnect,
+    UploadFile, File, Form, Query
+)
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
+from pymongo import ReturnDocument, UpdateOne
 from pathlib import Path
 from typing import List, Optional
+from datetime import datetime
+import asyncio
 import logging
+import os
+import threading
 
 from models import (
     UserCreate, UserLogin, UserResponse, Category, QuizCreate,
     QuizResponse, Quiz, QuizSubmission, QuizResultResponse,
-    LeaderboardEntry, UserProgress, Badge, RecentActivity
+    LeaderboardEntry, UserProgress, Badge, RecentActivity, CategoryMastery,
+    QuestionStats, QuizStatsResponse, UniquePlayersResponse,
+    QuizSessionResponse, QuizSessionAnswer, QuizSessionAnswerResponse,
+    RoomCreate, RoomResponse, QuizImportResponse, QuizHighScoresResponse, AroundMeResponse, DailyQuizResponse,
+    QuizRatingCreate, QuizRatingResponse,
+    QuizQuestion, QuestionAdd, QuestionUpdate, QuestionMove, QuestionEditResponse
 )
 from auth import (
-    hash_password, verify_password, create_access_token,
+    hash_password, verify_password, create_access_token, decode_token,
     get_current_user, get_current_user_optional
 )
 from database import (
     db, users_collection, categories_collection, quizzes_collection,
-    results_collection, init_categories, close_db_connection
+    results_collection, init_categories, init_indexes, close_db_connection
 )
+import cleanup
+import badges
+import daily_quiz
+import exports
+import high_scores
+import leaderboards
+import profiler
+import quiz_import
+import ratings
+import retention
+from bus import bus
+from cache import TTLCache
+from leaderboard_stream import LeaderboardHub
+from bitsets import encode_correctness
+from scoring import answers_match
+import rooms
+import sessions
+import streaks
+import trending
+import uniques
+import user_stats
+from stats import record_submissions, question_key, get_question_stats, score_distribution, rebuild_score_histograms
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
+# Čuvanje sirovih odgovora uz svaki rezultat (uvek se čuva kompaktni bitset tačnosti)
+STORE_RAW_ANSWERS = os.getenv("STORE_RAW_ANSWERS", "false").lower() == "true"
+
+# Kviz sa pitanjima za ocenjivanje; izmena/brisanje briše unos na svim worker-ima
+quiz_cache = TTLCache("quiz", ttl_seconds=60, max_size=1000)
+category_names_cache = TTLCache("category_names", ttl_seconds=300, max_size=1)
+trending_cache = TTLCache("trending_quizzes", ttl_seconds=60, max_size=4)
+
 app = FastAPI(title="KvizMajstor API", version="1.0.0")
 api_router = APIRouter(prefix="/api")
 
@@ -144,8 +187,24 @@ async def get_categories():
     return [Category(**cat) for cat in categories]
 
 # ====== Quizzes ======
+def _quiz_response(quiz: dict) -> QuizResponse:
+    return QuizResponse(
+        id=quiz["id"],
+        title=quiz["title"],
+        description=quiz["description"],
+        categoryId=quiz["categoryId"],
+        questionCount=quiz["questionCount"],
+        timeLimit=quiz.get("timeLimit", 0),
+        plays=quiz.get("plays", 0),
+        rating=ratings.average(quiz),
+        ratingCount=quiz.get("ratingCount", 0),
+        createdBy=quiz.get("createdBy", "Anonimno")
+    )
+
 @api_router.get("/quizzes", response_model=List[QuizResponse])
-async def get_quizzes(categoryId: Optional[str] = None, search: Optional[str] = None):
+async def get_quizzes(categoryId: Optional[str] = None, search: Optional[str] = None, sort: Optional[str] = None):
+    if sort not in (None, "trending", "rating"):
+        raise HTTPException(status_code=400, detail="Sortiranje mora biti 'trending' ili 'rating'")
     query = {}
     if categoryId and categoryId != "all":
         query["categoryId"] = categoryId
@@ -155,47 +214,50 @@ async def get_quizzes(categoryId: Optional[str] = None, search: Optional[str] =
             {"description": {"$regex": search, "$options": "i"}}
         ]
 
-    quizzes = await quizzes_collection.find(query).to_list(1000)
-    result = []
-    for quiz in quizzes:
-        result.append(QuizResponse(
-            id=quiz["id"],
-            title=quiz["title"],
-            description=quiz["description"],
-            categoryId=quiz["categoryId"],
-            questionCount=quiz["questionCount"],
-            timeLimit=quiz.get("timeLimit", 0),
-            plays=quiz.get("plays", 0),
-            rating=quiz.get("rating", 0.0),
-            createdBy=quiz.get("createdBy", "Anonimno")
-        ))
+    cursor = quizzes_collection.find(query, {"_id": 0, "questions": 0})
+    if sort == "trending":
+        cursor = cursor.sort([(trending.TRENDING_FIELD, -1), ("id", 1)])
+    elif sort == "rating":
+        # Bayesov prosek, da kviz sa jednom peticom ne bude iznad onog sa stotinu četvorki
+        cursor = cursor.sort([("ratingScore", -1), ("id", 1)])
+    quizzes = await cursor.to_list(1000)
+    result = [_quiz_response(quiz) for quiz in quizzes]
 
     return JSONResponse(content=[r.dict() for r in result], media_type="application/json")
 
+@api_router.get("/quizzes/trending", response_model=List[QuizResponse])
+async def get_trending_quizzes(limit: int = 8):
+    if limit < 1 or limit > trending.TOP_N:
+        raise HTTPException(status_code=400, detail=f"Limit mora biti između 1 i {trending.TOP_N}")
+    # Traka na početnoj strani: vrh iz indeksa, keširan kratko na svakom worker-u
+    top = trending_cache.get("top")
+    if top is None:
+        quizzes = await quizzes_collection.find(
+            {trending.TRENDING_FIELD: {"$exists": True}}, {"_id": 0, "questions": 0}
+        ).sort([(trending.TRENDING_FIELD, -1), ("id", 1)]).limit(trending.TOP_N).to_list(trending.TOP_N)
+        top = [_quiz_response(quiz).dict() for quiz in quizzes]
+        trending_cache.set("top", top)
+    return JSONResponse(content=top[:limit], media_type="application/json")
+
 @api_router.get("/quizzes/{quiz_id}")
 async def get_quiz(quiz_id: str):
     quiz = await quizzes_collection.find_one({"id": quiz_id})
     if not quiz:
         raise HTTPException(status_code=404, detail="Kviz nije pronađen")
 
-    return JSONResponse(
-        content=QuizResponse(
-            id=quiz["id"],
-            title=quiz["title"],
-            description=quiz["description"],
-            categoryId=quiz["categoryId"],
-            questionCount=quiz["questionCount"],
-            timeLimit=quiz.get("timeLimit", 0),
-            plays=quiz.get("plays", 0),
-            rating=quiz.get("rating", 0.0),
-            createdBy=quiz.get("createdBy", "Anonimno")
-        ).dict(),
-        media_type="application/json"
-    )
+    return JSONResponse(content=_quiz_response(quiz).dict(), media_type="application/json")
+
+async def _get_cached_quiz(quiz_id: str) -> Optional[dict]:
+    quiz = quiz_cache.get(quiz_id)
+    if quiz is None:
+        quiz = await quizzes_collection.find_one({"id": quiz_id}, {"_id": 0})
+        if quiz:
+            quiz_cache.set(quiz_id, quiz)
+    return quiz
 
 @api_router.get("/quizzes/{quiz_id}/questions")
 async def get_quiz_questions(quiz_id: str):
-    quiz = await quizzes_collection.find_one({"id": quiz_id})
+    quiz = await _get_cached_quiz(quiz_id)
     if not quiz:
         raise HTTPException(status_code=404, detail="Kviz nije pronađen")
 
@@ -211,6 +273,28 @@ async def get_quiz_questions(quiz_id: str):
 
     return JSONResponse(content=safe_questions, media_type="application/json")
 
+@api_router.get("/quizzes/{quiz_id}/high-scores", response_model=QuizHighScoresResponse)
+async def get_quiz_high_scores(quiz_id: str):
+    # Jedan dokument po kvizu, čita se po jedinstvenom indeksu ili iz keša
+    entries = await high_scores.get_table(quiz_id)
+    return JSONResponse(content=high_scores.table_response(quiz_id, entries), media_type="application/json")
+
+@api_router.put("/quizzes/{quiz_id}/rating", response_model=QuizRatingResponse)
+async def rate_quiz(quiz_id: str, rating_data: QuizRatingCreate, user_id: str = Depends(get_current_user)):
+    if rating_data.rating < ratings.MIN_RATING or rating_data.rating > ratings.MAX_RATING:
+        raise HTTPException(status_code=400, detail=f"Ocena mora biti između {ratings.MIN_RATING} i {ratings.MAX_RATING}")
+    if not await _get_cached_quiz(quiz_id):
+        raise HTTPException(status_code=404, detail="Kviz nije pronađen")
+
+    # Jedan upis ocene i jedan atomski upis kviza; ponovna ocena ispravlja zbir za razliku
+    result = await ratings.rate(quiz_id, user_id, rating_data.rating)
+    return JSONResponse(content=QuizRatingResponse(**result).dict(), media_type="application/json")
+
+@api_router.get("/quizzes/{quiz_id}/rating/me")
+async def get_my_quiz_rating(quiz_id: str, user_id: str = Depends(get_current_user)):
+    return JSONResponse(content={"quizId": quiz_id, "rating": await ratings.user_rating(quiz_id, user_id)},
+                        media_type="application/json")
+
 @api_router.get("/quizzes/{quiz_id}/edit")
 async def get_quiz_for_edit(quiz_id: str, user_id: str = Depends(get_current_user)):
     user = await users_collection.find_one({"id": user_id})
@@ -238,6 +322,63 @@ async def get_quiz_for_edit(quiz_id: str, user_id: str = Depends(get_current_use
     quiz["questions"] = clean_questions
     return JSONResponse(content=quiz, media_type="application/json")
 
+@api_router.get("/quizzes/{quiz_id}/stats")
+async def get_quiz_stats(quiz_id: str, user_id: str = Depends(get_current_user)):
+    user = await users_collection.find_one({"id": user_id})
+    if not user:
+        raise HTTPException(status_code=404, detail="Korisnik nije pronađen")
+
+    quiz = await quizzes_collection.find_one({"id": quiz_id}, {"questions.id": 1, "questions.question": 1, "createdBy": 1})
+    if not quiz:
+        raise HTTPException(status_code=404, detail="Kviz nije pronađen")
+
+    if not user.get("isAdmin", False) and quiz.get("createdBy") != user["username"]:
+        raise HTTPException(status_code=403, detail="Nemate dozvolu za pregled statistike ovog kviza")
+
+    stats = await get_question_stats(quiz_id)
+    counters = stats.get("questions", {})
+    questions = []
+    for q in quiz.get("questions", []):
+        c = counters.get(question_key(q["id"]), {})
+        attempts = c.get("attempts", 0)
+        correct = c.get("correct", 0)
+        questions.append(QuestionStats(
+            questionId=q["id"], question=q.get("question", ""),
+            attempts=attempts, correct=correct,
+            percentCorrect=round(correct * 100 / attempts, 1) if attempts else 0.0
+        ))
+
+    return JSONResponse(
+        content=QuizStatsResponse(quizId=quiz_id, plays=stats.get("plays", 0), questions=questions).dict(),
+        media_type="application/json"
+    )
+
+@api_router.get("/quizzes/{quiz_id}/players")
+async def get_quiz_unique_players(quiz_id: str, days: int = 30, user_id: str = Depends(get_current_user)):
+    user = await users_collection.find_one({"id": user_id})
+    if not user:
+        raise HTTPException(status_code=404, detail="Korisnik nije pronađen")
+
+    quiz = await quizzes_collection.find_one({"id": quiz_id}, {"createdBy": 1})
+    if not quiz:
+        raise HTTPException(status_code=404, detail="Kviz nije pronađen")
+
+    if not user.get("isAdmin", False) and quiz.get("createdBy") != user["username"]:
+        raise HTTPException(status_code=403, detail="Nemate dozvolu za pregled statistike ovog kviza")
+
+    if days < 1 or days > 365:
+        raise HTTPException(status_code=400, detail="Broj dana mora biti između 1 i 365")
+
+    total, daily = await uniques.count_unique_players(quiz_id, uniques.window_days(days))
+    all_time = await uniques.count_all_time(quiz_id)
+    return JSONResponse(
+        content=UniquePlayersResponse(
+            quizId=quiz_id, days=days, uniquePlayers=total,
+            allTimeUniquePlayers=all_time, daily=daily
+        ).dict(),
+        media_type="application/json"
+    )
+
 @api_router.post("/quizzes")
 async def create_quiz(quiz_data: QuizCreate, user_id: str = Depends(get_current_user)):
     user = await users_collection.find_one({"id": user_id})
@@ -259,6 +400,7 @@ async def create_quiz(quiz_data: QuizCreate, user_id: str = Depends(get_current_
 
     await quizzes_collection.insert_one(quiz.dict())
     await categories_collection.update_one({"id": quiz_data.categoryId}, {"$inc": {"quizCount": 1}})
+    bus.publish("quiz.created", {"quizId": quiz.id, "categoryId": quiz.categoryId})
 
     return JSONResponse(
         content=QuizResponse(
@@ -270,6 +412,38 @@ async def create_quiz(quiz_data: QuizCreate, user_id: str = Depends(get_current_
         media_type="application/json"
     )
 
+@api_router.post("/quizzes/import")
+async def import_quizzes(
+    file: UploadFile = File(...),
+    format: Optional[str] = Form(None),
+    title: str = Form(""),
+    description: str = Form(""),
+    categoryId: str = Form(""),
+    timeLimit: int = Form(0),
+    dryRun: bool = Form(False),
+    user_id: str = Depends(get_current_user)
+):
+    user = await users_collection.find_one({"id": user_id})
+    if not user:
+        raise HTTPException(status_code=404, detail="Korisnik nije pronađen")
+
+    if not user.get("isAdmin", False) and not user.get("isCreator", False):
+        raise HTTPException(status_code=403, detail="Nemate dozvolu za kreiranje kvizova. Samo Admin i Kreatori mogu kreirati kvizove.")
+
+    # Naslov/kategorija iz forme važe za fajlove po šablonu bez kolona Kviz i Kategorija
+    defaults = {"title": title, "description": description, "categoryId": categoryId, "timeLimit": timeLimit}
+    try:
+        fmt = quiz_import.detect_format(file.filename, format)
+        report = await quiz_import.import_quizzes(file.file, fmt, user["username"], defaults, dry_run=dryRun)
+    except quiz_import.QuizImportError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        await file.close()
+
+    if report["imported"] and not dryRun:
+        bus.publish("quizzes.imported", {"count": report["imported"], "categories": report["categories"]})
+    return JSONResponse(content=QuizImportResponse(**report).dict(), media_type="application/json")
+
 @api_router.put("/quizzes/{quiz_id}")
 async def update_quiz(quiz_id: str, quiz_data: QuizCreate, user_id: str = Depends(get_current_user)):
     user = await users_collection.find_one({"id": user_id})
@@ -286,23 +460,155 @@ async def update_quiz(quiz_id: str, quiz_data: QuizCreate, user_id: str = Depend
     if not user.get("isAdmin", False) and existing_quiz.get("createdBy") != user["username"]:
         raise HTTPException(status_code=403, detail="Možete uređivati samo svoje kvizove")
 
-    old_category_id = existing_quiz.get("categoryId")
-    if old_category_id != quiz_data.categoryId:
-        await categories_collection.update_one({"id": old_category_id}, {"$inc": {"quizCount": -1}})
-        await categories_collection.update_one({"id": quiz_data.categoryId}, {"$inc": {"quizCount": 1}})
-
     update_data = {
         "title": quiz_data.title,
         "description": quiz_data.description,
         "categoryId": quiz_data.categoryId,
         "questionCount": len(quiz_data.questions),
         "timeLimit": quiz_data.timeLimit if quiz_data.timeLimit else 0,
-        "questions": [q.dict() for q in quiz_data.questions]
+        "questions": [q.dict() for q in quiz_data.questions],
+        "version": existing_quiz.get("version", 1) + 1
     }
 
-    await quizzes_collection.update_one({"id": quiz_id}, {"$set": update_data})
+    # Upis samo ako verzija nije promenjena od čitanja, kao kod izmena pitanja
+    result = await quizzes_collection.update_one(
+        _version_filter(quiz_id, existing_quiz.get("version", 1)), {"$set": update_data}
+    )
+    if result.matched_count == 0:
+        raise HTTPException(status_code=409, detail="Kviz je u međuvremenu izmenjen - osvežite i pokušajte ponovo")
+
+    old_category_id = existing_quiz.get("categoryId")
+    if old_category_id != quiz_data.categoryId:
+        await categories_collection.update_one({"id": old_category_id}, {"$inc": {"quizCount": -1}})
+        await categories_collection.update_one({"id": quiz_data.categoryId}, {"$inc": {"quizCount": 1}})
+
+    quiz_cache.invalidate(quiz_id)
+    exports.quiz_title_cache.invalidate(quiz_id)
+    bus.publish("quiz.updated", {"quizId": quiz_id, "version": update_data["version"]})
     return JSONResponse(content={"message": "Kviz uspešno ažuriran"}, media_type="application/json")
 
+# ====== Question-level editing ======
+# Svaka izmena menja samo jedno pitanje u nizu, uz uslov da se verzija kviza nije
+# promenila od čitanja (inače 409); verzija i questionCount se menjaju istim upisom.
+def _version_filter(quiz_id: str, version: int) -> dict:
+    if version == 1:
+        # Kvizovi napravljeni pre uvođenja verzija nemaju polje version
+        return {"id": quiz_id, "$or": [{"version": 1}, {"version": {"$exists": False}}]}
+    return {"id": quiz_id, "version": version}
+
+async def _get_editable_quiz(quiz_id: str, user_id: str, version: int, question_id: Optional[str] = None) -> dict:
+    user = await users_collection.find_one({"id": user_id})
+    if not user:
+        raise HTTPException(status_code=404, detail="Korisnik nije pronađen")
+
+    if not user.get("isAdmin", False) and not user.get("isCreator", False):
+        raise HTTPException(status_code=403, detail="Nemate dozvolu za uređivanje kvizova")
+
+    projection = {"_id": 0, "createdBy": 1, "version": 1, "questionCount": 1}
+    if question_id is not None:
+        projection["questions"] = {"$elemMatch": {"id": question_id}}
+    quiz = await quizzes_collection.find_one({"id": quiz_id}, projection)
+    if not quiz:
+        raise HTTPException(status_code=404, detail="Kviz nije pronađen")
+
+    if not user.get("isAdmin", False) and quiz.get("createdBy") != user["username"]:
+        raise HTTPException(status_code=403, detail="Možete uređivati samo svoje kvizove")
+
+    if quiz.get("version", 1) != version:
+        raise HTTPException(status_code=409, detail="Kviz je u međuvremenu izmenjen - osvežite i pokušajte ponovo")
+
+    if question_id is not None and not quiz.get("questions"):
+        raise HTTPException(status_code=404, detail="Pitanje nije pronađeno")
+    return quiz
+
+async def _apply_question_edit(quiz_id: str, version: int, update, extra_filter: Optional[dict] = None) -> JSONResponse:
+    doc = await quizzes_collection.find_one_and_update(
+        {**_version_filter(quiz_id, version), **(extra_filter or {})}, update,
+        projection={"_id": 0, "version": 1, "questionCount": 1},
+        return_document=ReturnDocument.AFTER
+    )
+    if doc is None:
+        raise HTTPException(status_code=409, detail="Kviz je u međuvremenu izmenjen - osvežite i pokušajte ponovo")
+
+    quiz_cache.invalidate(quiz_id)
+    bus.publish("quiz.updated", {"quizId": quiz_id, "version": doc["version"]})
+    return JSONResponse(
+        content=QuestionEditResponse(quizId=quiz_id, version=doc["version"], questionCount=doc["questionCount"]).dict(),
+        media_type="application/json"
+    )
+
+@api_router.post("/quizzes/{quiz_id}/questions")
+async def add_question(quiz_id: str, data: QuestionAdd, user_id: str = Depends(get_current_user)):
+    quiz = await _get_editable_quiz(quiz_id, user_id, data.version)
+    if await quizzes_collection.find_one({"id": quiz_id, "questions.id": data.question.id}, {"_id": 1}):
+        raise HTTPException(status_code=409, detail="Pitanje sa tim ID-jem već postoji")
+
+    push = {"$each": [data.question.dict()]}
+    if data.position is not None:
+        if data.position < 0 or data.position > quiz.get("questionCount", 0):
+            raise HTTPException(status_code=400, detail="Neispravna pozicija pitanja")
+        push["$position"] = data.position
+
+    return await _apply_question_edit(
+        quiz_id, data.version,
+        {"$push": {"questions": push}, "$inc": {"questionCount": 1}, "$set": {"version": data.version + 1}},
+        {"questions.id": {"$ne": data.question.id}}
+    )
+
+@api_router.patch("/quizzes/{quiz_id}/questions/{question_id}")
+async def update_question(quiz_id: str, question_id: str, data: QuestionUpdate,
+                          user_id: str = Depends(get_current_user)):
+    quiz = await _get_editable_quiz(quiz_id, user_id, data.version, question_id)
+
+    changes = data.dict(exclude_unset=True, exclude={"version"})
+    if not changes:
+        raise HTTPException(status_code=400, detail="Nema izmena")
+    # Pitanje posle izmene mora biti ispravno u celini (npr. promena tipa traži opcije)
+    try:
+        QuizQuestion(**{**quiz["questions"][0], **changes})
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    update = {f"questions.$.{field}": value for field, value in changes.items()}
+    update["version"] = data.version + 1
+    return await _apply_question_edit(quiz_id, data.version, {"$set": update}, {"questions.id": question_id})
+
+@api_router.patch("/quizzes/{quiz_id}/questions/{question_id}/position")
+async def move_question(quiz_id: str, question_id: str, data: QuestionMove,
+                        user_id: str = Depends(get_current_user)):
+    quiz = await _get_editable_quiz(quiz_id, user_id, data.version, question_id)
+    if data.position < 0 or data.position >= quiz.get("questionCount", 0):
+        raise HTTPException(status_code=400, detail="Neispravna pozicija pitanja")
+
+    # Premeštanje u jednom atomskom upisu: izvadi pitanje i umetni ga na novu poziciju.
+    # questionCount iz čitanja važi i pri upisu jer upis traži istu verziju.
+    rest = {"$filter": {"input": "$questions", "cond": {"$ne": ["$$this.id", question_id]}}}
+    moved = {"$filter": {"input": "$questions", "cond": {"$eq": ["$$this.id", question_id]}}}
+    if data.position == 0:
+        questions = {"$concatArrays": [moved, rest]}
+    else:
+        questions = {"$concatArrays": [
+            {"$slice": [rest, data.position]}, moved,
+            {"$slice": [rest, data.position, quiz["questionCount"]]}
+        ]}
+    return await _apply_question_edit(
+        quiz_id, data.version,
+        [{"$set": {"questions": questions, "version": data.version + 1}}],
+        {"questions.id": question_id}
+    )
+
+@api_router.delete("/quizzes/{quiz_id}/questions/{question_id}")
+async def remove_question(quiz_id: str, question_id: str, version: int, user_id: str = Depends(get_current_user)):
+    quiz = await _get_editable_quiz(quiz_id, user_id, version, question_id)
+    if quiz.get("questionCount", 0) <= 1:
+        raise HTTPException(status_code=400, detail="Kviz mora imati bar jedno pitanje")
+
+    return await _apply_question_edit(
+        quiz_id, version,
+        {"$pull": {"questions": {"id": question_id}}, "$inc": {"questionCount": -1}, "$set": {"version": version + 1}},
+        {"questions.id": question_id}
+    )
+
 @api_router.delete("/quizzes/{quiz_id}")
 async def delete_quiz(quiz_id: str, user_id: str = Depends(get_current_user)):
     user = await users_collection.find_one({"id": user_id})
@@ -321,114 +627,373 @@ async def delete_quiz(quiz_id: str, user_id: str = Depends(get_current_user)):
 
     await quizzes_collection.delete_one({"id": quiz_id})
     await categories_collection.update_one({"id": quiz.get("categoryId")}, {"$inc": {"quizCount": -1}})
-
-    return JSONResponse(content={"message": "Kviz uspešno obrisan"}, media_type="application/json")
+    # Pre objave "quiz.deleted", da drugi worker-i pročitaju već zamenjen kviz dana
+    await daily_quiz.replace_deleted(quiz_id)
+    quiz_cache.invalidate(quiz_id)
+    exports.quiz_title_cache.invalidate(quiz_id)
+    trending_cache.invalidate("top")
+    high_scores.high_score_cache.invalidate(quiz_id)
+    bus.publish("quiz.deleted", {"quizId": quiz_id, "categoryId": quiz.get("categoryId")})
+    # Rezultati, statistika i skice igrača se brišu u pozadini, u paketima
+    job = await cleanup.enqueue_quiz_cleanup(quiz, user_id)
+
+    return JSONResponse(content={"message": "Kviz uspešno obrisan", "cleanupJobId": job["id"]}, media_type="application/json")
+
+def _client_ip(request: Request) -> str:
+    # Iza Railway proxy-ja request.client je adresa proxy-ja; pravi klijent je prvi X-Forwarded-For hop
+    forwarded = request.headers.get("x-forwarded-for")
+    if forwarded:
+        return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else ""
+
+def _player_key(user_id: Optional[str], request: Request) -> str:
+    return user_id or uniques.guest_fingerprint(_client_ip(request), request.headers.get("user-agent", ""))
+
+async def _finalize_submissions(quiz: dict, question_ids: List[str], attempts: List[dict]) -> List[QuizResultResponse]:
+    """Zajednički deo predaje kviza: statistika, rezultati korisnika i brojači.
+
+    `attempts` su dict-ovi sa userId, playerKey, correctFlags, answers i points.
+    Radi i za jednu predaju i za celu multiplayer sobu - broj upisa u bazu ne
+    zavisi od broja igrača.
+    """
+    from models import QuizResult
+    quiz_id = quiz["id"]
+    total_questions = len(question_ids)
+    scores = []
+    guest_scores = []
+    results = []
+    user_updates = []
+    for attempt in attempts:
+        correct_flags = attempt["correctFlags"]
+        correct_count = sum(correct_flags)
+        score = int((correct_count / total_questions) * 100) if total_questions > 0 else 0
+        scores.append(score)
+        user_id = attempt.get("userId")
+        if user_id:
+            results.append(QuizResult(
+                userId=user_id, quizId=quiz_id, score=score,
+                correctCount=correct_count, totalQuestions=total_questions, passed=score >= 70,
+                points=attempt.get("points"),
+                quizVersion=quiz.get("version", 1),
+                correctBits=encode_correctness(correct_flags),
+                answers=attempt.get("answers") if STORE_RAW_ANSWERS else None
+            ).dict(exclude_none=True))
+            # users.stats se ažurira u istom upisu kao ukupni rezultat
+            update = user_stats.stats_update(quiz, results[-1])
+            update["$inc"].update({"totalScore": score, "quizzesCompleted": 1})
+            user_updates.append(UpdateOne({"id": user_id}, update))
+            # Niz igranja je uslovni pipeline upis, pa ide kao posebna operacija istog bulk_write-a
+            user_updates.append(UpdateOne(
+                {"id": user_id}, streaks.streak_update(results[-1]["completedAt"], attempt.get("timezone"))
+            ))
+        else:
+            guest_scores.append(score)
+        uniques.record_player(quiz_id, attempt["playerKey"])
+
+    if not attempts:
+        return []
+
+    stats = await record_submissions(quiz_id, question_ids, [a["correctFlags"] for a in attempts], scores, guest_scores)
+    if results:
+        await results_collection.insert_many(results, ordered=False)
+        await users_collection.bulk_write(user_updates, ordered=False)
+        user_scores = [(r["userId"], r["score"]) for r in results]
+        await leaderboards.record_scores(user_scores)
+        await leaderboards.record_category_scores(quiz.get("categoryId"), user_scores)
+        await high_scores.record_scores(quiz_id, user_scores)
+        await daily_quiz.record_scores(quiz_id, user_scores)
+        awarded = await badges.process_events([{
+            "userId": r["userId"], "quizId": quiz_id, "categoryId": quiz.get("categoryId"),
+            "score": r["score"], "totalQuestions": total_questions, "points": r.get("points"),
+        } for r in results])
+    else:
+        awarded = {}
+    # plays i trending u jednom upisu; trending je log-sum-exp, bez čitanja i bez periodičnog umanjivanja
+    await quizzes_collection.update_one({"id": quiz_id}, trending.play_update(len(attempts)))
+    # Pretplatnici (tabele uživo, keševi) dobijaju jedan događaj po predaji ili sobi
+    bus.publish("results.submitted", {
+        "quizId": quiz_id,
+        "results": [{"userId": a.get("userId"), "score": score} for a, score in zip(attempts, scores)]
+    })
+
+    responses = []
+    for attempt, score in zip(attempts, scores):
+        distribution = score_distribution(stats.get("scores"), score)
+        responses.append(QuizResultResponse(
+            score=score, correctCount=sum(attempt["correctFlags"]), totalQuestions=total_questions,
+            passed=score >= 70, points=attempt.get("points"),
+            percentile=distribution["percentile"], averageScore=distribution["averageScore"],
+            medianScore=distribution["medianScore"], newBadges=awarded.get(attempt.get("userId"), [])
+        ))
+    return responses
 
 @api_router.post("/quizzes/{quiz_id}/submit")
-async def submit_quiz(quiz_id: str, submission: QuizSubmission, user_id: str = Depends(get_current_user_optional)):
-    quiz = await quizzes_collection.find_one({"id": quiz_id})
+async def submit_quiz(quiz_id: str, submission: QuizSubmission, request: Request,
+                      user_id: str = Depends(get_current_user_optional)):
+    quiz = await _get_cached_quiz(quiz_id)
     if not quiz:
         raise HTTPException(status_code=404, detail="Kviz nije pronađen")
 
     questions = quiz["questions"]
-    correct_count = 0
-    total_questions = len(questions)
-
-    for answer in submission.answers:
-        question = next((q for q in questions if q["id"] == answer.questionId), None)
-        if question:
-            user_answer = answer.answer
-            correct_answer = question["correctAnswer"]
-
-            if isinstance(user_answer, bool):
-                user_answer = str(user_answer).lower()
-            if isinstance(correct_answer, bool):
-                correct_answer = str(correct_answer).lower()
-
-            if isinstance(user_answer, str):
-                user_answer = user_answer.lower()
-            if isinstance(correct_answer, str):
-                correct_answer = str(correct_answer).lower()
-
-            if user_answer == correct_answer:
-                correct_count += 1
-
-    score = int((correct_count / total_questions) * 100) if total_questions > 0 else 0
-    passed = score >= 70
-
-    if user_id:
-        from models import QuizResult
-        result = QuizResult(
-            userId=user_id, quizId=quiz_id, score=score,
-            correctCount=correct_count, totalQuestions=total_questions, passed=passed
-        )
+    answers_by_question = {a.questionId: a.answer for a in submission.answers}
+
+    # Tačnost po pitanju, u redosledu pitanja kviza
+    correct_flags = [
+        q["id"] in answers_by_question and answers_match(answers_by_question[q["id"]], q["correctAnswer"])
+        for q in questions
+    ]
 
-        await results_collection.insert_one(result.dict())
-        await users_collection.update_one({"id": user_id}, {"$inc": {"totalScore": score, "quizzesCompleted": 1}})
+    [response] = await _finalize_submissions(quiz, [q["id"] for q in questions], [{
+        "userId": user_id, "playerKey": _player_key(user_id, request), "correctFlags": correct_flags,
+        "answers": [answers_by_question.get(q["id"]) for q in questions], "timezone": submission.timezone
+    }])
+    return JSONResponse(content=response.dict(), media_type="application/json")
 
-    await quizzes_collection.update_one({"id": quiz_id}, {"$inc": {"plays": 1}})
+# ====== Timed quiz sessions ======
+@api_router.post("/quizzes/{quiz_id}/sessions")
+async def start_quiz_session(quiz_id: str, request: Request, user_id: str = Depends(get_current_user_optional)):
+    quiz = await _get_cached_quiz(quiz_id)
+    if not quiz:
+        raise HTTPException(status_code=404, detail="Kviz nije pronađen")
 
+    # Vreme određuje kreator kviza (timeLimit), nikad igrač
+    time_per_question = sessions.time_per_question(quiz)
+    session = sessions.create_session(quiz, time_per_question, user_id, _player_key(user_id, request))
     return JSONResponse(
-        content=QuizResultResponse(score=score, correctCount=correct_count, totalQuestions=total_questions, passed=passed).dict(),
+        content=QuizSessionResponse(
+            sessionId=session.id, quizId=quiz_id,
+            questionIds=session.question_ids, timePerQuestion=session.time_per_question
+        ).dict(),
         media_type="application/json"
     )
 
-@api_router.get("/leaderboard", response_model=List[LeaderboardEntry])
-async def get_leaderboard():
-    users = await users_collection.find().sort("totalScore", -1).limit(50).to_list(50)
+def _get_own_session(session_id: str, user_id: Optional[str]):
+    session = sessions.get_session(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Sesija nije pronađena ili je istekla")
+    if session.user_id != user_id:
+        raise HTTPException(status_code=403, detail="Ovo nije vaša sesija")
+    return session
+
+@api_router.post("/sessions/{session_id}/answer")
+async def answer_session_question(session_id: str, answer_data: QuizSessionAnswer,
+                                  user_id: str = Depends(get_current_user_optional)):
+    session = _get_own_session(session_id, user_id)
+    if session.finished:
+        raise HTTPException(status_code=400, detail="Sva pitanja su već odgovorena")
+    if answer_data.questionId and answer_data.questionId != session.question_ids[session.current]:
+        raise HTTPException(status_code=409, detail="Odgovor nije za trenutno pitanje")
+
+    return JSONResponse(
+        content=QuizSessionAnswerResponse(**session.answer(answer_data.answer)).dict(),
+        media_type="application/json"
+    )
+
+@api_router.post("/sessions/{session_id}/finish")
+async def finish_quiz_session(session_id: str, user_id: str = Depends(get_current_user_optional)):
+    session = _get_own_session(session_id, user_id)
+    sessions.end_session(session_id)
+    session.skip_remaining()
+
+    # Kategorija i naslov su sačuvani pri kreiranju sesije (statistika po kategoriji, poslednje igre)
+    quiz = {"id": session.quiz_id, "version": session.quiz_version,
+            "categoryId": session.category_id, "title": session.quiz_title}
+    [response] = await _finalize_submissions(quiz, session.question_ids, [{
+        "userId": session.user_id, "playerKey": session.player_key, "correctFlags": session.correct_flags,
+        "answers": session.answers, "points": session.points
+    }])
+    return JSONResponse(content=response.dict(), media_type="application/json")
+
+# ====== Live multiplayer rooms ======
+@api_router.post("/rooms")
+async def create_room(room_data: RoomCreate, user_id: str = Depends(get_current_user)):
+    quiz = await _get_cached_quiz(room_data.quizId)
+    if not quiz:
+        raise HTTPException(status_code=404, detail="Kviz nije pronađen")
+
+    if not quiz.get("questions"):
+        raise HTTPException(status_code=400, detail="Kviz nema pitanja")
+
+    if room_data.timePerQuestion < 0 or room_data.timePerQuestion > 600:
+        raise HTTPException(status_code=400, detail="Vreme po pitanju mora biti između 0 i 600 sekundi")
+
+    room = rooms.create_room(quiz, user_id, room_data.timePerQuestion)
+    return JSONResponse(
+        content=RoomResponse(
+            code=room.code, quizId=room.quiz_id, title=room.title,
+            questionCount=len(room.question_ids), timePerQuestion=room.time_per_question
+        ).dict(),
+        media_type="application/json"
+    )
+
+@api_router.websocket("/rooms/{code}/ws")
+async def room_socket(websocket: WebSocket, code: str, role: str = "player", name: str = "",
+                      token: Optional[str] = None):
+    # Browser WebSocket ne može poslati Authorization header, pa token ide kao query parametar
+    user_id = None
+    if token:
+        try:
+            user_id = decode_token(token).get("user_id")
+        except HTTPException:
+            pass
+
+    await websocket.accept()
+    host_user_id = rooms.room_host_user_id(code)
+    if host_user_id is None:
+        await websocket.close(code=4404)
+        return
+    if role == "host" and user_id != host_user_id:
+        await websocket.close(code=4403)
+        return
+
+    # Soba može biti na drugom worker-u - tada endpoint ide preko magistrale
+    connection = rooms.Connection(websocket)
+    writer = asyncio.create_task(connection.run_writer())
+    endpoint = None
+    try:
+        endpoint = rooms.open_endpoint(code, role, name, user_id, connection)
+
+        while not connection.closed:
+            try:
+                endpoint.handle(await websocket.receive_json())
+            except (rooms.RoomError, ValueError, AttributeError) as e:
+                connection.send_json({"type": "error", "detail": str(e) or "Neispravna poruka"})
+    except WebSocketDisconnect:
+        pass
+    except rooms.RoomError as e:
+        connection.send_json({"type": "error", "detail": str(e)})
+    finally:
+        if endpoint is not None:
+            endpoint.detach()
+        connection.close()
+        await writer
+
+async def _save_room_results(room):
+    # Igrači koji nisu odgovorili ni na jedno pitanje se ne računaju kao odigran kviz
+    attempts = [{
+        "userId": player.user_id, "playerKey": player.user_id or f"guest:room:{player.id}",
+        "correctFlags": player.correct_flags, "answers": player.answers, "points": player.score
+    } for player in room.players.values() if player.answered >= 0]
+    quiz = {"id": room.quiz_id, "version": room.quiz_version, "categoryId": room.category_id, "title": room.title}
+    await _finalize_submissions(quiz, room.question_ids, attempts)
+
+rooms.set_result_handler(_save_room_results)
+
+async def _fetch_leaderboard(limit: int) -> List[dict]:
+    users = await users_collection.find(
+        {}, {"_id": 0, "id": 1, "username": 1, "totalScore": 1, "quizzesCompleted": 1, "avatar": 1}
+    ).sort([("totalScore", -1), ("id", 1)]).limit(limit).to_list(limit)
     return [LeaderboardEntry(
         id=u["id"], username=u["username"],
         score=u.get("totalScore", 0), quizzesCompleted=u.get("quizzesCompleted", 0),
         avatar=u.get("avatar", "👤")
-    ) for u in users]
+    ).dict() for u in users]
+
+leaderboard_hub = LeaderboardHub(_fetch_leaderboard)
+bus.subscribe("results.submitted", leaderboard_hub.on_results)
+
+@api_router.get("/leaderboard", response_model=List[LeaderboardEntry])
+async def get_leaderboard(window: str = "all"):
+    try:
+        return await leaderboards.get_top(window, 50, _fetch_leaderboard)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@api_router.get("/leaderboard/around-me", response_model=AroundMeResponse)
+async def get_leaderboard_around_me(n: int = 5, user_id: str = Depends(get_current_user)):
+    if n < 1 or n > 50:
+        raise HTTPException(status_code=400, detail="Broj suseda mora biti između 1 i 50")
+
+    user = await users_collection.find_one({"id": user_id}, leaderboards.USER_ENTRY_FIELDS)
+    if not user:
+        raise HTTPException(status_code=404, detail="Korisnik nije pronađen")
+
+    return await leaderboards.around_user(user, n)
+
+@api_router.get("/categories/{category_id}/leaderboard", response_model=List[LeaderboardEntry])
+async def get_category_leaderboard(category_id: str, limit: int = 50):
+    if limit < 1 or limit > 100:
+        raise HTTPException(status_code=400, detail="Limit mora biti između 1 i 100")
+    return await leaderboards.category_top(category_id, limit)
+
+@api_router.get("/daily-quiz", response_model=DailyQuizResponse)
+async def get_daily_quiz():
+    # Izbor i odgovor su u memoriji worker-a; bira ih daily_quiz raspoređivač
+    pinned = await daily_quiz.current()
+    if pinned is None:
+        raise HTTPException(status_code=404, detail="Kviz dana još nije izabran")
+    return Response(content=pinned["body"], media_type="application/json")
+
+@api_router.get("/daily-quiz/leaderboard", response_model=List[LeaderboardEntry])
+async def get_daily_quiz_leaderboard(limit: int = 10):
+    if limit < 1 or limit > 100:
+        raise HTTPException(status_code=400, detail="Limit mora biti između 1 i 100")
+    pinned = await daily_quiz.current()
+    if pinned is None:
+        return []
+    return await leaderboards.daily_quiz_top(pinned["day"], limit)
+
+@api_router.get("/leaderboard/stream")
+async def stream_leaderboard(request: Request):
+    # EventSource pri ponovnom povezivanju sam šalje Last-Event-ID
+    last_event_id = request.headers.get("last-event-id") or request.query_params.get("lastEventId")
+    return StreamingResponse(
+        leaderboard_hub.stream(last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+async def _category_names() -> dict:
+    names = category_names_cache.get("all")
+    if names is None:
+        names = {c["id"]: c["name"] async for c in categories_collection.find({}, {"_id": 0, "id": 1, "name": 1})}
+        category_names_cache.set("all", names)
+    return names
 
 @api_router.get("/users/progress")
-async def get_user_progress(user_id: str = Depends(get_current_user)):
+async def get_user_progress(timezone: Optional[str] = None, user_id: str = Depends(get_current_user)):
     user = await users_collection.find_one({"id": user_id})
     if not user:
         raise HTTPException(status_code=404, detail="Korisnik nije pronađen")
 
-    results = await results_collection.find({"userId": user_id}).sort("completedAt", -1).limit(10).to_list(10)
+    # Sve osim ranga je u users.stats, koji održava predaja
+    stats = user.get(user_stats.STATS_FIELD, {})
+    streak = stats.get("streak", {})
+    now = datetime.utcnow()
     recent_activity = []
-
-    for result in results:
-        quiz = await quizzes_collection.find_one({"id": result["quizId"]})
-        if quiz:
-            from datetime import datetime
-            time_diff = datetime.utcnow() - result["completedAt"]
-            if time_diff.days > 0:
-                date_str = f"pre {time_diff.days} dana"
-            elif time_diff.seconds // 3600 > 0:
-                date_str = f"pre {time_diff.seconds // 3600} sati"
-            else:
-                date_str = f"pre {time_diff.seconds // 60} minuta"
-
-            recent_activity.append(RecentActivity(
-                quizTitle=quiz["title"], score=result["score"], date=date_str
-            ))
-
-    all_users = await users_collection.find().sort("totalScore", -1).to_list(10000)
-    rank = 1
-    for idx, u in enumerate(all_users):
-        if u["id"] == user_id:
-            rank = idx + 1
-            break
+    for entry in stats.get("recent", [])[:3]:
+        time_diff = now - entry["completedAt"]
+        if time_diff.days > 0:
+            date_str = f"pre {time_diff.days} dana"
+        elif time_diff.seconds // 3600 > 0:
+            date_str = f"pre {time_diff.seconds // 3600} sati"
+        else:
+            date_str = f"pre {time_diff.seconds // 60} minuta"
+        recent_activity.append(RecentActivity(quizTitle=entry["quizTitle"], score=entry["score"], date=date_str))
+
+    rank = await leaderboards.user_rank(user)
+
+    category_names = await _category_names()
+    category_mastery = sorted((
+        CategoryMastery(
+            categoryName=category_names.get(key, ""), accuracy=user_stats.accuracy(c), bestScore=c.get("bestScore", 0),
+            **leaderboards.mastery({"categoryId": key, "score": c.get("scoreSum", 0), "plays": c.get("plays", 0)})
+        ) for key, c in stats.get("categories", {}).items()
+    ), key=lambda m: -m.score)
 
     total_quizzes = user.get("quizzesCompleted", 0)
-    badges = [
-        Badge(id="1", name="Prvi Kviz", icon="🎯", earned=total_quizzes >= 1),
-        Badge(id="2", name="Savršen Rezultat", icon="💯", earned=False),
-        Badge(id="3", name="10 Kvizova", icon="🔟", earned=total_quizzes >= 10),
-        Badge(id="4", name="Brzinski Demon", icon="⚡", earned=False),
-        Badge(id="5", name="Majstor Kategorije", icon="👑", earned=False)
-    ]
+    # Bedževe dodeljuje badges.process_events pri predaji; ovde se samo čitaju
+    user_badges = [Badge(**b) for b in badges.profile_badges(user)]
 
     average_score = user.get("totalScore", 0) // total_quizzes if total_quizzes > 0 else 0
 
     return JSONResponse(
         content=UserProgress(
             totalQuizzes=total_quizzes, totalScore=user.get("totalScore", 0),
-            averageScore=average_score, rank=rank, badges=badges, recentActivity=recent_activity[:3]
+            averageScore=average_score, rank=rank, badges=user_badges, recentActivity=recent_activity,
+            categoryMastery=category_mastery, bestScore=stats.get("bestScore", 0),
+            accuracy=user_stats.accuracy(stats),
+            currentStreak=streaks.current_streak(streak, now, timezone), longestStreak=streak.get("longest", 0)
         ).dict(),
         media_type="application/json"
     )
@@ -492,6 +1057,7 @@ async def create_category(category_data: dict, user_id: str = Depends(get_curren
     }
 
     await categories_collection.insert_one(new_category)
+    category_names_cache.invalidate("all")
     return Category(**new_category)
 
 @api_router.delete("/admin/categories/{category_id}")
@@ -507,9 +1073,109 @@ async def delete_category(category_id: str, user_id: str = Depends(get_current_u
     result = await categories_collection.delete_one({"id": category_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Kategorija nije pronađena")
+    category_names_cache.invalidate("all")
 
     return JSONResponse(content={"message": "Kategorija uspešno obrisana"}, media_type="application/json")
 
+@api_router.post("/admin/profile")
+async def profile_server(seconds: int = 10, intervalMs: int = profiler.DEFAULT_INTERVAL_MS,
+                         top: int = Query(30, ge=1, le=profiler.MAX_TOP_FUNCTIONS),
+                         user_id: str = Depends(get_current_user)):
+    admin = await users_collection.find_one({"id": user_id})
+    if not admin or not admin.get("isAdmin", False):
+        raise HTTPException(status_code=403, detail="Samo admin može pokrenuti profilisanje")
+
+    if seconds < 1 or seconds > profiler.MAX_PROFILE_SECONDS:
+        raise HTTPException(status_code=400, detail=f"Trajanje mora biti između 1 i {profiler.MAX_PROFILE_SECONDS} sekundi")
+    if intervalMs < 1 or intervalMs > 1000:
+        raise HTTPException(status_code=400, detail="Interval mora biti između 1 i 1000 ms")
+
+    try:
+        # Uzorkovanje ide u zasebnoj niti da bi event loop nastavio da služi zahteve;
+        # uzorkuje se samo nit event loop-a (ova korutina se izvršava u njoj)
+        report = await asyncio.to_thread(profiler.run_profile, seconds, intervalMs, top, threading.get_ident())
+    except profiler.ProfilerBusyError:
+        raise HTTPException(status_code=409, detail="Profilisanje je već u toku")
+
+    return JSONResponse(content=report, media_type="application/json")
+
+@api_router.post("/admin/stats/histograms/rebuild")
+async def rebuild_histograms(quizId: Optional[str] = None, user_id: str = Depends(get_current_user)):
+    admin = await users_collection.find_one({"id": user_id})
+    if not admin or not admin.get("isAdmin", False):
+        raise HTTPException(status_code=403, detail="Samo admin može obnoviti statistiku")
+
+    rebuilt = await rebuild_score_histograms(quizId)
+    return JSONResponse(content={"message": "Histogrami obnovljeni", "quizzes": rebuilt}, media_type="application/json")
+
+@api_router.get("/admin/stats/players")
+async def get_site_unique_players(days: int = 30, user_id: str = Depends(get_current_user)):
+    admin = await users_collection.find_one({"id": user_id})
+    if not admin or not admin.get("isAdmin", False):
+        raise HTTPException(status_code=403, detail="Samo admin može pristupiti ovoj funkciji")
+
+    if days < 1 or days > 365:
+        raise HTTPException(status_code=400, detail="Broj dana mora biti između 1 i 365")
+
+    total, daily = await uniques.count_unique_players(uniques.SITE_WIDE, uniques.window_days(days))
+    return JSONResponse(content={"days": days, "uniquePlayers": total, "daily": daily}, media_type="application/json")
+
+@api_router.get("/admin/cleanup/jobs")
+async def get_cleanup_jobs(status: Optional[str] = None, limit: int = 50, user_id: str = Depends(get_current_user)):
+    admin = await users_collection.find_one({"id": user_id})
+    if not admin or not admin.get("isAdmin", False):
+        raise HTTPException(status_code=403, detail="Samo admin može pristupiti ovoj funkciji")
+
+    if status and status not in ("pending", "running", "done", "failed"):
+        raise HTTPException(status_code=400, detail="Status mora biti pending, running, done ili failed")
+
+    jobs = await cleanup.list_jobs(status, max(1, min(limit, 200)))
+    return JSONResponse(content={"jobs": jobs}, media_type="application/json")
+
+@api_router.get("/admin/results/retention")
+async def get_results_retention(user_id: str = Depends(get_current_user)):
+    admin = await users_collection.find_one({"id": user_id})
+    if not admin or not admin.get("isAdmin", False):
+        raise HTTPException(status_code=403, detail="Samo admin može pristupiti ovoj funkciji")
+
+    return JSONResponse(content={
+        "retentionDays": retention.RETENTION_DAYS,
+        "lastRun": retention.last_run or None,  # Poslednji prolaz na ovom worker-u
+    }, media_type="application/json")
+
+@api_router.get("/admin/results/export")
+async def export_results(
+    format: str = "ndjson",
+    quizId: Optional[str] = None,
+    categoryId: Optional[str] = None,
+    userId: Optional[str] = None,
+    date_from: Optional[str] = Query(None, alias="from"),
+    date_to: Optional[str] = Query(None, alias="to"),
+    gzip: bool = False,
+    user_id: str = Depends(get_current_user)
+):
+    admin = await users_collection.find_one({"id": user_id})
+    if not admin or not admin.get("isAdmin", False):
+        raise HTTPException(status_code=403, detail="Samo admin može izvoziti rezultate")
+
+    if format not in exports.FORMATS:
+        raise HTTPException(status_code=400, detail="Format mora biti ndjson ili csv")
+    try:
+        query = await exports.build_filter(
+            quizId, categoryId, userId,
+            exports.parse_date(date_from, "from"), exports.parse_date(date_to, "to")
+        )
+    except exports.ExportError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    filename = f"rezultati.{format}" + (".gz" if gzip else "")
+    media_type = "application/gzip" if gzip else ("text/csv; charset=utf-8" if format == "csv" else "application/x-ndjson")
+    return StreamingResponse(
+        exports.stream_results(query, format, gzip),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
 # ====== Root ======
 @api_router.get("/")
 async def root():
@@ -548,9 +1214,21 @@ app.include_router(api_router)
 @app.on_event("startup")
 async def startup_event():
     await init_categories()
+    await init_indexes()
+    await bus.start()
+    uniques.start_flusher()
+    cleanup.start_worker()
+    retention.start_scheduler()
+    daily_quiz.start_scheduler()
     logger.info("✅ Backend server started")
 
 @app.on_event("shutdown")
 async def shutdown_event():
+    await uniques.stop_flusher()
+    await cleanup.stop_worker()
+    await retention.stop_scheduler()
+    await daily_quiz.stop_scheduler()
+    await leaderboard_hub.stop()
+    await bus.stop()
     await close_db_connection()
     logger.info("🛑 Backend server stopped")
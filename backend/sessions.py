@@ -0,0 +1,117 @@
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, List, Optional
+
+from scoring import answers_match, normalize_answer, question_points
+
+# Tabela aktivnih sesija kviza u memoriji procesa. Sesija drži ključ odgovora,
+# pa se svaki odgovor ocenjuje u O(1) bez čitanja iz Mongo-a; u bazu ide samo
+# konačni rezultat. Sesije su vezane za worker koji ih je kreirao.
+SESSION_TTL_SECONDS = 2 * 60 * 60
+MAX_SESSIONS = 100000
+
+
+class QuizSession:
+    __slots__ = (
+        "id", "quiz_id", "quiz_version", "quiz_title", "category_id", "user_id", "player_key",
+        "question_ids", "answer_key", "time_per_question",
+        "current", "question_started", "correct_flags", "points",
+        "answers", "expires_at",
+    )
+
+    def __init__(self, quiz: dict, time_per_question: int, user_id: Optional[str], player_key: str):
+        now = time.monotonic()
+        questions = quiz.get("questions", [])
+        self.id = str(uuid.uuid4())
+        self.quiz_id = quiz["id"]
+        self.quiz_version = quiz.get("version", 1)
+        self.quiz_title = quiz.get("title", "")
+        self.category_id = quiz.get("categoryId")
+        self.user_id = user_id
+        self.player_key = player_key
+        self.question_ids = [q["id"] for q in questions]
+        self.answer_key = [normalize_answer(q.get("correctAnswer")) for q in questions]
+        self.time_per_question = time_per_question
+        self.current = 0
+        self.question_started = now
+        self.correct_flags: List[bool] = []
+        self.points = 0
+        self.answers: List[Any] = []
+        self.expires_at = now + SESSION_TTL_SECONDS
+
+    @property
+    def finished(self) -> bool:
+        return self.current >= len(self.question_ids)
+
+    def answer(self, answer: Any) -> dict:
+        """Oceni odgovor na trenutno pitanje; tajmer sledećeg pitanja kreće odmah"""
+        now = time.monotonic()
+        elapsed = now - self.question_started
+        index = self.current
+        correct = answers_match(answer, self.answer_key[index])
+        points = question_points(correct, elapsed, self.time_per_question)
+        # Odgovor posle isteka vremena se računa kao netačan
+        correct = correct and (points > 0)
+
+        self.correct_flags.append(correct)
+        self.answers.append(answer)
+        self.points += points
+        self.current += 1
+        self.question_started = now
+        return {
+            "questionIndex": index,
+            "correct": correct,
+            "points": points,
+            "totalPoints": self.points,
+            "elapsedSeconds": round(elapsed, 2),
+            "finished": self.finished,
+        }
+
+    def skip_remaining(self):
+        """Neodgovorena pitanja pri završetku su netačna"""
+        missing = len(self.question_ids) - len(self.correct_flags)
+        self.correct_flags.extend([False] * missing)
+        self.answers.extend([None] * missing)
+        self.current = len(self.question_ids)
+
+
+def time_per_question(quiz: dict) -> int:
+    """Sekunde po pitanju iz ukupnog limita kviza (timeLimit u minutima, 0 = bez bonusa)"""
+    question_count = len(quiz.get("questions", []))
+    time_limit = quiz.get("timeLimit", 0) or 0
+    if not time_limit or not question_count:
+        return 0
+    return max(1, (time_limit * 60) // question_count)
+
+
+_sessions: "OrderedDict[str, QuizSession]" = OrderedDict()
+
+
+def _evict_expired():
+    # TTL je isti za sve sesije, pa je redosled umetanja ujedno i redosled isteka
+    now = time.monotonic()
+    while _sessions:
+        session_id, session = next(iter(_sessions.items()))
+        if session.expires_at > now and len(_sessions) <= MAX_SESSIONS:
+            break
+        del _sessions[session_id]
+
+
+def create_session(quiz: dict, time_per_question: int, user_id: Optional[str], player_key: str) -> QuizSession:
+    _evict_expired()
+    session = QuizSession(quiz, time_per_question, user_id, player_key)
+    _sessions[session.id] = session
+    return session
+
+
+def get_session(session_id: str) -> Optional[QuizSession]:
+    session = _sessions.get(session_id)
+    if session is not None and session.expires_at <= time.monotonic():
+        del _sessions[session_id]
+        return None
+    return session
+
+
+def end_session(session_id: str):
+    _sessions.pop(session_id, None)
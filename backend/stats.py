@@ -0,0 +1,149 @@
+import hashlib
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+from pymongo import ReturnDocument, UpdateOne
+from database import quiz_stats_collection, results_collection
+from retention import score_buckets
+
+HISTOGRAM_BUCKETS = 101  # Score 0-100, jedan bucket po procentu
+
+
+def question_key(question_id: str) -> str:
+    """Bezbedan ključ za putanju polja; stari ID-jevi sa '.' ili '$' se heširaju"""
+    if question_id and "." not in question_id and not question_id.startswith("$"):
+        return question_id
+    return "h" + hashlib.sha1(str(question_id).encode("utf-8")).hexdigest()
+
+
+async def record_submissions(quiz_id: str, question_ids: List[str], correct_flags: List[List[bool]],
+                             scores: List[int], guest_scores: Sequence[int] = ()) -> dict:
+    """Jedan $inc upsert za jednu ili više predaja - brojači po pitanju i histogram rezultata.
+
+    Brojači pitanja su vezani za ID pitanja, pa preživljavaju promenu redosleda.
+    `guest_scores` su rezultati gostiju među `scores`; gosti nemaju red u `results`,
+    pa se njihov histogram čuva posebno (guestScores) za rebuild_score_histograms.
+    Vraća ažurirani histogram (bez dodatnog čitanja) za računanje percentila.
+    """
+    inc = {"plays": len(scores)}
+    for score in scores:
+        inc[f"scores.{score}"] = inc.get(f"scores.{score}", 0) + 1
+    for score in guest_scores:
+        inc[f"guestScores.{score}"] = inc.get(f"guestScores.{score}", 0) + 1
+    for flags in correct_flags:
+        for question_id, ok in zip(question_ids, flags):
+            key = question_key(question_id)
+            attempts = f"questions.{key}.attempts"
+            inc[attempts] = inc.get(attempts, 0) + 1
+            if ok:
+                correct = f"questions.{key}.correct"
+                inc[correct] = inc.get(correct, 0) + 1
+    doc = await quiz_stats_collection.find_one_and_update(
+        {"quizId": quiz_id}, {"$inc": inc},
+        projection={"_id": 0, "scores": 1},
+        upsert=True, return_document=ReturnDocument.AFTER
+    )
+    return doc or {}
+
+
+async def get_question_stats(quiz_id: str) -> dict:
+    stats = await quiz_stats_collection.find_one(
+        {"quizId": quiz_id}, {"_id": 0, "scores": 0, "guestScores": 0, "rebuiltAt": 0}
+    )
+    return stats or {"quizId": quiz_id, "plays": 0, "questions": {}}
+
+
+def histogram_list(scores: Optional[dict]) -> List[int]:
+    histogram = [0] * HISTOGRAM_BUCKETS
+    for bucket, count in (scores or {}).items():
+        histogram[int(bucket)] = count
+    return histogram
+
+
+def score_distribution(scores: Optional[dict], score: Optional[int] = None) -> dict:
+    """Prosek, medijana i percentil iz histograma - O(101), nezavisno od broja igrača"""
+    histogram = histogram_list(scores)
+    total = sum(histogram)
+    if total == 0:
+        return {"percentile": 0.0, "averageScore": 0.0, "medianScore": 0, "totalPlays": 0}
+
+    average = sum(bucket * count for bucket, count in enumerate(histogram)) / total
+    median = 0
+    seen = 0
+    for bucket, count in enumerate(histogram):
+        seen += count
+        if seen * 2 >= total:
+            median = bucket
+            break
+
+    # "Bolji si od X% igrača" - udeo predaja sa strogo nižim rezultatom
+    percentile = 0.0
+    if score is not None:
+        percentile = round(sum(histogram[:score]) * 100 / total, 1)
+
+    return {
+        "percentile": percentile,
+        "averageScore": round(average, 1),
+        "medianScore": median,
+        "totalPlays": total,
+    }
+
+
+def guest_buckets(doc: dict, logged_in: Dict[str, int]) -> Dict[str, int]:
+    """Histogram gostiju za rebuild. Posle prvog obnavljanja (rebuiltAt) guestScores
+    je potpun; pre toga su gosti iz vremena pre guestScores ono što u živom
+    histogramu prelazi predaje prijavljenih korisnika"""
+    guest_scores = doc.get("guestScores") or {}
+    if doc.get("rebuiltAt"):
+        return dict(guest_scores)
+    scores = doc.get("scores") or {}
+    buckets = {}
+    for bucket in set(scores) | set(guest_scores):
+        count = max(guest_scores.get(bucket, 0), scores.get(bucket, 0) - logged_in.get(bucket, 0))
+        if count > 0:
+            buckets[bucket] = count
+    return buckets
+
+
+async def rebuild_score_histograms(quiz_id: Optional[str] = None, batch_size: int = 500) -> int:
+    """Ponovo izgradi histograme iz `results`, mesečnih zbirova i histograma gostiju;
+    vraća broj obrađenih kvizova.
+
+    plays se postavlja na zbir histograma, a kviz bez ijedne predaje dobija prazan
+    histogram. Predaja tokom prolaza može biti prepisana, pa se pokreće van špica.
+    """
+    histograms = await score_buckets(quiz_id)
+    pipeline = []
+    if quiz_id:
+        pipeline.append({"$match": {"quizId": quiz_id}})
+    pipeline += [
+        {"$group": {"_id": {"quizId": "$quizId", "score": "$score"}, "count": {"$sum": 1}}},
+    ]
+    async for doc in results_collection.aggregate(pipeline, allowDiskUse=True):
+        scores = histograms[doc["_id"]["quizId"]]
+        bucket = str(doc["_id"]["score"])
+        scores[bucket] = scores.get(bucket, 0) + doc["count"]
+
+    current = {}
+    async for doc in quiz_stats_collection.find({"quizId": quiz_id} if quiz_id else {},
+                                                {"_id": 0, "quizId": 1, "scores": 1, "guestScores": 1, "rebuiltAt": 1}):
+        current[doc["quizId"]] = doc
+
+    now = datetime.utcnow()
+    ops = []
+    rebuilt = 0
+    for histogram_quiz_id in set(histograms) | set(current):
+        logged_in = histograms.get(histogram_quiz_id, {})
+        guests = guest_buckets(current.get(histogram_quiz_id, {}), logged_in)
+        scores = dict(logged_in)
+        for bucket, count in guests.items():
+            scores[bucket] = scores.get(bucket, 0) + count
+        ops.append(UpdateOne({"quizId": histogram_quiz_id}, {"$set": {
+            "scores": scores, "guestScores": guests, "plays": sum(scores.values()), "rebuiltAt": now,
+        }}, upsert=True))
+        rebuilt += 1
+        if len(ops) >= batch_size:
+            await quiz_stats_collection.bulk_write(ops, ordered=False)
+            ops = []
+    if ops:
+        await quiz_stats_collection.bulk_write(ops, ordered=False)
+    return rebuilt
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+KvizMajstor dnevni niz igranja - users.stats.streak.
+
+Predaja ažurira niz uslovnim pipeline upisom u istom bulk_write-u kao ostala
+statistika, bez čitanja istorije: isti dan ne menja ništa, juče nastavlja niz,
+stariji dan počinje novi. Dan se računa u vremenskoj zoni igrača (šalje je
+klijent uz predaju, inače DEFAULT_TIMEZONE). Struktura:
+
+    stats.streak: {current, longest, lastDay: "YYYY-MM-DD"}
+
+`current` je dužina niza koji se završava na lastDay; profil ga prikazuje kao 0
+kad je lastDay stariji od juče. Postojeći korisnici se popunjavaju iz istorije,
+u paketima korisnika:
+
+    python streaks.py backfill
+"""
+
+import argparse
+import asyncio
+import os
+import time
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from pymongo import UpdateOne
+
+from database import results_collection, results_monthly_collection, users_collection
+from user_stats import STATS_FIELD
+
+DEFAULT_TIMEZONE = os.environ.get("DEFAULT_TIMEZONE", "Europe/Belgrade")
+STREAK_FIELD = f"{STATS_FIELD}.streak"
+BACKFILL_BATCH_SIZE = 500
+
+
+def zone(name: Optional[str]) -> ZoneInfo:
+    """IANA zona iz predaje; nepoznata ili prazna vraća podrazumevanu"""
+    if name:
+        try:
+            return ZoneInfo(name)
+        except (ZoneInfoNotFoundError, ValueError):
+            pass
+    return ZoneInfo(DEFAULT_TIMEZONE)
+
+
+def local_day(moment: datetime, tz: Optional[str] = None) -> date:
+    """Dan u zoni igrača za UTC vreme (naive, kao u bazi)"""
+    return moment.replace(tzinfo=dt_timezone.utc).astimezone(zone(tz)).date()
+
+
+def day_keys(moment: datetime, tz: Optional[str] = None) -> Tuple[str, str]:
+    """(danas, juče) kao YYYY-MM-DD; juče je kalendarski dan, ne 24h ranije (letnje računanje)"""
+    today = local_day(moment, tz)
+    return today.isoformat(), (today - timedelta(days=1)).isoformat()
+
+
+def streak_update(moment: datetime, tz: Optional[str] = None) -> List[dict]:
+    """Pipeline update za jednu predaju. Dan raniji od lastDay (promena zone) ne menja niz."""
+    today, yesterday = day_keys(moment, tz)
+    last_day = f"${STREAK_FIELD}.lastDay"
+    current = f"${STREAK_FIELD}.current"
+    return [
+        {"$set": {f"{STREAK_FIELD}.current": {"$switch": {
+            "branches": [
+                {"case": {"$gte": [last_day, today]}, "then": current},
+                {"case": {"$eq": [last_day, yesterday]}, "then": {"$add": [current, 1]}},
+            ],
+            "default": 1,
+        }}}},
+        {"$set": {
+            f"{STREAK_FIELD}.longest": {"$max": [f"${STREAK_FIELD}.longest", current]},
+            f"{STREAK_FIELD}.lastDay": {"$max": [last_day, today]},
+        }},
+    ]
+
+
+def current_streak(streak: dict, moment: datetime, tz: Optional[str] = None) -> int:
+    """Niz je živ dok je poslednja igra danas ili juče"""
+    _, yesterday = day_keys(moment, tz)
+    return streak.get("current", 0) if streak.get("lastDay", "") >= yesterday else 0
+
+
+def streak_from_days(days: Iterable[date]) -> Optional[dict]:
+    """Niz iz skupa dana igranja, u istom obliku kao živi upis"""
+    current = longest = 0
+    previous = None
+    for day in sorted(set(days)):
+        current = current + 1 if previous is not None and day - previous == timedelta(days=1) else 1
+        longest = max(longest, current)
+        previous = day
+    if previous is None:
+        return None
+    return {"current": current, "longest": longest, "lastDay": previous.isoformat()}
+
+
+# ---- backfill iz istorije ----
+async def _play_days(user_ids: List[str]) -> Dict[str, Set[date]]:
+    """Dani igranja iz sirovih rezultata; za sabrane mesece poznati su samo prvi i
+    poslednji dan, pa je niz stariji od zadržavanja približan"""
+    days: Dict[str, Set[date]] = {user_id: set() for user_id in user_ids}
+    async for r in results_collection.find({"userId": {"$in": user_ids}}, {"_id": 0, "userId": 1, "completedAt": 1}):
+        days[r["userId"]].add(local_day(r["completedAt"]))
+    async for r in results_monthly_collection.find(
+        {"userId": {"$in": user_ids}}, {"_id": 0, "userId": 1, "firstCompletedAt": 1, "lastCompletedAt": 1}
+    ):
+        days[r["userId"]].update(local_day(r[f]) for f in ("firstCompletedAt", "lastCompletedAt") if r.get(f))
+    return days
+
+
+async def backfill() -> int:
+    updated = 0
+    last_id = ""
+    while True:
+        user_ids = [u["id"] for u in await users_collection.find(
+            {"id": {"$gt": last_id}}, {"_id": 0, "id": 1}
+        ).sort("id", 1).limit(BACKFILL_BATCH_SIZE).to_list(BACKFILL_BATCH_SIZE)]
+        if not user_ids:
+            break
+        last_id = user_ids[-1]
+        ops = []
+        for user_id, days in (await _play_days(user_ids)).items():
+            streak = streak_from_days(days)
+            if streak is None:
+                continue
+            # Predaja posle čitanja istorije je već pomerila lastDay - taj niz je noviji
+            ops.append(UpdateOne(
+                {"id": user_id, "$or": [{f"{STREAK_FIELD}.lastDay": {"$exists": False}},
+                                        {f"{STREAK_FIELD}.lastDay": {"$lte": streak["lastDay"]}}]},
+                {"$set": {STREAK_FIELD: streak}}
+            ))
+        if ops:
+            updated += (await users_collection.bulk_write(ops, ordered=False)).modified_count
+    return updated
+
+
+async def main(args):
+    from database import client
+    started = time.perf_counter()
+    try:
+        count = await backfill()
+        print(f"Niz igranja popunjen za {count} korisnika")
+    finally:
+        client.close()
+    print(f"Trajanje: {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Dnevni niz igranja iz istorije rezultata")
+    parser.add_argument("command", choices=["backfill"])
+    asyncio.run(main(parser.parse_args()))
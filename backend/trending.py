@@ -0,0 +1,38 @@
+import math
+import os
+from datetime import datetime
+from typing import List, Optional
+
+# Popularnost sa eksponencijalnim opadanjem: svaka igra vredi exp(λ·(t - EPOCH)),
+# pa je zbir uporediv između kvizova bez ikakvog periodičnog umanjivanja. Zbir
+# bi brzo prekoračio float, zato se čuva njegov logaritam (quizzes.trending) i
+# igra se dodaje kao log-sum-exp u istom pipeline upisu koji uvećava plays.
+# Trenutna vrednost (igre "skoro") je exp(trending - λ·(sada - EPOCH)).
+HALF_LIFE_HOURS = float(os.environ.get("TRENDING_HALF_LIFE_HOURS", "48"))
+DECAY_RATE = math.log(2) / (HALF_LIFE_HOURS * 3600)  # λ, po sekundi
+EPOCH = datetime(2024, 1, 1)
+TRENDING_FIELD = "trending"
+TOP_N = 24  # Koliko se drži u kešu trake na početnoj strani
+
+
+def play_weight(moment: datetime, count: int = 1) -> float:
+    """log(count · exp(λ·(t - EPOCH)))"""
+    return DECAY_RATE * (moment - EPOCH).total_seconds() + math.log(count)
+
+
+def play_update(count: int, moment: Optional[datetime] = None) -> List[dict]:
+    """Pipeline update za `count` igara: plays += count, trending = log(exp(trending) + exp(w))"""
+    weight = play_weight(moment or datetime.utcnow(), count)
+    current = f"${TRENDING_FIELD}"
+    return [{"$set": {
+        "plays": {"$add": [{"$ifNull": ["$plays", 0]}, count]},
+        TRENDING_FIELD: {"$cond": [
+            {"$eq": [{"$ifNull": [current, None]}, None]},
+            weight,
+            {"$add": [
+                {"$max": [current, weight]},
+                {"$ln": {"$add": [1, {"$exp": {"$multiply": [-1, {"$abs": {"$subtract": [current, weight]}}]}}]}},
+            ]},
+        ]},
+    }}]
+
@@ -0,0 +1,134 @@
+import asyncio
+import hashlib
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from pymongo.errors import DuplicateKeyError
+
+from database import unique_players_collection
+from hyperloglog import HyperLogLog
+
+# Približan broj jedinstvenih igrača po kvizu i danu (HyperLogLog skice).
+# Svaki worker skuplja skice u memoriji i periodično ih spaja u Mongo;
+# spajanje je maksimum po registru, pa redosled i ponavljanje ne smetaju.
+ALL_TIME = "all"
+SITE_WIDE = "*"
+FLUSH_INTERVAL_SECONDS = 10
+MAX_MERGE_RETRIES = 5
+
+logger = logging.getLogger(__name__)
+
+_pending: Dict[Tuple[str, str], HyperLogLog] = {}
+_flush_task: Optional[asyncio.Task] = None
+
+
+def guest_fingerprint(client_ip: str, user_agent: str) -> str:
+    """Anonimni otisak gosta - čuva se samo heš, nikad IP ili user-agent"""
+    digest = hashlib.sha256(f"{client_ip}|{user_agent}".encode("utf-8")).hexdigest()
+    return f"guest:{digest[:32]}"
+
+
+def day_key(moment: Optional[datetime] = None) -> str:
+    return (moment or datetime.utcnow()).strftime("%Y-%m-%d")
+
+
+def record_player(quiz_id: str, player_key: str):
+    """O(1), bez I/O - skica se upisuje u bazu pri sledećem flush-u"""
+    today = day_key()
+    for key in ((quiz_id, today), (quiz_id, ALL_TIME), (SITE_WIDE, today)):
+        sketch = _pending.get(key)
+        if sketch is None:
+            sketch = _pending[key] = HyperLogLog()
+        sketch.add(player_key)
+
+
+async def _merge_into_db(quiz_id: str, day: str, sketch: HyperLogLog):
+    # Optimistički CAS na `rev` - drugi worker može istovremeno spajati istu skicu
+    for _ in range(MAX_MERGE_RETRIES):
+        doc = await unique_players_collection.find_one({"quizId": quiz_id, "day": day})
+        if doc is None:
+            try:
+                await unique_players_collection.insert_one(
+                    {"quizId": quiz_id, "day": day, "registers": sketch.to_bytes(), "rev": 1}
+                )
+                return
+            except DuplicateKeyError:
+                continue
+
+        merged = HyperLogLog(doc["registers"]).merge(sketch)
+        result = await unique_players_collection.update_one(
+            {"quizId": quiz_id, "day": day, "rev": doc["rev"]},
+            {"$set": {"registers": merged.to_bytes()}, "$inc": {"rev": 1}}
+        )
+        if result.modified_count:
+            return
+    raise RuntimeError(f"HyperLogLog merge nije uspeo za {quiz_id}/{day}")
+
+
+async def flush_pending():
+    global _pending
+    if not _pending:
+        return
+    batch, _pending = _pending, {}
+    for (quiz_id, day), sketch in batch.items():
+        try:
+            await _merge_into_db(quiz_id, day, sketch)
+        except Exception as e:
+            # Vrati skicu u bafer da se ne izgubi do sledećeg pokušaja
+            logger.warning(f"Flush jedinstvenih igrača nije uspeo: {e}")
+            existing = _pending.get((quiz_id, day))
+            _pending[(quiz_id, day)] = existing.merge(sketch) if existing else sketch
+
+
+async def _flush_loop():
+    while True:
+        await asyncio.sleep(FLUSH_INTERVAL_SECONDS)
+        await flush_pending()
+
+
+def start_flusher():
+    global _flush_task
+    if _flush_task is None:
+        _flush_task = asyncio.create_task(_flush_loop())
+
+
+async def stop_flusher():
+    global _flush_task
+    if _flush_task is not None:
+        _flush_task.cancel()
+        _flush_task = None
+    await flush_pending()
+
+
+async def count_unique_players(quiz_id: str, days: List[str]) -> Tuple[int, List[dict]]:
+    """Unija dnevnih skica za dati prozor + procena po danu"""
+    docs = await unique_players_collection.find(
+        {"quizId": quiz_id, "day": {"$in": days}}, {"_id": 0, "day": 1, "registers": 1}
+    ).to_list(len(days))
+    by_day = {d["day"]: HyperLogLog(d["registers"]) for d in docs}
+
+    union = HyperLogLog()
+    daily = []
+    for day in days:
+        sketch = by_day.get(day)
+        pending = _pending.get((quiz_id, day))
+        if pending is not None:
+            sketch = HyperLogLog(pending.to_bytes()).merge(sketch) if sketch else pending
+        daily.append({"day": day, "uniquePlayers": sketch.count() if sketch else 0})
+        if sketch:
+            union.merge(sketch)
+    return union.count(), daily
+
+
+async def count_all_time(quiz_id: str) -> int:
+    doc = await unique_players_collection.find_one({"quizId": quiz_id, "day": ALL_TIME}, {"registers": 1})
+    sketch = HyperLogLog(doc["registers"]) if doc else HyperLogLog()
+    pending = _pending.get((quiz_id, ALL_TIME))
+    if pending is not None:
+        sketch.merge(pending)
+    return sketch.count()
+
+
+def window_days(days: int) -> List[str]:
+    today = datetime.utcnow()
+    return [day_key(today - timedelta(days=offset)) for offset in range(days - 1, -1, -1)]
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+KvizMajstor statistika korisnika - materijalizovan users.stats.
+
+Predaja ažurira users.stats u istom upisu kao totalScore ($inc brojača,
+$max najboljeg rezultata i vremena, $push sa $slice za poslednje igre), pa
+profil čita jedan dokument. Struktura:
+
+    stats: {plays, scoreSum, correctCount, totalQuestions, passedCount, bestScore,
+            lastPlayedAt, categories: {<id>: {plays, scoreSum, correctCount,
+            totalQuestions, bestScore}}, recent: [{quizId, quizTitle, score, completedAt}]}
+
+Postojeći korisnici se popunjavaju jednom iz istorije, odmah posle uvođenja
+(korisnici koji već imaju stats se preskaču). --rebuild prepisuje stats svima iz
+istorije, npr. posle sesija i soba koje su igre upisivale pod kategoriju "none";
+pokreće se van špica, jer predaja tokom prolaza može biti prepisana:
+
+    python user_stats.py backfill
+    python user_stats.py backfill --rebuild
+"""
+
+import argparse
+import asyncio
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from pymongo import UpdateOne
+
+from database import quizzes_collection, results_collection, results_monthly_collection, users_collection
+from retention import recent_results
+from stats import question_key
+
+STATS_FIELD = "stats"
+RECENT_LIMIT = 10
+COUNTERS = ("plays", "scoreSum", "correctCount", "totalQuestions")
+BACKFILL_BATCH_SIZE = 500
+
+
+def category_key(category_id: Optional[str]) -> str:
+    return question_key(str(category_id or "none"))
+
+
+def stats_update(quiz: dict, result: dict) -> dict:
+    """Delovi Mongo update-a za jednu predaju; spaja se sa $inc za totalScore"""
+    category = f"{STATS_FIELD}.categories.{category_key(quiz.get('categoryId'))}"
+    values = {"plays": 1, "scoreSum": result["score"], "correctCount": result["correctCount"],
+              "totalQuestions": result["totalQuestions"]}
+    inc = {f"{STATS_FIELD}.{name}": value for name, value in values.items()}
+    inc.update({f"{category}.{name}": value for name, value in values.items()})
+    inc[f"{STATS_FIELD}.passedCount"] = 1 if result["passed"] else 0
+    return {
+        "$inc": inc,
+        "$max": {
+            f"{STATS_FIELD}.bestScore": result["score"],
+            f"{category}.bestScore": result["score"],
+            f"{STATS_FIELD}.lastPlayedAt": result["completedAt"],
+        },
+        "$push": {f"{STATS_FIELD}.recent": {
+            "$each": [{"quizId": quiz["id"], "quizTitle": quiz.get("title", ""),
+                       "score": result["score"], "completedAt": result["completedAt"]}],
+            "$position": 0,
+            "$slice": RECENT_LIMIT,
+        }},
+    }
+
+
+def average(stats: dict) -> int:
+    return stats.get("scoreSum", 0) // stats["plays"] if stats.get("plays") else 0
+
+
+def accuracy(stats: dict) -> float:
+    total = stats.get("totalQuestions", 0)
+    return round(100 * stats.get("correctCount", 0) / total, 1) if total else 0.0
+
+
+# ---- backfill iz istorije ----
+def fold_history(rows: List[dict], categories: Dict[str, str]) -> Dict[str, dict]:
+    """Redovi {userId, quizId, plays, scoreSum, correctCount, totalQuestions, passedCount,
+    bestScore} (sirovi ili mesečni) u users.stats po korisniku, bez poslednjih igara"""
+    users: Dict[str, dict] = {}
+    for row in rows:
+        stats = users.setdefault(row["userId"], {"categories": defaultdict(lambda: defaultdict(int))})
+        category = stats["categories"][category_key(categories.get(row["quizId"]))]
+        for name in COUNTERS:
+            stats[name] = stats.get(name, 0) + row.get(name, 0)
+            category[name] += row.get(name, 0)
+        stats["passedCount"] = stats.get("passedCount", 0) + row.get("passedCount", 0)
+        stats["bestScore"] = max(stats.get("bestScore", 0), row.get("bestScore", 0))
+        category["bestScore"] = max(category["bestScore"], row.get("bestScore", 0))
+        if row.get("lastPlayedAt") and row["lastPlayedAt"] > stats.get("lastPlayedAt", datetime.min):
+            stats["lastPlayedAt"] = row["lastPlayedAt"]
+    for stats in users.values():
+        stats["categories"] = {key: dict(c) for key, c in stats["categories"].items()}
+    return users
+
+
+async def _history_rows() -> List[dict]:
+    rows = []
+    async for doc in results_collection.aggregate([
+        {"$group": {
+            "_id": {"userId": "$userId", "quizId": "$quizId"},
+            "plays": {"$sum": 1}, "scoreSum": {"$sum": "$score"},
+            "correctCount": {"$sum": "$correctCount"}, "totalQuestions": {"$sum": "$totalQuestions"},
+            "passedCount": {"$sum": {"$cond": ["$passed", 1, 0]}},
+            "bestScore": {"$max": "$score"}, "lastPlayedAt": {"$max": "$completedAt"},
+        }},
+    ], allowDiskUse=True):
+        rows.append(dict(doc, **doc.pop("_id")))
+    async for doc in results_monthly_collection.find({}, {"_id": 0, "scores": 0, "appliedBatches": 0}):
+        rows.append(dict(doc, lastPlayedAt=doc.get("lastCompletedAt")))
+    return rows
+
+
+async def backfill(rebuild: bool = False) -> int:
+    categories = {q["id"]: q.get("categoryId") async for q in quizzes_collection.find({}, {"_id": 0, "id": 1, "categoryId": 1})}
+    titles = {}
+    history = fold_history(await _history_rows(), categories)
+    ops = []
+    for user_id, stats in history.items():
+        recent = await recent_results(user_id, RECENT_LIMIT)
+        missing = {r["quizId"] for r in recent} - set(titles)
+        if missing:
+            async for q in quizzes_collection.find({"id": {"$in": list(missing)}}, {"_id": 0, "id": 1, "title": 1}):
+                titles[q["id"]] = q["title"]
+        stats["recent"] = [
+            {"quizId": r["quizId"], "quizTitle": titles.get(r["quizId"], ""), "score": r["score"],
+             "completedAt": r["completedAt"]}
+            for r in recent if r["quizId"] in titles
+        ]
+        if rebuild:
+            # Polje po polje, da ostane niz igranja (streaks.py), koji se ovde ne računa
+            ops.append(UpdateOne({"id": user_id}, {"$set": {f"{STATS_FIELD}.{k}": v for k, v in stats.items()}}))
+        else:
+            # Samo korisnici bez statistike - predaje posle uvođenja su već upisane
+            ops.append(UpdateOne({"id": user_id, STATS_FIELD: {"$exists": False}}, {"$set": {STATS_FIELD: stats}}))
+        if len(ops) >= BACKFILL_BATCH_SIZE:
+            await users_collection.bulk_write(ops, ordered=False)
+            ops = []
+    if ops:
+        await users_collection.bulk_write(ops, ordered=False)
+    return len(history)
+
+
+async def main(args):
+    from database import client
+    started = time.perf_counter()
+    try:
+        count = await backfill(args.rebuild)
+        print(f"Statistika popunjena za {count} korisnika")
+    finally:
+        client.close()
+    print(f"Trajanje: {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Materijalizovana statistika korisnika")
+    parser.add_argument("command", choices=["backfill"])
+    parser.add_argument("--rebuild", action="store_true", help="Prepiši postojeću statistiku iz istorije")
+    asyncio.run(main(parser.parse_args()))
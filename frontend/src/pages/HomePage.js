@@ -1,12 +1,22 @@
-import React from 'react';
+import React, { useState, useEffect } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { Button } from '../components/ui/button';
 import { Card, CardContent } from '../components/ui/card';
 import { mockCategories, mockQuizzes, mockLeaderboard } from '../utils/mock';
+import { dailyQuizAPI, quizzesAPI } from '../utils/api';
 import { Sparkles, Trophy, Users, Zap, Award, Medal } from 'lucide-react';
 
 const HomePage = () => {
   const navigate = useNavigate();
+  const [dailyQuiz, setDailyQuiz] = useState(null);
+  const [dailyLeaders, setDailyLeaders] = useState([]);
+  const [trendingQuizzes, setTrendingQuizzes] = useState([]);
+
+  useEffect(() => {
+    dailyQuizAPI.get().then(setDailyQuiz).catch(() => setDailyQuiz(null));
+    dailyQuizAPI.getLeaderboard(5).then(setDailyLeaders).catch(() => setDailyLeaders([]));
+    quizzesAPI.getTrending(6).then(setTrendingQuizzes).catch(() => setTrendingQuizzes([]));
+  }, []);
 
   return (
     <div className="min-h-screen bg-gradient-to-br from-orange-50 via-yellow-50 to-pink-50">
@@ -64,6 +74,68 @@ const HomePage = () => {
         </div>
       </section>
 
+      {/* Kviz Dana */}
+      {dailyQuiz && (
+        <section className="px-6 -mt-16 mb-16 relative z-10">
+          <div className="max-w-4xl mx-auto">
+            <Card className="border-4 border-orange-300 shadow-2xl bg-gradient-to-br from-yellow-50 to-orange-50">
+              <CardContent className="p-8">
+                <div className="flex items-center justify-between flex-wrap gap-6">
+                  <div>
+                    <span className="bg-orange-500 text-white px-4 py-1 rounded-full text-sm font-bold">
+                      ⭐ KVIZ DANA • {dailyQuiz.day}
+                    </span>
+                    <h2 className="text-3xl font-black text-gray-800 mt-4 mb-2">{dailyQuiz.quiz.title}</h2>
+                    <p className="text-gray-600 font-medium">{dailyQuiz.quiz.description}</p>
+                    <p className="text-sm text-gray-500 font-bold mt-2">{dailyQuiz.quiz.questionCount} pitanja</p>
+                  </div>
+                  <Button
+                    onClick={() => navigate(`/quiz/${dailyQuiz.quiz.id}`)}
+                    className="bg-gradient-to-r from-orange-500 to-pink-500 hover:from-orange-600 hover:to-pink-600 text-white px-8 py-6 text-lg font-bold rounded-2xl shadow-xl"
+                  >
+                    <Zap className="mr-2" />
+                    Prihvati Izazov!
+                  </Button>
+                </div>
+                {dailyLeaders.length > 0 && (
+                  <div className="mt-6 pt-4 border-t-2 border-orange-200 space-y-2">
+                    {dailyLeaders.map((entry, idx) => (
+                      <div key={entry.id} className="flex items-center justify-between font-bold text-gray-700">
+                        <span>{idx + 1}. {entry.avatar} {entry.username}</span>
+                        <span className="text-orange-600">{entry.score}%</span>
+                      </div>
+                    ))}
+                  </div>
+                )}
+              </CardContent>
+            </Card>
+          </div>
+        </section>
+      )}
+
+      {/* Popularno Sada */}
+      {trendingQuizzes.length > 0 && (
+        <section className="px-6 mb-16">
+          <div className="max-w-7xl mx-auto">
+            <h2 className="text-3xl font-black text-gray-800 mb-6">🔥 Popularno Sada</h2>
+            <div className="grid grid-cols-2 md:grid-cols-3 lg:grid-cols-6 gap-4">
+              {trendingQuizzes.map((quiz) => (
+                <Card
+                  key={quiz.id}
+                  onClick={() => navigate(`/quiz/${quiz.id}`)}
+                  className="cursor-pointer border-4 border-pink-200 shadow-lg transform hover:scale-105 transition-all"
+                >
+                  <CardContent className="p-4">
+                    <h3 className="font-black text-gray-800 text-sm mb-1">{quiz.title}</h3>
+                    <p className="text-xs text-gray-600 font-bold">{quiz.plays} igranja</p>
+                  </CardContent>
+                </Card>
+              ))}
+            </div>
+          </div>
+        </section>
+      )}
+
       {/* Sekcija Karakteristika */}
       <section className="py-20 px-6 bg-white/50 backdrop-blur-sm relative overflow-hidden">
         {/* Pozadinski naučni elementi */}
@@ -1,16 +1,43 @@
-import React, { useEffect, useRef } from 'react';
+import React, { useEffect, useRef, useState } from 'react';
 import { useLocation, useNavigate } from 'react-router-dom';
 import { Card, CardContent } from '../components/ui/card';
 import { Button } from '../components/ui/button';
 import { Trophy, Target, Clock, Share2, BookOpen } from 'lucide-react';
 import YouTubePlayer from '../components/YouTubePlayer';
 import confetti from 'canvas-confetti';
+import { quizzesAPI } from '../utils/api';
+import { useAuth } from '../context/AuthContext';
 
 const QuizResultPage = () => {
   const location = useLocation();
   const navigate = useNavigate();
   const { result, quiz, userAnswers, questions } = location.state || {};
   const fireworksFiredRef = useRef(false);
+  const { isAuthenticated } = useAuth();
+  const [highScores, setHighScores] = useState([]);
+  const [myRating, setMyRating] = useState(null);
+
+  // Najbolji rezultati na ovom kvizu (jedan dokument, keširan na serveru)
+  useEffect(() => {
+    if (!quiz?.id) return;
+    quizzesAPI.getHighScores(quiz.id)
+      .then((data) => setHighScores(data.entries))
+      .catch(() => setHighScores([]));
+    if (isAuthenticated) {
+      quizzesAPI.getMyRating(quiz.id)
+        .then((data) => setMyRating(data.rating))
+        .catch(() => setMyRating(null));
+    }
+  }, [quiz?.id, isAuthenticated]);
+
+  const handleRate = async (rating) => {
+    try {
+      await quizzesAPI.rate(quiz.id, rating);
+      setMyRating(rating);
+    } catch (error) {
+      console.error('Greška pri oceni kviza:', error);
+    }
+  };
 
   if (!result || !quiz) {
     return (
@@ -257,9 +284,62 @@ const QuizResultPage = () => {
                 <p className="text-3xl font-black text-pink-600">{quiz.timeLimit}m</p>
               </div>
             </div>
+
+            {result.averageScore !== undefined && (
+              <div className="mt-6 bg-yellow-50 rounded-2xl p-6 text-center border-2 border-yellow-200">
+                <p className="text-2xl font-black text-yellow-700 mb-2">
+                  Bolji si od {result.percentile}% igrača! 🏅
+                </p>
+                <p className="text-sm font-bold text-gray-600">
+                  Prosek: {result.averageScore}% · Medijana: {result.medianScore}%
+                </p>
+              </div>
+            )}
           </CardContent>
         </Card>
 
+        {/* Ocena Kviza */}
+        {isAuthenticated && (
+          <Card className="border-4 border-yellow-300 shadow-xl mb-8">
+            <CardContent className="p-8 text-center">
+              <h2 className="text-2xl font-black text-gray-800 mb-4">Kako vam se dopao kviz?</h2>
+              <div className="flex justify-center gap-2">
+                {[1, 2, 3, 4, 5].map((value) => (
+                  <button
+                    key={value}
+                    onClick={() => handleRate(value)}
+                    className={`text-4xl transition-transform hover:scale-125 ${myRating && value <= myRating ? '' : 'grayscale opacity-40'}`}
+                  >
+                    ⭐
+                  </button>
+                ))}
+              </div>
+            </CardContent>
+          </Card>
+        )}
+
+        {/* Najbolji Rezultati */}
+        {highScores.length > 0 && (
+          <Card className="border-4 border-purple-300 shadow-xl mb-8">
+            <CardContent className="p-8">
+              <h2 className="text-3xl font-black text-purple-600 mb-6 flex items-center gap-2">
+                🏆 Najbolji Rezultati
+              </h2>
+              <div className="space-y-2">
+                {highScores.map((entry) => (
+                  <div key={entry.userId} className="flex items-center gap-4 p-3 bg-white rounded-xl border-2 border-gray-200">
+                    <div className="flex items-center justify-center w-10 h-10 rounded-full bg-purple-100 font-black text-purple-600">
+                      #{entry.rank}
+                    </div>
+                    <p className="flex-1 font-bold text-gray-800">{entry.username}</p>
+                    <p className="text-xl font-black text-purple-600">{entry.score}%</p>
+                  </div>
+                ))}
+              </div>
+            </CardContent>
+          </Card>
+        )}
+
         {/* Pogrešni Odgovori */}
         {userAnswers && questions && (() => {
           const wrongAnswers = [];
@@ -62,6 +62,23 @@ export const quizzesAPI = {
     const response = await api.get('/quizzes', { params });
     return response.data;
   },
+
+  // Popularno poslednjih dana (params.sort = 'trending' sortira i punu listu)
+  getTrending: async (limit = 8) => {
+    const response = await api.get('/quizzes/trending', { params: { limit } });
+    return response.data;
+  },
+
+  // Ocena 1-5; ponovna ocena zamenjuje prethodnu
+  rate: async (id, rating) => {
+    const response = await api.put(`/quizzes/${id}/rating`, { rating });
+    return response.data;
+  },
+
+  getMyRating: async (id) => {
+    const response = await api.get(`/quizzes/${id}/rating/me`);
+    return response.data;
+  },
   
   getById: async (id) => {
     const response = await api.get(`/quizzes/${id}`);
@@ -73,6 +90,16 @@ export const quizzesAPI = {
     return response.data;
   },
   
+  getStats: async (id) => {
+    const response = await api.get(`/quizzes/${id}/stats`);
+    return response.data;
+  },
+  
+  getHighScores: async (id) => {
+    const response = await api.get(`/quizzes/${id}/high-scores`);
+    return response.data;
+  },
+  
   getForEdit: async (id) => {
     const response = await api.get(`/quizzes/${id}/edit`);
     return response.data;
@@ -83,6 +110,17 @@ export const quizzesAPI = {
     return response.data;
   },
   
+  // Masovni uvoz (.xlsx, .csv, .ndjson); options: title, description, categoryId, timeLimit, dryRun
+  importFile: async (file, options = {}) => {
+    const form = new FormData();
+    form.append('file', file);
+    Object.entries(options).forEach(([key, value]) => form.append(key, value));
+    const response = await api.post('/quizzes/import', form, {
+      headers: { 'Content-Type': 'multipart/form-data' },
+    });
+    return response.data;
+  },
+  
   update: async (id, quizData) => {
     const response = await api.put(`/quizzes/${id}`, quizData);
     return response.data;
@@ -93,24 +131,96 @@ export const quizzesAPI = {
     return response.data;
   },
   
+  // Izmene pojedinačnih pitanja; version je verzija kviza iz poslednjeg čitanja (409 ako je zastarela)
+  addQuestion: async (id, version, question, position = null) => {
+    const response = await api.post(`/quizzes/${id}/questions`, { version, question, position });
+    return response.data;
+  },
+  
+  updateQuestion: async (id, questionId, version, changes) => {
+    const response = await api.patch(`/quizzes/${id}/questions/${questionId}`, { version, ...changes });
+    return response.data;
+  },
+  
+  moveQuestion: async (id, questionId, version, position) => {
+    const response = await api.patch(`/quizzes/${id}/questions/${questionId}/position`, { version, position });
+    return response.data;
+  },
+  
+  removeQuestion: async (id, questionId, version) => {
+    const response = await api.delete(`/quizzes/${id}/questions/${questionId}`, { params: { version } });
+    return response.data;
+  },
+  
   submit: async (id, answers) => {
-    const response = await api.post(`/quizzes/${id}/submit`, { answers });
+    // Vremenska zona pregledača određuje dan za dnevni niz igranja
+    const timezone = Intl.DateTimeFormat().resolvedOptions().timeZone;
+    const response = await api.post(`/quizzes/${id}/submit`, { answers, timezone });
+    return response.data;
+  },
+};
+
+// Timed quiz sessions API (bonus za brzinu se računa na serveru)
+export const sessionsAPI = {
+  start: async (quizId) => {
+    const response = await api.post(`/quizzes/${quizId}/sessions`);
+    return response.data;
+  },
+  
+  answer: async (sessionId, questionId, answer) => {
+    const response = await api.post(`/sessions/${sessionId}/answer`, { questionId, answer });
+    return response.data;
+  },
+  
+  finish: async (sessionId) => {
+    const response = await api.post(`/sessions/${sessionId}/finish`);
+    return response.data;
+  },
+};
+
+// Kviz dana (bira ga server jednom dnevno)
+export const dailyQuizAPI = {
+  get: async () => {
+    const response = await api.get('/daily-quiz');
+    return response.data;
+  },
+
+  getLeaderboard: async (limit = 10) => {
+    const response = await api.get('/daily-quiz/leaderboard', { params: { limit } });
     return response.data;
   },
 };
 
 // Leaderboard API
 export const leaderboardAPI = {
-  get: async () => {
-    const response = await api.get('/leaderboard');
+  // window: day | week | month | all
+  get: async (window = 'all') => {
+    const response = await api.get('/leaderboard', { params: { window } });
     return response.data;
   },
+  // n korisnika iznad i ispod prijavljenog, sa tačnim rangom
+  getAroundMe: async (n = 5) => {
+    const response = await api.get('/leaderboard/around-me', { params: { n } });
+    return response.data;
+  },
+  getCategory: async (categoryId, limit = 50) => {
+    const response = await api.get(`/categories/${categoryId}/leaderboard`, { params: { limit } });
+    return response.data;
+  },
+  // Tabela uživo (SSE): prvo ceo snimak, zatim samo promene; vraća funkciju za odjavu
+  subscribe: (onSnapshot, onDelta) => {
+    const source = new EventSource(`${API_BASE}/leaderboard/stream`);
+    source.addEventListener('snapshot', (e) => onSnapshot(JSON.parse(e.data)));
+    source.addEventListener('delta', (e) => onDelta(JSON.parse(e.data)));
+    return () => source.close();
+  },
 };
 
 // User API
 export const userAPI = {
   getProgress: async () => {
-    const response = await api.get('/users/progress');
+    const timezone = Intl.DateTimeFormat().resolvedOptions().timeZone;
+    const response = await api.get('/users/progress', { params: { timezone } });
     return response.data;
   },
 };
@@ -136,6 +246,28 @@ export const adminAPI = {
     const response = await api.delete(`/admin/categories/${categoryId}`);
     return response.data;
   },
+  
+  profile: async (seconds = 10) => {
+    const response = await api.post('/admin/profile', null, { params: { seconds } });
+    return response.data;
+  },
+  
+  // params: format (ndjson|csv), quizId, categoryId, userId, from, to, gzip
+  exportResults: async (params = {}) => {
+    const response = await api.get('/admin/results/export', { params, responseType: 'blob' });
+    return response.data;
+  },
+  
+  getResultsRetention: async () => {
+    const response = await api.get('/admin/results/retention');
+    return response.data;
+  },
+  
+  // Napredak pozadinskog čišćenja posle brisanja kvizova
+  getCleanupJobs: async (status = null) => {
+    const response = await api.get('/admin/cleanup/jobs', { params: status ? { status } : {} });
+    return response.data;
+  },
 };
 
 export default api;
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+KvizMajstor Live Room Load Test
+Povezuje N igrača na jednu multiplayer sobu i meri:
+1. vreme povezivanja svih igrača
+2. kašnjenje od komande domaćina do prijema pitanja kod svih igrača
+3. broj igrača koji su primili reveal i finalno mesto
+
+Pokretanje (jedan uvicorn worker):
+    cd backend && uvicorn server:app --port 8001
+    python room_load_test.py --players 5000 --quiz-id <ID> --token <JWT>
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import resource
+import statistics
+import time
+
+import requests
+import websockets
+
+BASE_URL = "http://localhost:8001/api"
+WS_URL = "ws://localhost:8001/api"
+
+
+def log(message: str, level: str = "INFO"):
+    print(f"[{level}] {message}")
+
+
+class PlayerClient:
+    def __init__(self, code: str, index: int):
+        self.code = code
+        self.index = index
+        self.question_received = {}
+        self.reveals = 0
+        self.final_rank = None
+        self.ws = None
+
+    async def connect(self):
+        self.ws = await websockets.connect(
+            f"{WS_URL}/rooms/{self.code}/ws?name=Igrac{self.index}", max_queue=64, open_timeout=60
+        )
+
+    async def run(self):
+        async for raw in self.ws:
+            message = json.loads(raw)
+            kind = message["type"]
+            if kind == "question":
+                index = message["questionIndex"]
+                self.question_received[index] = time.perf_counter()
+                # Odgovori nasumično posle kratke pauze
+                await asyncio.sleep(random.uniform(0.1, 1.5))
+                options = message["question"].get("options") or ["true", "false"]
+                await self.ws.send(json.dumps({
+                    "type": "answer", "questionIndex": index, "answer": random.choice(options)
+                }))
+            elif kind == "reveal":
+                self.reveals += 1
+            elif kind == "final_rank":
+                self.final_rank = message["rank"]
+                break
+
+
+async def main(players: int, quiz_id: str, token: str, seconds: int):
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < players + 100:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (min(hard, players + 1000), hard))
+
+    response = requests.post(
+        f"{BASE_URL}/rooms", json={"quizId": quiz_id, "timePerQuestion": seconds},
+        headers={"Authorization": f"Bearer {token}"}, timeout=30
+    )
+    response.raise_for_status()
+    room = response.json()
+    code = room["code"]
+    log(f"Soba {code}: {room['questionCount']} pitanja, {players} igrača")
+
+    host = await websockets.connect(f"{WS_URL}/rooms/{code}/ws?role=host&token={token}")
+    reveals = asyncio.Queue()
+
+    async def host_reader():
+        # Domaćin mora stalno čitati, inače ga server tretira kao sporog klijenta
+        async for raw in host:
+            message = json.loads(raw)
+            if message["type"] == "reveal":
+                reveals.put_nowait(message)
+
+    host_task = asyncio.create_task(host_reader())
+
+    clients = [PlayerClient(code, i) for i in range(players)]
+    started = time.perf_counter()
+    for batch_start in range(0, players, 200):
+        await asyncio.gather(*(c.connect() for c in clients[batch_start:batch_start + 200]))
+    log(f"Povezano {players} igrača za {time.perf_counter() - started:.1f}s")
+
+    tasks = [asyncio.create_task(c.run()) for c in clients]
+    sent_at = {}
+    for index in range(room["questionCount"]):
+        await asyncio.sleep(1)
+        sent_at[index] = time.perf_counter()
+        await host.send(json.dumps({"type": "next"}))
+        message = await reveals.get()
+        log(f"Pitanje {index + 1}: odgovorilo {message['answered']}/{message['playerCount']}")
+
+    await host.send(json.dumps({"type": "end"}))
+    await asyncio.wait_for(asyncio.gather(*tasks, return_exceptions=True), timeout=120)
+
+    latencies = [
+        (c.question_received[i] - sent_at[i]) * 1000
+        for c in clients for i in c.question_received
+    ]
+    if latencies:
+        latencies.sort()
+        log(f"Fan-out pitanja: median {statistics.median(latencies):.0f} ms, "
+            f"p99 {latencies[int(len(latencies) * 0.99) - 1]:.0f} ms, max {latencies[-1]:.0f} ms")
+    finished = sum(1 for c in clients if c.final_rank is not None)
+    level = "PASS" if finished == players else "FAIL"
+    log(f"Završilo igru: {finished}/{players}", level)
+
+    await host.close()
+    host_task.cancel()
+    for c in clients:
+        await c.ws.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test za multiplayer sobe")
+    parser.add_argument("--players", type=int, default=5000)
+    parser.add_argument("--quiz-id", required=True)
+    parser.add_argument("--token", required=True, help="JWT prijavljenog korisnika (domaćin)")
+    parser.add_argument("--seconds", type=int, default=10, help="Vreme po pitanju")
+    args = parser.parse_args()
+    asyncio.run(main(args.players, args.quiz_id, args.token, args.seconds))
@@ -0,0 +1,34 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# Backend moduli se uvoze kao top-level (kao kada uvicorn startuje iz backend/)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+# database.py zahteva MONGO_URL; klijent se ne povezuje dok se ne izvrši upit
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+
+
+@pytest.fixture
+def mongo(monkeypatch):
+    """Kolekcije iz database.py zamenjene mongomock bazom u svim već uvezenim modulima.
+
+    Za testove toka kroz bazu (predaja, čišćenje); čista logika se testira bez baze.
+    """
+    mongomock_motor = pytest.importorskip("mongomock_motor")
+    import database
+
+    db = mongomock_motor.AsyncMongoMockClient()["kviz_test"]
+    originals = {
+        name: value for name, value in vars(database).items()
+        if name.endswith("_collection") or name == "db"
+    }
+    for module in list(sys.modules.values()):
+        module_vars = getattr(module, "__dict__", None)
+        if module_vars is None:
+            continue
+        for name, original in originals.items():
+            if module_vars.get(name) is original:
+                monkeypatch.setattr(module, name, db if name == "db" else db[original.name])
+    return db
@@ -0,0 +1,42 @@
+from badges import counter_updates, is_fast, new_badges, profile_badges
+
+
+def event(user_id, score, points=None, category="3", total=10):
+    return {"userId": user_id, "quizId": "k", "categoryId": category, "score": score,
+            "totalQuestions": total, "points": points}
+
+
+def test_counters_are_summed_per_user():
+    updates = counter_updates([event("a", 100), event("a", 60, category="1"), event(None, 100)])
+    assert set(updates) == {"a"}
+    inc = updates["a"]["$inc"]
+    assert inc["badgeStats.plays"] == 2 and inc["badgeStats.perfect"] == 1
+    assert inc["badgeStats.categories.3.scoreSum"] == 100 and inc["badgeStats.categories.1.plays"] == 1
+    # Niz savršenih je prekinut, ostaje 0
+    assert updates["a"]["$set"] == {"badgeStats.perfectStreak": 0}
+
+
+def test_unbroken_streak_is_incremented_and_broken_one_restarts():
+    assert counter_updates([event("a", 100)])["a"]["$inc"]["badgeStats.perfectStreak"] == 1
+    update = counter_updates([event("a", 50), event("a", 100), event("a", 100)])["a"]
+    assert update["$set"] == {"badgeStats.perfectStreak": 2}
+    assert "badgeStats.perfectStreak" not in update["$inc"]
+
+
+def test_fast_requires_timed_play_with_most_bonus_points():
+    assert is_fast(event("a", 100, points=14000))
+    assert not is_fast(event("a", 100, points=10000))  # Bez bonusa za brzinu
+    assert not is_fast(event("a", 100))  # Igra bez merenja vremena
+
+
+def test_badges_are_awarded_once():
+    user = {"badges": ["1"], "badgeStats": {"plays": 12, "perfectStreak": 5,
+                                            "categories": {"3": {"plays": 5, "scoreSum": 450}}}}
+    assert new_badges(user) == ["3", "5", "6"]
+    assert new_badges(dict(user, badges=["1", "3", "5", "6"])) == []
+    assert [b["earned"] for b in profile_badges(user)] == [True, False, False, False, False, False, False]
+
+
+def test_daily_streak_badge_reads_longest_streak():
+    user = {"badges": ["1"], "stats": {"streak": {"current": 1, "longest": 7, "lastDay": "2025-06-01"}}}
+    assert new_badges(user) == ["7"]
@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+from bitsets import correctness_matrix, decode_correctness, encode_correctness
+
+
+def test_encode_is_one_bit_per_question():
+    assert encode_correctness([]) == b""
+    assert len(encode_correctness([True] * 8)) == 1
+    assert len(encode_correctness([True] * 9)) == 2
+
+
+def test_bit_order_matches_question_order():
+    # Pitanje 0 je najniži bit prvog bajta
+    assert encode_correctness([True, False, False]) == b"\x01"
+    assert encode_correctness([False] * 8 + [True]) == b"\x00\x01"
+
+
+def test_roundtrip():
+    flags = [True, False, True, True, False, False, False, False, True, True, False]
+    assert decode_correctness(encode_correctness(flags), len(flags)) == flags
+
+
+def test_matrix_rows_align_with_results_and_questions():
+    rows = [
+        [True, False, True, False, True, False, True, False, True, False],
+        [False] * 10,
+        [True] * 10,
+    ]
+    matrix = correctness_matrix([encode_correctness(r) for r in rows], 10)
+    assert matrix.shape == (3, 10)
+    assert matrix.dtype == bool
+    np.testing.assert_array_equal(matrix, np.array(rows))
+    np.testing.assert_array_equal(matrix.sum(axis=0), [2, 1, 2, 1, 2, 1, 2, 1, 2, 1])
+
+
+def test_matrix_empty_input():
+    assert correctness_matrix([], 5).shape == (0, 5)
+
+
+def test_matrix_rejects_mixed_lengths():
+    with pytest.raises(ValueError):
+        correctness_matrix([b"\x01", b"\x01\x00"], 9)
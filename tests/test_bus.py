@@ -0,0 +1,266 @@
+import asyncio
+import json
+
+import pytest
+
+import bus as bus_module
+import cache
+import rooms
+from bus import Bus, BrokerTransport, InProcessHub, InProcessTransport, start_broker
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+async def _settle():
+    # Flush petlja čeka FLUSH_INTERVAL_SECONDS pa šalje paket
+    await asyncio.sleep(0.15)
+
+
+def test_publish_reaches_other_worker_once():
+    async def scenario():
+        hub = InProcessHub()
+        a, b = Bus(InProcessTransport(hub)), Bus(InProcessTransport(hub))
+        await a.start()
+        await b.start()
+        seen_a, seen_b = [], []
+        a.subscribe("quiz.updated", lambda channel, data: seen_a.append(data))
+        b.subscribe("quiz.updated", lambda channel, data: seen_b.append(data))
+
+        a.publish("quiz.updated", {"quizId": "q1"})
+        assert seen_a == []  # Lokalna isporuka je u sledećem krugu petlje, ne u publish()
+        await _settle()
+        await a.stop()
+        await b.stop()
+        return seen_a, seen_b
+
+    seen_a, seen_b = run(scenario())
+    assert seen_a == [{"quizId": "q1"}]
+    assert seen_b == [{"quizId": "q1"}]
+
+
+def test_local_false_skips_own_worker_and_prefix_match():
+    async def scenario():
+        hub = InProcessHub()
+        a, b = Bus(InProcessTransport(hub)), Bus(InProcessTransport(hub))
+        await a.start()
+        await b.start()
+        seen_a, seen_b = [], []
+        a.subscribe("quiz.*", lambda channel, data: seen_a.append(channel))
+        b.subscribe("quiz.*", lambda channel, data: seen_b.append(channel))
+
+        a.publish("quiz.deleted", local=False)
+        a.publish("results.submitted", local=False)
+        await _settle()
+        await a.stop()
+        await b.stop()
+        return seen_a, seen_b
+
+    seen_a, seen_b = run(scenario())
+    assert seen_a == []
+    assert seen_b == ["quiz.deleted"]
+
+
+def test_publish_before_start_is_local_only():
+    async def scenario():
+        bus = Bus(InProcessTransport(InProcessHub()))
+        seen = []
+        bus.subscribe("x", lambda channel, data: seen.append(data))
+        bus.publish("x", 1)
+        await asyncio.sleep(0)
+        return seen, bus.outbox
+
+    seen, outbox = run(scenario())
+    assert seen == [1]
+    assert outbox == []
+
+
+def test_ttl_cache_expiry_and_lru(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+    c = cache.TTLCache("test-lru", ttl_seconds=10, max_size=2)
+    c.set("a", 1)
+    c.set("b", 2)
+    assert c.get("a") == 1  # "a" je sada najskorije korišćen
+    c.set("c", 3)
+    assert c.get("b") is None
+    assert c.get("a") == 1
+    now[0] += 11
+    assert c.get("a") is None
+
+
+def test_ttl_cache_invalidation_from_other_worker(monkeypatch):
+    c = cache.TTLCache("test-remote", ttl_seconds=60)
+    c.set("quiz-1", {"id": "quiz-1"})
+    c.set("quiz-2", {"id": "quiz-2"})
+    # Događaj koji je objavio drugi worker
+    cache._on_invalidate(cache.INVALIDATE_CHANNEL, {"cache": "test-remote", "key": "quiz-1"})
+    assert c.get("quiz-1") is None
+    assert c.get("quiz-2") == {"id": "quiz-2"}
+
+
+class RecordingBus:
+    def __init__(self):
+        self.published = []
+
+    def publish(self, channel, data=None, local=True):
+        self.published.append((channel, data))
+
+
+@pytest.fixture
+def room(monkeypatch):
+    recording = RecordingBus()
+    monkeypatch.setattr(rooms, "bus", recording)
+    monkeypatch.setattr(rooms, "_rooms", {})
+    quiz = {"id": "quiz-1", "title": "Test", "questions": [{"id": "q1", "question": "?", "correctAnswer": "a"}]}
+    room = rooms.create_room(quiz, "host-1", 10)
+    recording.published.clear()
+    return room, recording
+
+
+def test_remote_join_gets_state_and_single_broadcast(room):
+    async def scenario():
+        r, recording = room
+        rooms._on_remote_input(rooms.ROOM_INPUT_CHANNEL, {
+            "code": r.code, "type": "join", "connId": "c1", "playerId": "p1", "name": "Ana"
+        })
+        rooms._on_remote_input(rooms.ROOM_INPUT_CHANNEL, {
+            "code": r.code, "type": "join", "connId": "c2", "playerId": "p2", "name": "Bora"
+        })
+        recording.published.clear()
+        r.broadcast({"type": "ping"})
+        return r, recording
+
+    r, recording = run(scenario())
+    assert set(r.players) == {"p1", "p2"}
+    # Jedna poruka za sve udaljene igrače, ne po igraču
+    assert len(recording.published) == 1
+    channel, data = recording.published[0]
+    assert channel == rooms.ROOM_OUTPUT_CHANNEL
+    assert "connId" not in data and json.loads(data["text"]) == {"type": "ping"}
+
+
+def test_remote_message_from_stale_connection_is_ignored(room):
+    async def scenario():
+        r, recording = room
+        join = {"code": r.code, "type": "join", "playerId": "p1", "name": "Ana"}
+        rooms._on_remote_input(rooms.ROOM_INPUT_CHANNEL, dict(join, connId="old"))
+        rooms._on_remote_input(rooms.ROOM_INPUT_CHANNEL, dict(join, connId="new"))
+        rooms._on_remote_input(rooms.ROOM_INPUT_CHANNEL, {
+            "code": r.code, "type": "leave", "connId": "old", "playerId": "p1"
+        })
+        return r, recording
+
+    r, recording = run(scenario())
+    assert r.players["p1"].connection.conn_id == "new"
+    # Stara konekcija je zatvorena porukom upućenoj baš njoj
+    assert (rooms.ROOM_OUTPUT_CHANNEL, {"code": r.code, "connId": "old", "close": True}) in recording.published
+
+
+def test_proxy_delivers_broadcast_and_direct_messages():
+    class FakeConnection:
+        def __init__(self):
+            self.sent = []
+            self.closed = False
+
+        def send(self, text):
+            self.sent.append(text)
+
+        def close(self):
+            self.closed = True
+
+    proxy = rooms.RoomProxy("ABCDEF")
+    host, player = FakeConnection(), FakeConnection()
+    proxy.connections = {"h": host, "p": player}
+    proxy.host_conn_id = "h"
+
+    proxy.deliver({"text": "svima", "includeHost": False})
+    proxy.deliver({"connId": "h", "text": "domaćinu"})
+    proxy.deliver({"connId": "p", "close": True})
+    assert host.sent == ["domaćinu"]
+    assert player.sent == ["svima"]
+    assert player.closed
+
+
+def test_broker_client_reconnects_after_broker_closes_connection(monkeypatch):
+    monkeypatch.setattr(bus_module, "RECONNECT_MIN_SECONDS", 0.01)
+
+    async def scenario():
+        connections = []
+
+        async def flaky_broker(reader, writer):
+            connections.append(writer)
+            if len(connections) == 1:
+                writer.close()  # Prva konekcija odmah pada
+                return
+            writer.write(b'{"origin": "drugi", "events": [{"channel": "quiz.updated", "data": 1}]}\n')
+            await writer.drain()
+
+        server = await asyncio.start_server(flaky_broker, "127.0.0.1", 0)
+        transport = BrokerTransport("127.0.0.1", server.sockets[0].getsockname()[1])
+        received = []
+        await transport.start(received.append)
+        for _ in range(100):
+            if received:
+                break
+            await asyncio.sleep(0.01)
+        await transport.stop()
+        server.close()
+        return len(connections), received
+
+    connections, received = run(scenario())
+    assert connections == 2
+    assert received[0]["events"] == [{"channel": "quiz.updated", "data": 1}]
+
+
+def test_broker_disconnects_subscriber_that_stops_reading(monkeypatch):
+    monkeypatch.setattr(bus_module, "BROKER_CLIENT_QUEUE_SIZE", 4)
+
+    async def scenario():
+        server = await start_broker("127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        _, slow_writer = await asyncio.open_connection("127.0.0.1", port)
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        line = b"x" * 32 * 1024 + b"\n"
+        received = 0
+
+        async def read_own():
+            nonlocal received
+            while await reader.readline():
+                received += 1
+
+        reading = asyncio.create_task(read_own())
+        # Spor klijent ne čita: kad mu se napune soket i red, broker ga isključuje
+        for _ in range(1000):
+            writer.write(line)
+            await writer.drain()
+            if slow_writer.transport.is_closing():
+                break
+            await asyncio.sleep(0)
+        for _ in range(100):
+            if received == 1000:
+                break
+            await asyncio.sleep(0.01)
+        slow_closed = slow_writer.is_closing() or await _peer_closed(slow_writer)
+        reading.cancel()
+        writer.close()
+        slow_writer.close()
+        server.close()
+        return received, slow_closed
+
+    received, slow_closed = run(scenario())
+    # Klijent koji čita dobija sve, spor je isključen
+    assert received == 1000 and slow_closed
+
+
+async def _peer_closed(writer):
+    try:
+        writer.write(b"ping\n")
+        await writer.drain()
+        await asyncio.sleep(0.05)
+        writer.write(b"ping\n")
+        await writer.drain()
+    except ConnectionError:
+        return True
+    return writer.transport.is_closing()
@@ -0,0 +1,55 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+import cleanup
+import stats
+from cleanup import is_peak, new_job, parse_peak_hours, throttle
+from user_stats import backfill
+
+
+def at(hour):
+    return datetime(2025, 3, 1, hour, 30)
+
+
+def test_peak_hours_range_and_overnight():
+    assert parse_peak_hours("15-22") == (15, 22)
+    assert is_peak(at(15), "15-22") and is_peak(at(21), "15-22")
+    assert not is_peak(at(22), "15-22") and not is_peak(at(3), "15-22")
+    # Opseg preko ponoći
+    assert is_peak(at(23), "22-2") and is_peak(at(1), "22-2")
+    assert not is_peak(at(12), "22-2")
+    with pytest.raises(ValueError):
+        parse_peak_hours("uveče")
+
+
+def test_throttle_uses_smaller_batches_during_peak():
+    assert throttle(at(18), "15-22") == (cleanup.PEAK_BATCH_SIZE, cleanup.PEAK_BATCH_PAUSE_SECONDS)
+    assert throttle(at(4), "15-22") == (cleanup.BATCH_SIZE, cleanup.BATCH_PAUSE_SECONDS)
+
+
+def test_new_job_starts_pending_without_progress():
+    job = new_job("kviz-1", "3", "u1")
+    assert job["status"] == "pending" and job["leaseUntil"] is None
+    assert job["progress"] == {"totalResults": None, "results": 0, "batches": 0}
+
+
+def test_cleaned_quiz_does_not_come_back_from_rebuilds(mongo, monkeypatch):
+    async def scenario():
+        await mongo.results.insert_one({"id": "r1", "userId": "u1", "quizId": "k1", "score": 80, "correctCount": 4,
+                                        "totalQuestions": 5, "passed": True, "completedAt": at(10)})
+        await mongo.results_monthly.insert_one({"userId": "u1", "quizId": "k1", "month": "2024-01", "plays": 2,
+                                                "scoreSum": 100, "scores": {"40": 1, "60": 1}})
+        await mongo.quiz_stats.insert_one({"quizId": "k1", "plays": 3, "scores": {"40": 1, "60": 1, "80": 1}})
+        await mongo.users.insert_one({"id": "u1", "username": "u1"})
+        job = new_job("k1", "3", "u1")
+        await mongo.cleanup_jobs.insert_one(dict(job))
+
+        monkeypatch.setattr(cleanup, "throttle", lambda moment: (cleanup.BATCH_SIZE, 0))
+        assert (await cleanup.run_job(job))["status"] == "done"
+        await stats.rebuild_score_histograms()
+        assert await mongo.quiz_stats.find_one({"quizId": "k1"}) is None
+        assert await backfill() == 0
+
+    asyncio.run(scenario())
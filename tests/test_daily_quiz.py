@@ -0,0 +1,67 @@
+import asyncio
+from datetime import datetime
+
+import daily_quiz
+import server
+from daily_quiz import challenge_day, pick_quiz, seconds_until_next
+from leaderboards import daily_quiz_updates
+
+
+def test_challenge_day_starts_at_configured_local_time():
+    # Beograd je leti UTC+2
+    assert challenge_day(datetime(2025, 5, 31, 21, 30), at="00:00") == "2025-05-31"
+    assert challenge_day(datetime(2025, 5, 31, 22, 30), at="00:00") == "2025-06-01"
+    assert challenge_day(datetime(2025, 6, 2, 5, 0), at="08:00") == "2025-06-01"
+
+
+def test_seconds_until_next_accounts_for_dst():
+    assert seconds_until_next(datetime(2025, 6, 1, 21, 0), at="00:00") == 3600
+    # Noć prelaska na letnje vreme ima sat manje (ponoć do 08:00 je 7 sati)
+    assert seconds_until_next(datetime(2025, 3, 29, 23, 0), at="08:00") == 7 * 3600
+
+
+def test_pick_is_deterministic_and_skips_recent():
+    quizzes = [{"id": "a", "plays": 100, "ratingScore": 4.5}, {"id": "b", "plays": 3}, {"id": "c", "plays": 0}]
+    assert pick_quiz(quizzes, set(), "2025-06-01") == pick_quiz(list(reversed(quizzes)), set(), "2025-06-01")
+    assert pick_quiz(quizzes, {"a", "b"}, "2025-06-01")["id"] == "c"
+    assert pick_quiz(quizzes, {"a", "b", "c"}, "2025-06-01") is not None
+    assert pick_quiz([], set(), "2025-06-01") is None
+
+
+def test_daily_leaderboard_keeps_best_score():
+    [op] = daily_quiz_updates("2025-06-01", [("a", 60), ("a", 90)], datetime(2025, 6, 3))
+    assert op._filter == {"window": "daily_quiz", "period": "2025-06-01", "userId": "a"}
+    assert op._doc["$max"] == {"score": 90} and op._doc["$inc"] == {"plays": 2}
+
+
+def test_deleting_todays_quiz_picks_another_and_resets_daily_board(mongo, monkeypatch):
+    monkeypatch.setattr(daily_quiz, "_current", None)
+
+    async def scenario():
+        await mongo.users.insert_one({"id": "a", "username": "admin", "isAdmin": True})
+        await mongo.quizzes.insert_many([
+            {"id": quiz_id, "title": quiz_id, "description": "", "categoryId": "1", "questionCount": 1}
+            for quiz_id in ("k1", "k2")
+        ])
+        pinned = await daily_quiz.current()
+        day, deleted = pinned["day"], pinned["quizId"]
+        await mongo.leaderboard_buckets.insert_one({"window": "daily_quiz", "period": day, "userId": "a", "score": 90})
+        server.trending_cache.set("top", [{"id": deleted}])
+
+        await server.delete_quiz(deleted, user_id="a")
+        await asyncio.sleep(0)  # Lokalna isporuka "quiz.deleted"
+        replaced = await daily_quiz.current()
+        return deleted, replaced, await mongo.leaderboard_buckets.count_documents({"period": day})
+
+    deleted, replaced, board = asyncio.run(scenario())
+    assert replaced["quizId"] == ({"k1", "k2"} - {deleted}).pop()
+    assert board == 0
+    assert server.trending_cache.get("top") is None
+
+
+def test_quiz_deleted_event_drops_pick_on_other_workers(monkeypatch):
+    monkeypatch.setattr(daily_quiz, "_current", {"day": "2025-06-01", "quizId": "k1", "body": b"{}"})
+    daily_quiz._on_quiz_deleted("quiz.deleted", {"quizId": "k2"})
+    assert daily_quiz._current is not None
+    daily_quiz._on_quiz_deleted("quiz.deleted", {"quizId": "k1"})
+    assert daily_quiz._current is None
@@ -0,0 +1,66 @@
+import asyncio
+import csv
+import gzip
+import io
+import json
+from datetime import datetime
+
+import pytest
+
+import exports
+
+RESULTS = [
+    {"id": "r1", "userId": "u1", "quizId": "q1", "score": 80, "correctCount": 4, "totalQuestions": 5,
+     "passed": True, "completedAt": datetime(2025, 3, 1, 12, 30)},
+    {"id": "r2", "userId": "u2", "quizId": "q2", "score": 20, "correctCount": 1, "totalQuestions": 5,
+     "passed": False, "points": 900, "quizVersion": 2, "completedAt": datetime(2025, 3, 2)},
+]
+
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    async def batches(query):
+        for result in RESULTS:
+            yield [result]
+
+    async def titles(quiz_ids):
+        return {"q1": "Prestonice, Evropa", "q2": "Čvorovi"}
+
+    monkeypatch.setattr(exports, "_result_batches", batches)
+    monkeypatch.setattr(exports, "_quiz_titles", titles)
+
+
+def collect(fmt, compress):
+    async def scenario():
+        return b"".join([chunk async for chunk in exports.stream_results({}, fmt, compress)])
+    return asyncio.run(scenario())
+
+
+def test_ndjson_export_joins_titles(fake_db):
+    lines = collect("ndjson", False).decode("utf-8").splitlines()
+    rows = [json.loads(line) for line in lines]
+    assert [r["quizTitle"] for r in rows] == ["Prestonice, Evropa", "Čvorovi"]
+    assert rows[0]["completedAt"] == "2025-03-01T12:30:00"
+    assert rows[0]["quizVersion"] == 1 and rows[0]["points"] is None
+
+
+def test_gzip_csv_export_round_trips(fake_db):
+    text = gzip.decompress(collect("csv", True)).decode("utf-8-sig")
+    rows = list(csv.DictReader(io.StringIO(text)))
+    assert list(rows[0]) == exports.COLUMNS
+    assert [(r["id"], r["quizTitle"], r["points"]) for r in rows] == [
+        ("r1", "Prestonice, Evropa", ""), ("r2", "Čvorovi", "900")
+    ]
+
+
+def test_filter_without_category_needs_no_lookup():
+    query = asyncio.run(exports.build_filter(
+        quiz_id="q1", user_id="u1",
+        date_from=exports.parse_date("2025-01-01", "from"), date_to=exports.parse_date("2025-02-01", "to")
+    ))
+    assert query == {
+        "quizId": "q1", "userId": "u1",
+        "completedAt": {"$gte": datetime(2025, 1, 1), "$lt": datetime(2025, 2, 1)},
+    }
+    with pytest.raises(exports.ExportError):
+        exports.parse_date("31.01.2025", "from")
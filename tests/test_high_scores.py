@@ -0,0 +1,23 @@
+from datetime import datetime
+
+from high_scores import merge_entries, qualifies
+
+
+def entry(user_id, score, minute):
+    return {"userId": user_id, "username": user_id, "score": score, "completedAt": datetime(2025, 5, 1, 12, minute)}
+
+
+def test_qualifies_only_above_full_table_minimum():
+    table = [entry("a", 90, 1), entry("b", 70, 2)]
+    assert qualifies(table, "c", 50, k=3)  # Tabela nije puna
+    assert qualifies(table, "c", 71, k=2)
+    assert not qualifies(table, "c", 70, k=2)  # Izjednačen sa poslednjim - raniji ostaje
+    assert not qualifies(table, "a", 90, k=2)  # Korisnik već ima isti ili bolji rezultat
+    assert qualifies(table, "b", 80, k=2)
+
+
+def test_merge_keeps_best_per_user_and_breaks_ties_by_time():
+    table = [entry("a", 90, 1), entry("b", 70, 2)]
+    merged = merge_entries(table, [entry("c", 90, 5), entry("b", 95, 6), entry("a", 60, 7)], k=3)
+    assert [(e["userId"], e["score"]) for e in merged] == [("b", 95), ("a", 90), ("c", 90)]
+    assert merge_entries(merged, [entry("d", 10, 8)], k=3) == merged
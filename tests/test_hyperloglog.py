@@ -0,0 +1,54 @@
+import pytest
+
+from hyperloglog import HyperLogLog
+from uniques import guest_fingerprint
+
+
+def _sketch(values):
+    sketch = HyperLogLog()
+    for value in values:
+        sketch.add(value)
+    return sketch
+
+
+def test_register_size_is_4kb():
+    assert len(HyperLogLog().to_bytes()) == 4096
+
+
+def test_empty_count_is_zero():
+    assert HyperLogLog().count() == 0
+
+
+def test_duplicates_do_not_increase_count():
+    sketch = _sketch(["user-1"] * 1000)
+    assert sketch.count() == 1
+    assert sketch.add("user-1") is False
+
+
+@pytest.mark.parametrize("n", [100, 10000, 100000])
+def test_count_accuracy(n):
+    estimate = _sketch(f"user-{i}" for i in range(n)).count()
+    # Standardna greška za p=12 je ~1.6%; 5% je sigurna granica
+    assert abs(estimate - n) / n < 0.05
+
+
+def test_merge_is_union():
+    a = _sketch(f"user-{i}" for i in range(0, 30000))
+    b = _sketch(f"user-{i}" for i in range(20000, 50000))
+    merged = HyperLogLog(a.to_bytes()).merge(b)
+    assert abs(merged.count() - 50000) / 50000 < 0.05
+    # Spajanje je idempotentno i komutativno
+    assert HyperLogLog(merged.to_bytes()).merge(b).to_bytes() == merged.to_bytes()
+    assert HyperLogLog(b.to_bytes()).merge(a).to_bytes() == merged.to_bytes()
+
+
+def test_rejects_wrong_register_size():
+    with pytest.raises(ValueError):
+        HyperLogLog(b"\x00" * 10)
+
+
+def test_guest_fingerprint_is_stable_and_anonymous():
+    key = guest_fingerprint("203.0.113.7", "Mozilla/5.0")
+    assert key == guest_fingerprint("203.0.113.7", "Mozilla/5.0")
+    assert key != guest_fingerprint("203.0.113.8", "Mozilla/5.0")
+    assert "203.0.113.7" not in key
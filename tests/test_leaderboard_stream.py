@@ -0,0 +1,108 @@
+import asyncio
+import json
+
+from leaderboard_stream import LeaderboardHub, diff_rankings, merge_deltas, rank_entries
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def user(user_id, score):
+    return {"id": user_id, "username": user_id, "score": score}
+
+
+def parse(event):
+    fields = dict(line.split(": ", 1) for line in event.strip().splitlines())
+    return fields["event"], fields["id"], json.loads(fields["data"])
+
+
+def test_diff_reports_rank_changes_and_dropouts():
+    old = rank_entries([user("a", 30), user("b", 20), user("c", 10)])
+    new = rank_entries([user("b", 40), user("a", 30), user("d", 15)])
+    delta = diff_rankings(old, new)
+    assert [(e["id"], e["rank"]) for e in delta["changed"]] == [("b", 1), ("a", 2), ("d", 3)]
+    assert delta["removed"] == ["c"]
+
+
+def test_merge_keeps_latest_entry_and_readmission():
+    first = {"changed": [dict(user("a", 10), rank=2)], "removed": ["b"]}
+    second = {"changed": [dict(user("a", 50), rank=1), dict(user("b", 5), rank=3)], "removed": []}
+    merged = merge_deltas([first, second])
+    assert [(e["id"], e["score"]) for e in merged["changed"]] == [("a", 50), ("b", 5)]
+    assert merged["removed"] == []
+
+
+def test_deltas_since_requires_same_epoch_and_history():
+    hub = LeaderboardHub(None)
+    hub.seq = 3
+    hub.history.extend([(2, {"n": 2}), (3, {"n": 3})])
+    assert hub.deltas_since(f"{hub.epoch}-3") == []
+    assert hub.deltas_since(f"{hub.epoch}-1") == [{"n": 2}, {"n": 3}]
+    assert hub.deltas_since(f"{hub.epoch}-0") is None  # Delta 1 više nije u istoriji
+    assert hub.deltas_since("drugi-1") is None
+    assert hub.deltas_since(None) is None
+
+
+def test_stream_sends_snapshot_then_one_coalesced_delta():
+    async def scenario():
+        board = [user("a", 30), user("b", 20)]
+        fetches = []
+
+        async def fetch_top(limit):
+            fetches.append(limit)
+            return list(board)
+
+        hub = LeaderboardHub(fetch_top, top_n=10, interval=0.05)
+        stream = hub.stream()
+        retry = await stream.__anext__()
+        snapshot = parse(await stream.__anext__())
+
+        next_event = asyncio.ensure_future(stream.__anext__())
+        # Više predaja u istom intervalu daje jedno čitanje i jedan događaj
+        board[:] = [user("b", 35), user("a", 30)]
+        hub.on_results("results.submitted", {"results": [{"userId": "b", "score": 15}]})
+        hub.on_results("results.submitted", {"results": [{"userId": "b", "score": 0}]})
+        delta = parse(await asyncio.wait_for(next_event, 1))
+
+        hub.on_results("results.submitted", {"results": [{"userId": None, "score": 100}]})
+        await asyncio.sleep(0.1)
+        await hub.stop()
+        await stream.aclose()
+        return retry, snapshot, delta, fetches, hub
+
+    retry, snapshot, delta, fetches, hub = run(scenario())
+    assert retry.startswith("retry:")
+    assert snapshot[0] == "snapshot"
+    assert [e["id"] for e in snapshot[2]["entries"]] == ["a", "b"]
+    assert delta[0] == "delta"
+    assert [(e["id"], e["rank"]) for e in delta[2]["changed"]] == [("b", 1), ("a", 2)]
+    assert delta[1] == f"{hub.epoch}-1"
+    # Početni snimak + jedno osvežavanje; predaja gosta ne čita bazu
+    assert len(fetches) == 2
+    assert hub.subscribers == 0
+
+
+def test_reconnect_with_last_event_id_gets_only_missed_changes():
+    async def scenario():
+        board = [user("a", 30), user("b", 20)]
+
+        async def fetch_top(limit):
+            return list(board)
+
+        hub = LeaderboardHub(fetch_top)
+        await hub.refresh()
+        last_id = hub.event_id
+        board[:] = [user("a", 30), user("b", 25)]
+        await hub.refresh()
+
+        stream = hub.stream(last_id)
+        await stream.__anext__()
+        event = parse(await stream.__anext__())
+        await stream.aclose()
+        await hub.stop()
+        return event
+
+    event = run(scenario())
+    assert event[0] == "delta"
+    assert event[2] == {"changed": [dict(user("b", 25), rank=2)], "removed": []}
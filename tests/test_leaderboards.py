@@ -0,0 +1,101 @@
+import asyncio
+import os
+from datetime import datetime
+
+import pytest
+
+import leaderboards
+from leaderboards import (
+    MASTERY_MIN_PLAYS, _ahead_of, _behind, bucket_updates, category_updates, ladder_rank, mastery, period_end,
+    period_key
+)
+
+
+def test_period_keys_and_ends():
+    moment = datetime(2025, 12, 31, 22, 15)  # Sreda
+    assert period_key("day", moment) == "2025-12-31"
+    assert period_key("week", moment) == "2026-W01"  # ISO nedelja
+    assert period_key("month", moment) == "2025-12"
+    assert period_end("day", moment) == datetime(2026, 1, 1)
+    assert period_end("week", moment) == datetime(2026, 1, 5)
+    assert period_end("month", moment) == datetime(2026, 1, 1)
+    assert period_end("month", datetime(2025, 3, 1)) == datetime(2025, 4, 1)
+    with pytest.raises(ValueError):
+        period_key("all", moment)
+
+
+def test_bucket_updates_sum_repeated_players_per_window():
+    ops = bucket_updates([("a", 40), ("b", 70), ("a", 60)], datetime(2025, 3, 10, 8))
+    assert len(ops) == 6  # 2 korisnika x 3 perioda
+    day_a = next(op for op in ops if op._filter == {"window": "day", "period": "2025-03-10", "userId": "a"})
+    assert day_a._doc["$inc"] == {"score": 100, "plays": 2}
+    assert day_a._doc["$setOnInsert"] == {"expiresAt": datetime(2025, 3, 12)}
+    assert all(op._upsert for op in ops)
+
+
+def test_category_updates_and_mastery():
+    [op] = category_updates("3", [("a", 90), ("a", 70)])
+    assert op._filter == {"userId": "a", "categoryId": "3"}
+    assert op._doc == {"$inc": {"score": 160, "plays": 2}}
+
+    assert mastery({"categoryId": "3", "score": 90 * MASTERY_MIN_PLAYS, "plays": MASTERY_MIN_PLAYS})["mastered"]
+    # Visok prosek ali premalo igara, ili dovoljno igara sa niskim prosekom
+    assert not mastery({"categoryId": "3", "score": 100, "plays": 1})["mastered"]
+    low = mastery({"categoryId": "3", "score": 50 * MASTERY_MIN_PLAYS, "plays": MASTERY_MIN_PLAYS})
+    assert low["averageScore"] == 50 and not low["mastered"]
+
+
+def test_around_me_ranges_split_ties_by_id():
+    user = {"id": "m", "totalScore": 40}
+    assert _ahead_of(user) == {"$or": [{"totalScore": {"$gt": 40}}, {"totalScore": 40, "id": {"$lt": "m"}}]}
+    assert _behind(user) == {"$or": [{"totalScore": {"$lt": 40}}, {"totalScore": 40, "id": {"$gt": "m"}}]}
+    assert _ahead_of({"id": "novi"})["$or"][0] == {"totalScore": {"$gt": 0}}
+
+
+def test_ladder_rank_picks_last_rung_not_behind_user(monkeypatch):
+    monkeypatch.setattr(leaderboards, "RANK_STEP", 10)
+    ladder = [{"id": "a", "totalScore": 900}, {"id": "b", "totalScore": 500}, {"id": "c", "totalScore": 500}]
+    assert ladder_rank(ladder, {"id": "z", "totalScore": 950}) is None
+    assert ladder_rank(ladder, {"id": "b", "totalScore": 500}) == (20, ladder[1])
+    assert ladder_rank(ladder, {"id": "bb", "totalScore": 500}) == (20, ladder[1])
+    assert ladder_rank(ladder, {"id": "d", "totalScore": 10}) == (30, ladder[2])
+
+
+def test_deep_rank_from_ladder_matches_exact_count(mongo, monkeypatch):
+    monkeypatch.setattr(leaderboards, "RANK_EXACT_LIMIT", 5)
+    monkeypatch.setattr(leaderboards, "RANK_STEP", 4)
+    leaderboards.rank_ladder_cache.discard()
+
+    async def scenario():
+        users = [{"id": f"u{i:02d}", "totalScore": (i * 7) % 11 * 10} for i in range(30)]
+        await mongo.users.insert_many([dict(u) for u in users])
+        order = sorted(users, key=lambda u: (-u["totalScore"], u["id"]))
+        for expected, user in enumerate(order, start=1):
+            assert await leaderboards.user_rank(user) == expected
+        assert len(leaderboards.rank_ladder_cache.get("all")) == 7
+
+    asyncio.run(scenario())
+    leaderboards.rank_ladder_cache.discard()
+
+
+@pytest.mark.skipif(not os.environ.get("TEST_MONGO_URL"), reason="Plan upita traži pravi MongoDB (TEST_MONGO_URL)")
+def test_exact_rank_count_reads_at_most_limit_index_keys():
+    from pymongo import MongoClient
+
+    client = MongoClient(os.environ["TEST_MONGO_URL"])
+    users = client["kviz_test_explain"]["users"]
+    try:
+        users.drop()
+        users.create_index([("totalScore", -1), ("id", 1)])
+        users.insert_many([{"id": f"u{i:05d}", "totalScore": i % 500} for i in range(5000)])
+        limit = leaderboards.RANK_EXACT_LIMIT
+        plan = client["kviz_test_explain"].command(
+            "explain", {"count": "users", "query": _ahead_of({"id": "u00000", "totalScore": 0}), "limit": limit},
+            verbosity="executionStats"
+        )
+        stats = plan["executionStats"]
+        assert stats["totalDocsExamined"] == 0
+        assert stats["totalKeysExamined"] <= limit + 2
+    finally:
+        client.drop_database("kviz_test_explain")
+        client.close()
@@ -0,0 +1,57 @@
+import asyncio
+import threading
+from collections import Counter
+
+import profiler
+
+
+def test_top_functions_count_self_and_total_once_per_stack():
+    stacks = Counter({
+        ("main", "handle", "parse"): 6,
+        ("main", "handle"): 2,
+        ("main", "fib", "fib", "fib"): 2,
+    })
+    top = {f["function"]: f for f in profiler._top_functions(stacks, 10)}
+    assert top["parse"]["selfSamples"] == 6 and top["parse"]["selfPercent"] == 60.0
+    assert top["handle"]["selfSamples"] == 2 and top["handle"]["totalSamples"] == 8
+    # Rekurzivna funkcija se broji jednom po steku
+    assert top["fib"]["totalSamples"] == 2
+    assert "main" not in top
+    assert [f["function"] for f in profiler._top_functions(stacks, 1)] == ["parse"]
+
+
+def test_profile_samples_only_requested_thread():
+    stop = threading.Event()
+
+    def busy_loop_for_profiler():
+        while not stop.is_set():
+            sum(range(100))
+
+    worker = threading.Thread(target=busy_loop_for_profiler)
+    worker.start()
+    try:
+        report = profiler.run_profile(0.2, 2, 5, thread_id=worker.ident)
+    finally:
+        stop.set()
+        worker.join()
+    assert report["samples"] > 0 and report["idleSamples"] == 0
+    lines = report["collapsed"].splitlines()
+    assert lines and all("busy_loop_for_profiler" in line for line in lines)
+    assert "test_profile_samples_only_requested_thread" not in report["collapsed"]
+
+
+def test_idle_event_loop_samples_are_skipped():
+    started = threading.Event()
+
+    async def wait():
+        started.set()
+        await asyncio.sleep(0.4)
+
+    loop_thread = threading.Thread(target=asyncio.run, args=(wait(),))
+    loop_thread.start()
+    started.wait()
+    try:
+        report = profiler.run_profile(0.2, 2, 5, thread_id=loop_thread.ident)
+    finally:
+        loop_thread.join()
+    assert report["idleSamples"] > 0 and report["collapsed"] == ""
@@ -0,0 +1,114 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+import quiz_bank
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, key, direction):
+        self.docs = sorted(self.docs, key=lambda d: d[key], reverse=direction < 0)
+        return self
+
+    def batch_size(self, size):
+        return self
+
+    def __aiter__(self):
+        self.iterator = iter(self.docs)
+        return self
+
+    async def __anext__(self):
+        try:
+            return dict(next(self.iterator))
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class FakeCollection:
+    def __init__(self, docs=()):
+        self.docs = {d["id"]: dict(d) for d in docs}
+        self.fail_after = None
+
+    def find(self, query, projection=None):
+        last_id = query.get("id", {}).get("$gt")
+        return FakeCursor([d for d in self.docs.values() if last_id is None or d["id"] > last_id])
+
+    async def bulk_write(self, requests, ordered=True):
+        for request in requests:
+            if self.fail_after is not None:
+                if self.fail_after == 0:
+                    raise RuntimeError("prekid")
+                self.fail_after -= 1
+            doc = request._doc
+            self.docs[doc["id"]] = doc
+
+    async def create_index(self, key):
+        pass
+
+
+def make_db(quiz_count):
+    return {
+        "categories": FakeCollection([{"id": "1", "name": "Istorija", "quizCount": quiz_count}]),
+        "quizzes": FakeCollection([
+            {"id": f"q{i:04d}", "title": f"Kviz {i}", "createdAt": datetime(2025, 1, 1, 10, i % 60),
+             "questions": [{"id": "a", "question": "?", "correctAnswer": i % 4}]}
+            for i in range(quiz_count)
+        ]),
+    }
+
+
+def test_export_restore_round_trip(tmp_path):
+    source = make_db(25)
+    manifest = asyncio.run(quiz_bank.export_bank(source, tmp_path, chunk_size=10))
+    assert manifest["complete"]
+    assert [c["count"] for c in manifest["collections"]["quizzes"]["chunks"]] == [10, 10, 5]
+    assert quiz_bank.verify_archive(tmp_path) == []
+
+    target = {"categories": FakeCollection(), "quizzes": FakeCollection()}
+    restored = asyncio.run(quiz_bank.restore_bank(target, tmp_path, workers=2, batch_size=4))
+    assert restored == {"categories": 1, "quizzes": 25}
+    assert target["quizzes"].docs == source["quizzes"].docs
+    assert not (tmp_path / quiz_bank.RESTORE_CHECKPOINT).exists()
+
+
+def test_interrupted_restore_resumes_from_checkpoint(tmp_path):
+    asyncio.run(quiz_bank.export_bank(make_db(30), tmp_path, chunk_size=10))
+    target = {"categories": FakeCollection(), "quizzes": FakeCollection()}
+    target["quizzes"].fail_after = 15
+    with pytest.raises(RuntimeError):
+        asyncio.run(quiz_bank.restore_bank(target, tmp_path, workers=1, batch_size=10))
+    assert (tmp_path / quiz_bank.RESTORE_CHECKPOINT).exists()
+
+    target["quizzes"].fail_after = None
+    restored = asyncio.run(quiz_bank.restore_bank(target, tmp_path, workers=1))
+    # Prvi deo je već vraćen pre prekida
+    assert restored["quizzes"] == 20
+    assert len(target["quizzes"].docs) == 30
+
+
+def test_export_resumes_after_last_chunk(tmp_path):
+    db = make_db(12)
+    asyncio.run(quiz_bank.export_bank(db, tmp_path, chunk_size=5))
+    manifest = quiz_bank.load_manifest(tmp_path)
+    # Simulacija prekida posle prvog dela kvizova
+    manifest["complete"] = False
+    manifest["collections"]["quizzes"]["chunks"] = manifest["collections"]["quizzes"]["chunks"][:1]
+    manifest["collections"]["quizzes"]["count"] = 5
+    quiz_bank._write_json(tmp_path / quiz_bank.MANIFEST, manifest)
+
+    manifest = asyncio.run(quiz_bank.export_bank(db, tmp_path, chunk_size=5))
+    assert manifest["collections"]["quizzes"]["count"] == 12
+    assert quiz_bank.verify_archive(tmp_path) == []
+
+
+def test_verify_detects_corrupted_chunk(tmp_path):
+    asyncio.run(quiz_bank.export_bank(make_db(3), tmp_path))
+    chunk = tmp_path / "quizzes-00001.ndjson.gz"
+    chunk.write_bytes(chunk.read_bytes()[:-4] + b"xxxx")
+    assert quiz_bank.verify_archive(tmp_path) == ["quizzes-00001.ndjson.gz: SHA-256 se ne poklapa"]
+    with pytest.raises(quiz_bank.ArchiveError):
+        asyncio.run(quiz_bank.restore_bank({}, tmp_path))
@@ -0,0 +1,57 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+import server
+from models import QuizCreate
+
+QUIZ = {
+    "id": "k1", "title": "Prestonice", "description": "", "categoryId": "3", "createdBy": "admin",
+    "questionCount": 1, "questions": [{"id": "q1", "type": "true-false", "question": "Beograd?", "correctAnswer": True}],
+}
+
+
+def _edit(category_id="3"):
+    return QuizCreate(title="Prestonice 2", description="", categoryId=category_id, questions=[
+        {"id": "q1", "type": "true-false", "question": "Beograd?", "correctAnswer": True},
+    ])
+
+
+async def _setup(mongo):
+    await mongo.users.insert_one({"id": "a", "username": "admin", "isAdmin": True})
+    await mongo.quizzes.insert_one(dict(QUIZ))
+    await mongo.categories.insert_many([{"id": "3", "quizCount": 1}, {"id": "4", "quizCount": 0}])
+
+
+def test_update_quiz_bumps_version_of_legacy_quiz(mongo):
+    async def scenario():
+        await _setup(mongo)
+        await server.update_quiz("k1", _edit(), user_id="a")
+        await server.update_quiz("k1", _edit(), user_id="a")
+        assert (await mongo.quizzes.find_one({"id": "k1"}))["version"] == 3
+
+    asyncio.run(scenario())
+
+
+def test_concurrent_update_quiz_gets_409(mongo, monkeypatch):
+    async def scenario():
+        await _setup(mongo)
+        read = server.quizzes_collection.find_one
+
+        async def stale_read(*args, **kwargs):
+            # Druga izmena stiže između čitanja i upisa
+            quiz = await read(*args, **kwargs)
+            await mongo.quizzes.update_one({"id": "k1"}, {"$set": {"version": 2, "title": "Druga izmena"}})
+            return quiz
+
+        monkeypatch.setattr(server.quizzes_collection, "find_one", stale_read)
+        with pytest.raises(HTTPException) as error:
+            await server.update_quiz("k1", _edit("4"), user_id="a")
+        assert error.value.status_code == 409
+        quiz = await mongo.quizzes.find_one({"id": "k1"})
+        assert quiz["title"] == "Druga izmena" and quiz["version"] == 2
+        # Odbijena izmena ne pomera brojače kategorija
+        assert (await mongo.categories.find_one({"id": "4"}))["quizCount"] == 0
+
+    asyncio.run(scenario())
@@ -0,0 +1,109 @@
+import asyncio
+import io
+import json
+
+import pytest
+
+import quiz_import
+from quiz_import import QuizImportError, build_quiz, detect_format, quizzes_from_rows
+
+CATEGORIES = {"1": "1", "istorija": "1", "3": "3", "geografija": "3"}
+
+CSV = (
+    "Kviz;Kategorija;Tip;Pitanje;Opcija1;Opcija2;Opcija3;Opcija4;TačanOdgovor;SlikaURL;YouTubeURL;Objašnjenje\n"
+    "Prestonice;Geografija;multiple;Glavni grad Srbije?;Niš;Beograd;;;2;;;\n"
+    ";;true-false;Dunav protiče kroz Beograd.;;;;;tačno;;;\n"
+    ";;ukrštenica;Nepoznat tip;;;;;1;;;\n"
+    "Bitke;1;multiple;Godina Kosovske bitke?;1389;1459;1804;;1;;;\n"
+)
+
+
+def parse_csv(text, defaults=None):
+    errors = []
+    rows = quiz_import.iter_csv_rows(io.BytesIO(text.encode("utf-8")))
+    return list(quizzes_from_rows(rows, defaults or {}, errors)), errors
+
+
+def test_detect_format():
+    assert detect_format("kvizovi.xlsx") == "xlsx"
+    assert detect_format("export.jsonl") == "ndjson"
+    assert detect_format("x.bin", "CSV") == "csv"
+    with pytest.raises(QuizImportError):
+        detect_format("slika.png")
+
+
+def test_csv_rows_are_grouped_into_quizzes_with_row_errors():
+    quizzes, errors = parse_csv(CSV)
+    assert [(row, q["title"], len(q["questions"])) for row, q in quizzes] == [
+        (2, "Prestonice", 2), (5, "Bitke", 1)
+    ]
+    first = quizzes[0][1]["questions"]
+    # Isto kao uvoz u pregledaču: indeks opcije od 0, tačno/netačno kao tekst
+    assert first[0]["correctAnswer"] == 1 and first[0]["options"] == ["Niš", "Beograd"]
+    assert first[1]["correctAnswer"] == "true"
+    assert [(e["row"], e["quiz"]) for e in errors] == [(4, "Prestonice")]
+
+
+def test_template_without_quiz_columns_uses_form_defaults():
+    text = "Tip,Pitanje,Opcija1,Opcija2,TačanOdgovor\nmultiple,2+2?,3,4,2\n"
+    quizzes, errors = parse_csv(text, {"title": "Matematika", "categoryId": "1"})
+    assert errors == []
+    [(_, quiz)] = quizzes
+    assert quiz["title"] == "Matematika" and quiz["categoryId"] == "1"
+
+
+def test_build_quiz_resolves_category_name_and_validates():
+    quiz = build_quiz({"title": "T", "description": "", "categoryId": "Geografija", "questions": [
+        {"type": "true-false", "question": "?", "correctAnswer": "true"}
+    ]}, CATEGORIES, "kreator")
+    assert quiz["categoryId"] == "3"
+    assert quiz["questionCount"] == 1 and quiz["createdBy"] == "kreator"
+
+    with pytest.raises(ValueError, match="ne postoji"):
+        build_quiz({"title": "T", "description": "", "categoryId": "99", "questions": [
+            {"type": "true-false", "question": "?", "correctAnswer": "true"}
+        ]}, CATEGORIES, "kreator")
+    with pytest.raises(ValueError, match="questions.0.id"):
+        build_quiz({"title": "T", "description": "", "categoryId": "1", "questions": [
+            {"id": "a.b", "type": "true-false", "question": "?", "correctAnswer": "true"}
+        ]}, CATEGORIES, "kreator")
+
+
+def test_ndjson_reports_bad_lines():
+    lines = [json.dumps({"title": "A"}), "{nije json", "[1, 2]", ""]
+    errors = []
+    quizzes = list(quiz_import.iter_ndjson_quizzes(io.BytesIO("\n".join(lines).encode()), errors))
+    assert [row for row, _ in quizzes] == [1]
+    assert [e["row"] for e in errors] == [2, 3]
+
+
+def test_import_runs_in_batches_off_the_event_loop(mongo, monkeypatch):
+    monkeypatch.setattr(quiz_import, "BATCH_SIZE", 2)
+    body = {"description": "", "categoryId": "3", "questions": [
+        {"type": "true-false", "question": "?", "correctAnswer": "true"}
+    ]}
+    lines = [json.dumps(dict(body, title=f"Kviz {i}")) for i in range(4)]
+    lines.insert(2, json.dumps(dict(body, title="Bez kategorije", categoryId="99")))
+    data = io.BytesIO("\n".join(lines).encode())
+
+    async def scenario():
+        await mongo.categories.insert_one({"id": "3", "name": "Geografija", "quizCount": 0})
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0)
+
+        task = asyncio.create_task(ticker())
+        report = await quiz_import.import_quizzes(data, "ndjson", "kreator")
+        task.cancel()
+        return report, ticks, await mongo.quizzes.count_documents({}), await mongo.categories.find_one({"id": "3"})
+
+    report, ticks, stored, category = asyncio.run(scenario())
+    assert (report["imported"], report["failed"]) == (4, 1)
+    assert [e["row"] for e in report["errors"]] == [3]
+    assert stored == 4 and category["quizCount"] == 4
+    # Event loop je radio dok su se paketi čitali
+    assert ticks > 3
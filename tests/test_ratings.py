@@ -0,0 +1,16 @@
+from ratings import PRIOR_MEAN, PRIOR_WEIGHT, average, quiz_update
+
+
+def test_average_is_computed_from_sum_and_count():
+    assert average({"ratingSum": 14, "ratingCount": 3}) == 4.7
+    assert average({}) == 0.0
+
+
+def test_quiz_update_applies_delta_then_recomputes_score():
+    increment, score = quiz_update(-2, 0)
+    assert increment["$set"]["ratingSum"] == {"$add": [{"$ifNull": ["$ratingSum", 0]}, -2]}
+    assert increment["$set"]["ratingCount"] == {"$add": [{"$ifNull": ["$ratingCount", 0]}, 0]}
+    # Drugi korak čita već uvećane vrednosti
+    numerator, denominator = score["$set"]["ratingScore"]["$divide"]
+    assert numerator == {"$add": [PRIOR_WEIGHT * PRIOR_MEAN, "$ratingSum"]}
+    assert denominator == {"$add": [PRIOR_WEIGHT, "$ratingCount"]}
@@ -0,0 +1,33 @@
+from datetime import datetime
+
+from retention import month_key, rollup_increments, rollup_update
+
+
+def result(user_id, score, day, month=3, passed=False, points=None):
+    return {"userId": user_id, "quizId": "k1", "score": score, "correctCount": score // 10,
+            "totalQuestions": 10, "passed": passed, "points": points,
+            "completedAt": datetime(2025, month, day, 12)}
+
+
+def test_results_are_grouped_per_user_quiz_and_month():
+    rollups = rollup_increments([
+        result("a", 80, 3, passed=True, points=120), result("a", 40, 20),
+        result("a", 90, 1, month=4), result("b", 10, 5),
+    ])
+    assert set(rollups) == {("a", "k1", "2025-03"), ("a", "k1", "2025-04"), ("b", "k1", "2025-03")}
+    march = rollups[("a", "k1", "2025-03")]
+    assert dict(march["inc"]) == {
+        "plays": 2, "scoreSum": 120, "correctCount": 12, "totalQuestions": 20,
+        "points": 120, "passedCount": 1, "scores.80": 1, "scores.40": 1,
+    }
+    assert march["first"].day == 3 and march["last"].day == 20 and march["best"] == 80
+    assert month_key(datetime(2025, 12, 31)) == "2025-12"
+
+
+def test_rollup_update_skips_already_applied_batch():
+    [(key, rollup)] = rollup_increments([result("a", 50, 2)]).items()
+    op = rollup_update("paket-1", key, rollup)
+    assert op._filter["appliedBatches"] == {"$ne": "paket-1"}
+    assert op._doc["$inc"]["plays"] == 1
+    assert op._doc["$push"]["appliedBatches"]["$each"] == ["paket-1"]
+    assert op._upsert
@@ -0,0 +1,98 @@
+import asyncio
+import json
+import logging
+
+import pytest
+
+import rooms
+import server
+
+QUIZ = {
+    "id": "k1", "title": "Prestonice", "categoryId": "3", "version": 2,
+    "questions": [
+        {"id": "q1", "question": "Srbija", "correctAnswer": "Beograd"},
+        {"id": "q2", "question": "Francuska", "correctAnswer": "Pariz"},
+    ],
+}
+
+
+class RecordingBus:
+    def publish(self, channel, data=None, local=True):
+        pass
+
+
+@pytest.fixture
+def no_bus(monkeypatch):
+    monkeypatch.setattr(rooms, "bus", RecordingBus())
+    monkeypatch.setattr(rooms, "_rooms", {})
+
+
+def received(connection):
+    messages = []
+    while not connection.queue.empty():
+        text = connection.queue.get_nowait()
+        if text is not None:
+            messages.append(json.loads(text))
+    return messages
+
+
+def test_room_lifecycle_saves_results_of_players_who_answered(mongo, no_bus):
+    async def scenario():
+        await mongo.users.insert_many([
+            {"id": user_id, "username": user_id, "totalScore": 0, "quizzesCompleted": 0} for user_id in ("u1", "u2")
+        ])
+        room = rooms.create_room(QUIZ, "host", 10)
+        host = rooms.Connection(None)
+        room.set_host(host)
+        ana = room.join("Ana", "u1", rooms.Connection(None))
+        bora = room.join("Bora", "u2", rooms.Connection(None))
+        guest = room.join("Gost", None, rooms.Connection(None))
+
+        room.next_question()
+        room.answer(ana, 0, "beograd")
+        room.answer(bora, 0, "Niš")
+        with pytest.raises(rooms.RoomError):
+            room.answer(ana, 0, "Beograd")
+        room.answer(guest, 0, "Beograd")
+        assert room.state == "reveal"
+
+        room.next_question()
+        room.answer(ana, 1, "Pariz")
+        room.reveal()
+        room.next_question()
+        assert room.state == "finished" and room.persisted
+        await asyncio.gather(*rooms._result_tasks)
+        assert not rooms._result_tasks
+
+        types = [m["type"] for m in received(ana.connection)]
+        assert types.count("question") == 2 and types.count("reveal") == 2
+        assert received(bora.connection)[-1] == {"type": "final_rank", "rank": 3, "score": 0}
+        results = {r["userId"]: r async for r in mongo.results.find({"quizId": "k1"})}
+        return results, await mongo.quiz_stats.find_one({"quizId": "k1"})
+
+    results, quiz_stats = asyncio.run(scenario())
+    assert results["u1"]["score"] == 100 and results["u2"]["score"] == 0
+    assert results["u1"]["quizVersion"] == 2
+    # Gost ulazi u statistiku kviza, ali nema red u results
+    assert quiz_stats["plays"] == 3 and quiz_stats["guestScores"] == {"50": 1}
+
+
+def test_failed_result_handler_is_logged_and_released(no_bus, monkeypatch, caplog):
+    async def failing(room):
+        raise RuntimeError("baza nije dostupna")
+
+    monkeypatch.setattr(rooms, "_result_handler", failing)
+
+    async def scenario():
+        room = rooms.create_room(QUIZ, "host", 10)
+        room.finish()
+        room.finish()
+        assert len(rooms._result_tasks) == 1
+        await asyncio.gather(*rooms._result_tasks, return_exceptions=True)
+        return room
+
+    with caplog.at_level(logging.ERROR, logger="rooms"):
+        room = asyncio.run(scenario())
+    assert not rooms._result_tasks
+    assert f"Čuvanje rezultata sobe {room.code} nije uspelo" in caplog.text
+    assert "baza nije dostupna" in caplog.text
@@ -0,0 +1,95 @@
+import pytest
+
+import sessions
+from scoring import answers_match, question_points
+
+QUIZ = {
+    "id": "quiz-1",
+    "version": 3,
+    "timeLimit": 1,
+    "questions": [
+        {"id": "q1", "correctAnswer": "2"},
+        {"id": "q2", "correctAnswer": True},
+        {"id": "q3", "correctAnswer": "Beograd"},
+    ],
+}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(sessions.time, "monotonic", fake)
+    monkeypatch.setattr(sessions, "_sessions", sessions.OrderedDict())
+    return fake
+
+
+def test_question_points_match_scoring_doc():
+    # Primeri iz SISTEM_BODOVANJA.md
+    assert question_points(True, 5, 30) == 1416
+    assert question_points(True, 28, 30) == 1033
+    assert question_points(True, 60, 60) == 1000
+    assert question_points(True, 100, 0) == 1000
+    assert question_points(False, 1, 30) == 0
+
+
+def test_late_answer_scores_zero():
+    assert question_points(True, 40, 30) == 0
+
+
+def test_answers_match_normalizes():
+    assert answers_match(True, "true")
+    assert answers_match("Beograd", "beograd")
+    assert not answers_match("1", "2")
+
+
+def test_time_per_question_comes_from_quiz_limit():
+    assert sessions.time_per_question(QUIZ) == 20
+    assert sessions.time_per_question({**QUIZ, "timeLimit": 0}) == 0
+    assert sessions.time_per_question({"questions": []}) == 0
+
+
+def test_session_grades_in_order_with_speed_bonus(clock):
+    session = sessions.create_session(QUIZ, 20, "user-1", "user-1")
+    clock.now += 5
+    first = session.answer("2")
+    assert first["correct"] and first["points"] == 1375
+    clock.now += 30
+    late = session.answer(True)
+    assert not late["correct"] and late["points"] == 0
+    clock.now += 1
+    last = session.answer("beograd")
+    assert last["correct"] and last["finished"]
+    assert session.correct_flags == [True, False, True]
+    assert session.points == 1375 + last["points"]
+
+
+def test_skip_remaining_marks_unanswered_wrong(clock):
+    session = sessions.create_session(QUIZ, 0, None, "guest:x")
+    session.answer("2")
+    session.skip_remaining()
+    assert session.correct_flags == [True, False, False]
+    assert session.answers == ["2", None, None]
+    assert session.finished
+
+
+def test_sessions_expire_after_ttl(clock):
+    session = sessions.create_session(QUIZ, 0, None, "guest:x")
+    assert sessions.get_session(session.id) is session
+    clock.now += sessions.SESSION_TTL_SECONDS + 1
+    assert sessions.get_session(session.id) is None
+
+
+def test_expired_sessions_are_evicted_on_create(clock):
+    old = sessions.create_session(QUIZ, 0, None, "guest:a")
+    clock.now += sessions.SESSION_TTL_SECONDS + 1
+    sessions.create_session(QUIZ, 0, None, "guest:b")
+    assert old.id not in sessions._sessions
+    assert len(sessions._sessions) == 1
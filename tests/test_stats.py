@@ -0,0 +1,72 @@
+import asyncio
+from datetime import datetime
+
+from stats import guest_buckets, histogram_list, question_key, rebuild_score_histograms, record_submissions, score_distribution
+
+
+def test_histogram_list_has_101_buckets():
+    histogram = histogram_list({"0": 1, "100": 2})
+    assert len(histogram) == 101
+    assert histogram[0] == 1 and histogram[100] == 2
+
+
+def test_distribution_average_median_percentile():
+    scores = {"50": 2, "80": 1, "100": 1}
+    d = score_distribution(scores, 80)
+    assert d["totalPlays"] == 4
+    assert d["averageScore"] == 70.0
+    assert d["medianScore"] == 50
+    # Dve od četiri predaje imaju strogo niži rezultat
+    assert d["percentile"] == 50.0
+
+
+def test_percentile_extremes():
+    scores = {"10": 1, "20": 1, "30": 1, "40": 1}
+    assert score_distribution(scores, 10)["percentile"] == 0.0
+    assert score_distribution(scores, 100)["percentile"] == 100.0
+
+
+def test_median_odd_count():
+    assert score_distribution({"10": 1, "60": 1, "90": 1})["medianScore"] == 60
+
+
+def test_empty_histogram():
+    d = score_distribution(None, 50)
+    assert d == {"percentile": 0.0, "averageScore": 0.0, "medianScore": 0, "totalPlays": 0}
+
+
+def test_question_key_hashes_unsafe_ids():
+    assert question_key("q123") == "q123"
+    for unsafe in ("a.b", "$x", ""):
+        key = question_key(unsafe)
+        assert "." not in key and not key.startswith("$") and key
+    assert question_key("a.b") == question_key("a.b")
+
+
+def test_guest_buckets_seed_from_live_histogram_until_first_rebuild():
+    # Pre prvog obnavljanja: višak živog histograma preko prijavljenih su gosti
+    assert guest_buckets({"scores": {"50": 3, "80": 1}}, {"50": 1, "80": 1}) == {"50": 2}
+    assert guest_buckets({"scores": {"50": 1}, "guestScores": {"50": 2, "90": 1}}, {"50": 1}) == {"50": 2, "90": 1}
+    # Posle njega važi samo guestScores
+    assert guest_buckets({"scores": {"50": 3}, "guestScores": {"50": 1}, "rebuiltAt": datetime(2025, 1, 1)}, {}) == {"50": 1}
+
+
+def test_rebuild_keeps_guests_and_resets_quizzes_without_plays(mongo):
+    async def scenario():
+        await record_submissions("k1", ["q1"], [[True], [False]], [100, 0], guest_scores=[0])
+        await mongo.results.insert_one({"userId": "u1", "quizId": "k1", "score": 100})
+        await mongo.quiz_stats.insert_one({"quizId": "k2", "plays": 2, "scores": {"40": 2}, "guestScores": {},
+                                           "rebuiltAt": datetime(2025, 1, 1)})
+        await mongo.results_monthly.insert_one({"userId": "u1", "quizId": "k2", "month": "2024-01", "scores": {}})
+
+        assert await rebuild_score_histograms() == 2
+        k1 = await mongo.quiz_stats.find_one({"quizId": "k1"})
+        assert k1["scores"] == {"100": 1, "0": 1} and k1["guestScores"] == {"0": 1} and k1["plays"] == 2
+        # Drugo obnavljanje ne menja ništa
+        await rebuild_score_histograms("k1")
+        assert (await mongo.quiz_stats.find_one({"quizId": "k1"}))["scores"] == k1["scores"]
+        assert k1["questions"]["q1"] == {"attempts": 2, "correct": 1}
+        k2 = await mongo.quiz_stats.find_one({"quizId": "k2"})
+        assert k2["scores"] == {} and k2["plays"] == 0
+
+    asyncio.run(scenario())
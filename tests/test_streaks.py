@@ -0,0 +1,36 @@
+from datetime import date, datetime
+
+from streaks import current_streak, day_keys, local_day, streak_from_days, streak_update
+
+
+def test_day_is_taken_in_player_timezone():
+    moment = datetime(2025, 6, 1, 22, 30)  # UTC
+    assert local_day(moment, "Europe/Belgrade") == date(2025, 6, 2)
+    assert local_day(moment, "America/New_York") == date(2025, 6, 1)
+    assert local_day(moment, "Nije/Zona") == local_day(moment, None)
+
+
+def test_yesterday_is_calendar_day_across_dst():
+    # Dan posle prelaska na letnje vreme ima 23 sata
+    assert day_keys(datetime(2025, 3, 30, 22, 30), "Europe/Belgrade") == ("2025-03-31", "2025-03-30")
+
+
+def test_streak_update_compares_with_today_and_yesterday():
+    pipeline = streak_update(datetime(2025, 6, 1, 10), "Europe/Belgrade")
+    branches = pipeline[0]["$set"]["stats.streak.current"]["$switch"]["branches"]
+    assert branches[0]["case"] == {"$gte": ["$stats.streak.lastDay", "2025-06-01"]}
+    assert branches[1]["case"] == {"$eq": ["$stats.streak.lastDay", "2025-05-31"]}
+    assert pipeline[1]["$set"]["stats.streak.lastDay"] == {"$max": ["$stats.streak.lastDay", "2025-06-01"]}
+
+
+def test_current_streak_expires_after_a_missed_day():
+    streak = {"current": 4, "longest": 6, "lastDay": "2025-05-31"}
+    assert current_streak(streak, datetime(2025, 6, 1, 10)) == 4
+    assert current_streak(streak, datetime(2025, 6, 2, 10)) == 0
+    assert current_streak({}, datetime(2025, 6, 2, 10)) == 0
+
+
+def test_streak_from_days():
+    days = [date(2025, 1, 1), date(2025, 1, 2), date(2025, 1, 3), date(2025, 1, 3), date(2025, 1, 7), date(2025, 1, 8)]
+    assert streak_from_days(days) == {"current": 2, "longest": 3, "lastDay": "2025-01-08"}
+    assert streak_from_days([]) is None
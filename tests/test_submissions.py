@@ -0,0 +1,81 @@
+import asyncio
+
+import rooms
+import server
+import sessions
+
+QUIZ = {
+    "id": "k1", "title": "Prestonice", "categoryId": "3", "version": 1, "timeLimit": 0,
+    "questions": [
+        {"id": "q1", "question": "Srbija", "correctAnswer": "Beograd"},
+        {"id": "q2", "question": "Francuska", "correctAnswer": "Pariz"},
+    ],
+}
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+async def _setup(mongo, *user_ids):
+    await mongo.quizzes.insert_one(dict(QUIZ))
+    await mongo.users.insert_many([
+        {"id": user_id, "username": user_id, "totalScore": 0, "quizzesCompleted": 0} for user_id in user_ids
+    ])
+
+
+def test_session_play_counts_for_quiz_category(mongo):
+    async def scenario():
+        await _setup(mongo, "u1")
+        session = sessions.create_session(QUIZ, 0, "u1", "u1")
+        session.answer("Beograd")
+        await server.finish_quiz_session(session.id, user_id="u1")
+        return await mongo.category_scores.find_one({"userId": "u1"}, {"_id": 0})
+
+    assert run(scenario()) == {"userId": "u1", "categoryId": "3", "score": 50, "plays": 1}
+
+
+def test_room_results_count_for_quiz_category(mongo):
+    async def scenario():
+        await _setup(mongo, "u1", "u2")
+        room = rooms.Room("ABCD", QUIZ, "host", 0)
+        for user_id, flags in (("u1", [True, True]), ("u2", [True, False])):
+            player = rooms.Player(user_id, user_id, user_id, len(QUIZ["questions"]))
+            player.correct_flags = flags
+            player.answered = 1
+            room.players[user_id] = player
+        # Igrač bez odgovora se ne računa
+        room.players["gost"] = rooms.Player("gost", "Gost", None, len(QUIZ["questions"]))
+        await server._save_room_results(room)
+        return await mongo.category_scores.find({}, {"_id": 0}).sort("userId", 1).to_list(None)
+
+    assert run(scenario()) == [
+        {"userId": "u1", "categoryId": "3", "score": 100, "plays": 1},
+        {"userId": "u2", "categoryId": "3", "score": 50, "plays": 1},
+    ]
+
+
+def test_session_play_updates_user_stats_under_quiz_category(mongo):
+    async def scenario():
+        await _setup(mongo, "u1")
+        session = sessions.create_session(QUIZ, 0, "u1", "u1")
+        await server.finish_quiz_session(session.id, user_id="u1")
+        return (await mongo.users.find_one({"id": "u1"}))["stats"]
+
+    stats = run(scenario())
+    assert set(stats["categories"]) == {"3"}
+    assert stats["recent"][0]["quizTitle"] == "Prestonice"
+
+
+def test_room_results_feed_category_badge_counters(mongo):
+    async def scenario():
+        await _setup(mongo, "u1")
+        room = rooms.Room("ABCD", QUIZ, "host", 0)
+        player = rooms.Player("u1", "u1", "u1", len(QUIZ["questions"]))
+        player.correct_flags, player.answered = [True, True], 1
+        room.players["u1"] = player
+        await server._save_room_results(room)
+        return (await mongo.users.find_one({"id": "u1"}))["badgeStats"]
+
+    counters = run(scenario())
+    assert counters["categories"] == {"3": {"plays": 1, "scoreSum": 100}}
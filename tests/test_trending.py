@@ -0,0 +1,18 @@
+import math
+from datetime import datetime, timedelta
+
+from trending import HALF_LIFE_HOURS, play_update, play_weight
+
+
+def test_weight_doubles_every_half_life():
+    moment = datetime(2025, 6, 1)
+    later = moment + timedelta(hours=HALF_LIFE_HOURS)
+    assert math.isclose(play_weight(later) - play_weight(moment), math.log(2))
+    assert math.isclose(play_weight(moment, 4) - play_weight(moment), math.log(4))
+
+
+def test_play_update_increments_plays_and_seeds_missing_score():
+    [stage] = play_update(3, datetime(2025, 6, 1))
+    assert stage["$set"]["plays"] == {"$add": [{"$ifNull": ["$plays", 0]}, 3]}
+    first_play = stage["$set"]["trending"]["$cond"][1]
+    assert math.isclose(first_play, play_weight(datetime(2025, 6, 1), 3))
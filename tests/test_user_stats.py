@@ -0,0 +1,51 @@
+import asyncio
+from datetime import datetime
+
+from user_stats import RECENT_LIMIT, accuracy, average, backfill, fold_history, stats_update
+
+
+def test_stats_update_merges_counters_best_and_recent():
+    moment = datetime(2025, 6, 1, 10)
+    update = stats_update({"id": "k", "title": "Prestonice", "categoryId": "3"},
+                          {"score": 80, "correctCount": 8, "totalQuestions": 10, "passed": True, "completedAt": moment})
+    assert update["$inc"]["stats.plays"] == 1 and update["$inc"]["stats.categories.3.correctCount"] == 8
+    assert update["$inc"]["stats.passedCount"] == 1
+    assert update["$max"] == {"stats.bestScore": 80, "stats.categories.3.bestScore": 80, "stats.lastPlayedAt": moment}
+    recent = update["$push"]["stats.recent"]
+    assert recent["$position"] == 0 and recent["$slice"] == RECENT_LIMIT
+    assert recent["$each"][0]["quizTitle"] == "Prestonice"
+
+
+def test_fold_history_combines_raw_and_monthly_rows():
+    rows = [
+        {"userId": "a", "quizId": "k1", "plays": 2, "scoreSum": 150, "correctCount": 15, "totalQuestions": 20,
+         "passedCount": 1, "bestScore": 90, "lastPlayedAt": datetime(2025, 6, 2)},
+        {"userId": "a", "quizId": "k2", "plays": 1, "scoreSum": 40, "correctCount": 4, "totalQuestions": 10,
+         "passedCount": 0, "bestScore": 40, "lastPlayedAt": datetime(2024, 1, 5)},
+    ]
+    stats = fold_history(rows, {"k1": "3", "k2": "3"})["a"]
+    assert stats["plays"] == 3 and stats["bestScore"] == 90 and stats["lastPlayedAt"] == datetime(2025, 6, 2)
+    assert stats["categories"]["3"]["scoreSum"] == 190
+    assert average(stats) == 63 and accuracy(stats) == 63.3
+    assert average({}) == 0 and accuracy({}) == 0.0
+
+
+def test_rebuild_moves_plays_out_of_none_category_and_keeps_streak(mongo):
+    async def scenario():
+        moment = datetime(2025, 6, 1, 10)
+        await mongo.quizzes.insert_one({"id": "k1", "title": "Prestonice", "categoryId": "3"})
+        await mongo.results.insert_one({"id": "r1", "userId": "u1", "quizId": "k1", "score": 80, "correctCount": 8,
+                                        "totalQuestions": 10, "passed": True, "completedAt": moment})
+        streak = {"current": 3, "longest": 5, "lastDay": "2025-06-01"}
+        await mongo.users.insert_one({"id": "u1", "stats": {
+            "plays": 1, "categories": {"none": {"plays": 1}}, "recent": [], "streak": streak,
+        }})
+        await backfill()
+        assert "3" not in (await mongo.users.find_one({"id": "u1"}))["stats"]["categories"]
+        await backfill(rebuild=True)
+        stats = (await mongo.users.find_one({"id": "u1"}))["stats"]
+        assert set(stats["categories"]) == {"3"} and stats["categories"]["3"]["plays"] == 1
+        assert stats["recent"][0]["quizTitle"] == "Prestonice"
+        assert stats["streak"] == streak
+
+    asyncio.run(scenario())